@@ -0,0 +1,534 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+
+# The benchmark runs on build machines without a display or sound card
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame as pg
+from main import Game
+from source.settings import *
+from source.maps import mapTwo, mapTwoSprites
+from source.mapfile import saveLevel
+from source.levelgen import LevelGenerator
+
+
+class FrameBenchmark:
+    """
+    The FrameBenchmark class measures the cost of a frame of the game loop
+    in a repeatable way. It runs the real Game with SDL's dummy video and
+    audio drivers, moves the player along a scripted camera path over the
+    map with a fixed deltaTime, and reads the profiler's timing spans of
+    each subsystem of every frame, without the clock throttling the loop
+    to FPS.
+
+    Attributes:
+        frames (int): Number of measured frames.
+        warmup (int): Number of frames run before measuring.
+        seed (int): Seed for the random number generator.
+        game (Game): The game instance being measured.
+        timings (dict): Per-frame durations in milliseconds of each timed
+                        subsystem, plus the whole frame.
+    """
+
+    # Tiles the camera visits in order, looping back to the first one
+    WAYPOINTS = [(2, 2), (11, 8), (21, 10), (20, 22), (3, 24)]
+    # Distance the camera travels each frame in tiles
+    CAMERA_SPEED = 0.05
+    # Keeps the camera off tile centers, where it would line up exactly
+    # with enemies placed on them and zero the sight line ray's sine
+    CAMERA_OFFSET = 0.013
+    # Profiler spans reported for every frame
+    SUBSYSTEMS = [
+        'Player.update',
+        'RayCasting.update',
+        'SpriteManager.update',
+        'Weapon.update',
+        'Renderer.draw',
+    ]
+
+    def __init__(
+            self, frames=600, warmup=60, seed=0, dynamicResolution=False,
+            wallRenderer=WALL_RENDERER, workers=WALL_WORKERS,
+            mapPath=MAP_PATH, waypoints=None
+    ):
+        """
+        Initializes the benchmark and starts a new game to measure.
+
+        Args:
+            frames (int): Number of measured frames.
+            warmup (int): Number of frames run before measuring.
+            seed (int): Seed for the random number generator.
+            dynamicResolution (bool): Whether the dynamic resolution
+                                      controller may change the ray count,
+                                      off by default to keep the workload
+                                      fixed.
+            wallRenderer (str): 'Framebuffer', 'Parallel' or 'Blit'.
+            workers (int): Worker processes of the parallel renderer.
+            mapPath (str): Level file to run the benchmark on.
+            waypoints (list): Tiles the camera visits. The default
+                              WAYPOINTS lie in the top left 25x27 tiles,
+                              which must then be laid out like mapTwo.
+        """
+        self.frames = frames
+        self.warmup = warmup
+        self.seed = seed
+        self.waypoints = waypoints or self.WAYPOINTS
+        random.seed(seed)
+        self.game = Game(mapPath)
+        self.game.fixedDeltaTime = 1000 / FPS
+        self.game.newGame()
+        self.game.resolution.enabled = dynamicResolution
+        self.workers = workers
+        self.game.renderer.setWallRenderer(wallRenderer, workers)
+        self.game.profiler.enabled = True
+        self.timings = {name: [] for name in self.SUBSYSTEMS}
+        self.timings['frame'] = []
+
+    def cameraPath(self):
+        """
+        Builds the scripted camera path as a list of player positions. The
+        path follows the shortest tile route between the waypoints and is
+        resampled to a constant speed. The camera passes through enemies,
+        so the routes only go around walls.
+
+        Returns:
+            list: (x, y) positions, one for each frame of a lap.
+
+        Raises:
+            ValueError: If a waypoint cannot be reached from the one before.
+        """
+        pathfinding = self.game.pathfinding
+        graph = pathfinding.graph
+        tiles = []
+        waypoints = self.waypoints + self.waypoints[:1]
+        for start, goal in zip(waypoints, waypoints[1:]):
+            visited = pathfinding.searchGraph(graph, start, goal, ())
+            route = graph.traceRoute(visited, start, goal)
+            if route is None:
+                raise ValueError(
+                    f'waypoint {goal} cannot be reached from {start}'
+                )
+            tiles += [start] + route[:-1]
+        offset = 0.5 + self.CAMERA_OFFSET
+        points = [(x + offset, y + offset) for x, y in tiles]
+
+        positions = []
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            steps = max(1, round(
+                math.hypot(x2 - x1, y2 - y1) / self.CAMERA_SPEED
+            ))
+            for step in range(steps):
+                positions.append((
+                    x1 + (x2 - x1) * step / steps,
+                    y1 + (y2 - y1) * step / steps
+                ))
+        return positions
+
+    def run(self):
+        """
+        Runs the warmup and measured frames along the camera path.
+
+        Returns:
+            dict: The benchmark report.
+        """
+        game = self.game
+        player = game.player
+        positions = self.cameraPath()
+        triggerTime = 0
+
+        for frame in range(self.warmup + self.frames):
+            if frame == self.warmup:
+                for samples in self.timings.values():
+                    samples.clear()
+
+            x, y = positions[frame % len(positions)]
+            nextX, nextY = positions[(frame + 1) % len(positions)]
+            player.x, player.y = x, y
+            player.angle = (
+                math.atan2(nextY - y, nextX - x)
+                + 0.6 * math.sin(frame * 0.02)
+            ) % math.tau
+            player.health = PLAYER_MAX_HEALTH
+
+            # The death animation timer fires every 40ms of game time
+            triggerTime += game.fixedDeltaTime
+            game.universalTrigger = triggerTime >= 40
+            if game.universalTrigger:
+                triggerTime -= 40
+            pg.event.pump()
+
+            game.profiler.beginFrame()
+            game.update()
+            game.draw()
+            game.present()
+            game.profiler.endFrame()
+            _, frameTime, spans = game.profiler.samples[-1]
+            self.timings['frame'].append(frameTime)
+            for name in self.SUBSYSTEMS:
+                self.timings[name].append(spans.get(name, 0))
+
+        return self.report()
+
+    @staticmethod
+    def summarize(samples):
+        """
+        Summarizes a list of durations in milliseconds.
+
+        Args:
+            samples (list): The durations to summarize.
+
+        Returns:
+            dict: Mean, median, p95, p99 and maximum of the durations.
+        """
+        if not samples:
+            return {}
+        samples = np.asarray(samples)
+        return {
+            'mean': float(samples.mean()),
+            'p50': float(np.percentile(samples, 50)),
+            'p95': float(np.percentile(samples, 95)),
+            'p99': float(np.percentile(samples, 99)),
+            'max': float(samples.max()),
+        }
+
+    def report(self):
+        """
+        Builds the benchmark report from the recorded timings.
+
+        Returns:
+            dict: The configuration the benchmark ran with, the frame time
+                  statistics, the statistics of each subsystem and those of
+                  the AI scheduler.
+        """
+        return {
+            'config': {
+                'frames': self.frames,
+                'warmup': self.warmup,
+                'seed': self.seed,
+                'deltaTime': self.game.fixedDeltaTime,
+                'resolution': list(RES),
+                'rays': self.game.raycasting.numbRays,
+                'map': list(self.game.map.grid.shape[::-1]),
+                'enemies': len(self.game.spriteManager.enemyList),
+                'dynamicResolution': self.game.resolution.enabled,
+                'raycastEngine': RAYCAST_ENGINE,
+                'wallRenderer': self.game.renderer.wallRenderer,
+                'workers': self.workers,
+                'wallStripCache': WALL_STRIP_CACHE,
+                'pathFinding': self.game.pathfinding.mode,
+                'aiScheduler': AI_SCHEDULER,
+            },
+            'frame': self.summarize(self.timings['frame']),
+            'subsystems': {
+                name: self.summarize(self.timings[name])
+                for name in self.SUBSYSTEMS
+            },
+            'aiScheduler': self.game.spriteManager.scheduler.stats(),
+        }
+
+    def close(self):
+        """
+        Stops the worker pool of the parallel renderer, if any, and the path
+        worker, and closes the level file.
+        """
+        self.game.renderer.close()
+        self.game.map.close()
+        self.game.pathfinding.close()
+
+
+def scaling(frames, warmup, seed, workerCounts):
+    """
+    Runs the benchmark with the parallel wall renderer for each worker
+    count and compares the results with the single worker run.
+
+    Args:
+        frames (int): Number of measured frames of each run.
+        warmup (int): Number of frames run before measuring.
+        seed (int): Seed for the random number generator.
+        workerCounts (list): Worker counts to measure.
+
+    Returns:
+        dict: Mean frame time, frames per second and speedup over a single
+              worker of every worker count, plus the number of CPUs.
+    """
+    results = {}
+    for workers in sorted(set([1] + workerCounts)):
+        benchmark = FrameBenchmark(
+            frames, warmup, seed, wallRenderer='Parallel', workers=workers
+        )
+        try:
+            report = benchmark.run()
+        finally:
+            benchmark.close()
+        results[workers] = {
+            'frameTime': report['frame']['mean'],
+            'renderTime': report['subsystems']['RayCasting.update']['mean'],
+            'fps': 1000 / report['frame']['mean'],
+        }
+    for result in results.values():
+        result['speedup'] = results[1]['frameTime'] / result['frameTime']
+    return {
+        'cpus': os.cpu_count(),
+        'workers': {str(key): value for key, value in results.items()},
+    }
+
+
+def buildCrowdLevel(path, enemies, copies, seed):
+    """
+    Writes a large level made of copies x copies mapTwo layouts, with
+    mapTwo's sprites and a number of troopers spread over random empty
+    tiles of the whole level.
+
+    Args:
+        path (str): Path of the level file to write.
+        enemies (int): Number of troopers to place.
+        copies (int): Number of copies of mapTwo along each side.
+        seed (int): Seed for the random placement.
+    """
+    tiles = np.tile(np.array(mapTwo, dtype=np.uint8), (copies, copies))
+    ys, xs = np.nonzero(tiles == 0)
+    picks = np.random.default_rng(seed).choice(
+        len(xs), size=enemies, replace=False
+    )
+    saveLevel(
+        path,
+        tiles,
+        sprites=mapTwoSprites,
+        enemies=[
+            ('Trooper', (xs[pick] + 0.5, ys[pick] + 0.5)) for pick in picks
+        ],
+        playerPosition=PLAYER_POSITION,
+        playerAngle=PLAYER_ANGLE
+    )
+
+
+def crowd(frames, warmup, seed, enemyCounts, copies):
+    """
+    Runs the benchmark on a large level with each number of enemies spread
+    over it, to check that the frame time stays flat as enemies are added
+    outside the player's view.
+
+    Args:
+        frames (int): Number of measured frames of each run.
+        warmup (int): Number of frames run before measuring.
+        seed (int): Seed for the random number generator.
+        enemyCounts (list): Numbers of enemies to measure.
+        copies (int): Number of copies of mapTwo along each side of the
+                      level.
+
+    Returns:
+        dict: The mean frame time, sprite update time and AI scheduler
+              statistics of every number of enemies.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for enemies in enemyCounts:
+            path = os.path.join(directory, f'crowd_{enemies}.map')
+            buildCrowdLevel(path, enemies, copies, seed)
+            benchmark = FrameBenchmark(frames, warmup, seed, mapPath=path)
+            try:
+                report = benchmark.run()
+            finally:
+                benchmark.close()
+            results[str(enemies)] = {
+                'frameTime': report['frame']['mean'],
+                'p95': report['frame']['p95'],
+                'spriteUpdate':
+                    report['subsystems']['SpriteManager.update']['mean'],
+                'aiScheduler': report['aiScheduler'],
+            }
+    return {
+        'map': [25 * copies, 27 * copies],
+        'enemies': results,
+    }
+
+
+def sweep(frames, warmup, seed, kind, sizes, enemyDensity):
+    """
+    Runs the benchmark on generated levels of each size, with the camera
+    touring the same corner of every level while the number of enemies
+    grows with the level.
+
+    Args:
+        frames (int): Number of measured frames of each run.
+        warmup (int): Number of frames run before measuring.
+        seed (int): Seed of the levels and the benchmark.
+        kind (str): 'maze', 'cave' or 'arena'.
+        sizes (list): Widths and heights of the square levels.
+        enemyDensity (float): Enemies per open tile.
+
+    Returns:
+        dict: The frame time and subsystem means of every level size.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f'{kind}_{size}.map')
+            generator = LevelGenerator(
+                size, size, seed, enemyDensity=enemyDensity
+            )
+            generator.save(path, kind)
+            benchmark = FrameBenchmark(
+                frames, warmup, seed, mapPath=path,
+                waypoints=generator.waypoints()
+            )
+            try:
+                report = benchmark.run()
+            finally:
+                benchmark.close()
+            results[str(size)] = {
+                'enemies': report['config']['enemies'],
+                'frameTime': report['frame']['mean'],
+                'p95': report['frame']['p95'],
+                'subsystems': {
+                    name: stats['mean']
+                    for name, stats in report['subsystems'].items()
+                },
+            }
+    return {'kind': kind, 'enemyDensity': enemyDensity, 'sizes': results}
+
+
+def paths(seed, kind, sizes, queries):
+    """
+    Times route queries between random tiles of generated levels of each
+    size, once with a search from each start and twice with the planner
+    over clusters, the first time laying out the clusters it reaches.
+    Every query starts with an empty route cache, like an enemy asking for
+    a new route.
+
+    Args:
+        seed (int): Seed of the levels and the queries.
+        kind (str): 'maze', 'cave' or 'arena'.
+        sizes (list): Widths and heights of the square levels.
+        queries (int): Number of route queries on each level.
+
+    Returns:
+        dict: Query time statistics of each mode on every level size.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f'{kind}_{size}.map')
+            LevelGenerator(size, size, seed, 0, 0).save(path, kind)
+            game = Game(path)
+            game.newGame()
+            pathfinding = game.pathfinding
+            # Time the queries themselves rather than handing them over
+            pathfinding.close()
+            tiles = pathfinding.graph.tiles()
+            rng = random.Random(seed)
+            pairs = [
+                (rng.choice(tiles), rng.choice(tiles)) for _ in range(queries)
+            ]
+            def measure(mode):
+                pathfinding.mode = mode
+                timings = []
+                for start, goal in pairs:
+                    pathfinding.routeCache.clear()
+                    begin = time.perf_counter()
+                    pathfinding.getRoute(start, goal)
+                    timings.append(1000 * (time.perf_counter() - begin))
+                return FrameBenchmark.summarize(timings)
+
+            # The planner lays out clusters as routes first reach them, the
+            # second pass runs over the clusters laid out by the first
+            results[str(size)] = {
+                'Search': measure('Search'),
+                'Hierarchical': measure('Hierarchical'),
+                'HierarchicalWarm': measure('Hierarchical'),
+                'clusters': len(pathfinding.hierarchy.nodes),
+            }
+            game.renderer.close()
+            game.map.close()
+    return {'kind': kind, 'queries': queries, 'sizes': results}
+
+
+def main(arguments=None):
+    """
+    Parses the command line, runs the benchmark and writes the report as
+    JSON to a file or to stdout.
+    """
+    parser = argparse.ArgumentParser(
+        description='Headless, deterministic frame benchmark of the game.'
+    )
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file to write the report to')
+    parser.add_argument(
+        '--dynamic-resolution', action='store_true',
+        help='let the dynamic resolution controller change the ray count'
+    )
+    parser.add_argument(
+        '--workers', type=int, nargs='+', metavar='N',
+        help='measure the parallel wall renderer with each worker count'
+    )
+    parser.add_argument(
+        '--enemies', type=int, nargs='+', metavar='N',
+        help='measure a large level with each number of enemies'
+    )
+    parser.add_argument(
+        '--map-copies', type=int, default=32,
+        help='copies of mapTwo along each side of the --enemies level'
+    )
+    parser.add_argument(
+        '--generate', choices=LevelGenerator.KINDS,
+        help='measure generated levels of this kind, see --sizes'
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[32, 128, 512],
+        metavar='N', help='sizes of the square --generate or --paths levels'
+    )
+    parser.add_argument(
+        '--paths', choices=LevelGenerator.KINDS,
+        help='time route queries on generated levels of this kind'
+    )
+    parser.add_argument(
+        '--queries', type=int, default=20,
+        help='route queries on each --paths level'
+    )
+    parser.add_argument(
+        '--enemy-density', type=float, default=LEVELGEN_ENEMY_DENSITY,
+        help='enemies per open tile of the --generate levels'
+    )
+    args = parser.parse_args(arguments)
+
+    if args.paths:
+        report = paths(args.seed, args.paths, args.sizes, args.queries)
+    elif args.generate:
+        report = sweep(
+            args.frames, args.warmup, args.seed, args.generate, args.sizes,
+            args.enemy_density
+        )
+    elif args.enemies:
+        report = crowd(
+            args.frames, args.warmup, args.seed, args.enemies,
+            args.map_copies
+        )
+    elif args.workers:
+        report = scaling(args.frames, args.warmup, args.seed, args.workers)
+    else:
+        benchmark = FrameBenchmark(
+            args.frames, args.warmup, args.seed, args.dynamic_resolution
+        )
+        report = benchmark.run()
+        benchmark.close()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    pg.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import pygame as pg
 import sys
+import argparse
 from source.raycasting import RayCasting
 from source.settings import *
 from source.maps import Map
@@ -9,6 +10,9 @@ from source.spritemanager import SpriteManager
 from source.weapons import Weapon
 from source.audio import Audio
 from source.pathfinding import PathFinding
+from source.sightlines import SightLines
+from source.profiler import Profiler
+from source.resolution import DynamicResolution
 
 
 class Game:
@@ -20,16 +24,24 @@ class Game:
     map, player, and audio.
     """
 
-    def __init__(self):
+    def __init__(self, mapPath=MAP_PATH):
         """
         Initializes the game instance. This method sets up the game environment
+
+        Args:
+            mapPath (str): Path to the level file to play.
         """
+        self.mapPath = mapPath
         pg.init()
         if DISABLE_MOUSE_VISIBILITY is True:
             pg.mouse.set_visible(False)
         self.screen = pg.display.set_mode(RES)
         self.clock = pg.time.Clock()
+        self.profiler = Profiler(self)
         self.deltaTime = 1
+        # When set, every frame advances by this many milliseconds and the
+        # clock no longer throttles the loop to FPS (used by benchmarks)
+        self.fixedDeltaTime = None
         self.universalTrigger = False
 
         # Custom event that uses timer to speed up death animations
@@ -43,7 +55,11 @@ class Game:
         """
         Starts a new instance of the game and initializes all components
         """
-        self.map = Map(self)
+        if hasattr(self, 'renderer'):
+            self.renderer.close()
+            self.map.close()
+            self.pathfinding.close()
+        self.map = Map(self, self.mapPath)
         self.player = Player(self)
         self.renderer = Renderer(self)
         self.raycasting = RayCasting(self)
@@ -51,19 +67,43 @@ class Game:
         self.weapon = Weapon(self)
         self.audio = Audio(self)
         self.pathfinding = PathFinding(self)
+        self.sightLines = SightLines(self)
+        self.resolution = DynamicResolution(self)
 
     def update(self):
         """
         Updates the state of the game every frame using the core game
         components
         """
-        self.player.update()
-        self.raycasting.update()
-        self.spriteManager.update()
-        self.weapon.update()
-        pg.display.flip()
-        self.deltaTime = self.clock.tick(FPS)
-        pg.display.set_caption(f'{self.clock.get_fps():.1f}')
+        self.resolution.update()
+        span = self.profiler.span
+        with span('Player.update'):
+            self.player.update()
+        with span('RayCasting.update'):
+            self.raycasting.update()
+        with span('SpriteManager.update'):
+            self.spriteManager.update()
+        with span('Weapon.update'):
+            self.weapon.update()
+        if self.fixedDeltaTime is None:
+            self.deltaTime = self.clock.tick(FPS)
+        else:
+            self.clock.tick()
+            self.deltaTime = self.fixedDeltaTime
+        caption = f'{self.clock.get_fps():.1f}'
+        if SHOW_CACHE_STATS:
+            hitRate = self.raycasting.stripCache.hitRate
+            caption += f' | strip cache {hitRate:.0%}'
+            hitRate = self.pathfinding.routeCache.hitRate
+            caption += f' | route cache {hitRate:.0%}'
+        if SHOW_AI_STATS:
+            scheduler = self.spriteManager.scheduler
+            tiers = ' '.join(
+                f'{tier} {count}'
+                for tier, count in scheduler.tierCounts.items()
+            )
+            caption += f' | AI {tiers} | over budget {scheduler.overruns}'
+        pg.display.set_caption(caption)
 
     def draw(self):
         """
@@ -72,16 +112,30 @@ class Game:
             - Fills the screen with black in test mode and renders the
               map/player in a 2D representation.
             - Uses the renderer to draw the full 3D game world and the
-              player's weapon.
+              player's weapon, followed by the profiler's frame-time
+              graph when it is toggled on.
+        Either way the whole screen is redrawn and presented with a flip.
         """
+        self.renderer.hud.invalidate()
         if MODE == 'Test':
             self.screen.fill('black')
             if TESTMODE == '2D':
                 self.map.testDraw()
                 self.player.testDraw()
         else:
-            self.renderer.draw()
-            self.weapon.draw()
+            span = self.profiler.span
+            with span('Renderer.draw'):
+                self.renderer.draw()
+            with span('Weapon.draw'):
+                self.weapon.draw()
+            self.profiler.draw()
+
+    def present(self):
+        """
+        Presents everything drawn this frame with a single display update.
+        """
+        with self.profiler.span('display.flip'):
+            self.renderer.hud.present()
 
     def eventLoop(self):
         """
@@ -92,12 +146,17 @@ class Game:
             - Custom universalEvent triggers (for animations)
             - Player interaction events (e.g., firing a weapon or
               sprinting)
+            - Profiler hotkeys (frame-time graph, cProfile capture)
         """
         self.universalTrigger = False
 
         for event in pg.event.get():
             if event.type == pg.QUIT or\
                   (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                self.profiler.dumpCsv()
+                self.renderer.close()
+                self.map.close()
+                self.pathfinding.close()
                 pg.quit()
                 sys.exit()
 
@@ -105,6 +164,9 @@ class Game:
             elif event.type == self.universalEvent:
                 self.universalTrigger = True
 
+            # Profiler hotkeys
+            self.profiler.handleEvent(event)
+
             # Shooting Event
             if self.active:
                 self.player.oneShotEvent(event)
@@ -137,6 +199,7 @@ class Game:
         """
         self.newGame()
         while True:
+            self.profiler.beginFrame()
             self.eventLoop()
             if self.active:
                 self.update()
@@ -147,8 +210,15 @@ class Game:
                 self.renderer.drawGameOver()
             else:
                 self.renderer.drawPauseMenu()
+            self.present()
+            self.profiler.endFrame()
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description='Play The Maze Walker.')
+    parser.add_argument(
+        '--map', default=MAP_PATH, help='level file to play'
+    )
+    args = parser.parse_args()
+    game = Game(args.map)
     game.run()
@@ -0,0 +1,235 @@
+import time
+import numpy as np
+from source.settings import *
+from source.enemies import DYING
+
+# Tiers of enemies, in the order they are reported
+TIERS = ('Active', 'Dying', 'Distant', 'Idle', 'Dead')
+# Index in TIERS of the tier of an enemy in each of the enemy STATES, when
+# it is not made Active by being near or by the player firing
+STATE_TIERS = np.array([3, 2, 0, 0, 0, 1, 4])
+
+
+class AIScheduler:
+    """
+    The AIScheduler class decides how often each enemy near the player runs
+    its logic. Enemies are sorted into tiers every frame:
+
+        Active   chasing, attacking or in pain, within nearDistance tiles,
+                 or any living enemy while the player fires - ticked every
+                 frame.
+        Dying    playing the death animation - ticked every frame.
+        Distant  searching for the player from further away - ticked
+                 every distantInterval frames.
+        Idle     not hunting the player - ticked every idleInterval frames.
+        Dead     a corpse - never ticked. Corpses are left out of the near
+                 enemies by the sprite manager, so this only counts
+                 enemies that were not.
+
+    The Active and Dying tiers are always ticked. The due enemies of the
+    other tiers are ticked in the order they fell due for as long as the
+    per-frame budget lasts, and the rest wait for the next frame, unless
+    they have already waited a whole interval. Enemies that are not ticked
+    in a frame are handed to the rest callback of run instead, which for
+    the sprite manager is SpriteManager.restEnemy. They have been
+    projected for drawing with the other near enemies, and are moved
+    along their last heading with them, so their movement carries on
+    smoothly between ticks.
+
+    Attributes:
+        game (Game): A reference to the main game instance.
+        enabled (bool): Whether enemies are sorted into tiers at all. When
+                        disabled every enemy is Active.
+        budget (float): Milliseconds per frame for ticking enemies, resting
+                        enemies are not counted.
+        nearDistance (float): Distance within which enemies are Active.
+        intervals (dict): Frames between two ticks of each tier, None for
+                          never.
+        nextTick (dict): Frame each enemy of the slower tiers is next due.
+        frameNumber (int): Number of frames planned so far.
+        tierCounts (dict): Number of enemies in each tier this frame.
+        ticks (int): Number of enemy ticks so far.
+        deferred (int): Due enemies left for the next frame this frame.
+        totalDeferred (int): Due enemies left for a later frame so far.
+        overruns (int): Frames whose ticks took longer than the budget.
+        spent (float): Milliseconds spent ticking enemies this frame.
+    """
+
+    def __init__(
+            self, game, budget=AI_FRAME_BUDGET, nearDistance=AI_NEAR_DISTANCE,
+            distantInterval=AI_DISTANT_INTERVAL, idleInterval=AI_IDLE_INTERVAL
+    ):
+        """
+        Initializes the scheduler with no enemies planned.
+
+        Args:
+            game (Game): A reference to the main game instance.
+            budget (float): Milliseconds per frame for ticking enemies.
+            nearDistance (float): Distance within which enemies are Active.
+            distantInterval (int): Frames between two ticks of a Distant
+                                   enemy.
+            idleInterval (int): Frames between two ticks of an Idle enemy.
+        """
+        self.game = game
+        self.enabled = AI_SCHEDULER
+        self.budget = budget
+        self.nearDistance = nearDistance
+        self.intervals = {
+            'Active': 1,
+            'Dying': 1,
+            'Distant': distantInterval,
+            'Idle': idleInterval,
+            'Dead': None,
+        }
+        self.nextTick = {}
+        self.frameNumber = 0
+        self.tierCounts = dict.fromkeys(TIERS, 0)
+        self.ticks = 0
+        self.deferred = 0
+        self.totalDeferred = 0
+        self.overruns = 0
+        self.spent = 0.0
+
+    def tierOf(self, enemy):
+        """
+        Returns:
+            str: The tier of an enemy.
+        """
+        state = enemy.state
+        if state < DYING and (
+                not self.enabled or enemy.distance < self.nearDistance
+                or self.game.player.fire
+        ):
+            return 'Active'
+        return TIERS[STATE_TIERS[state]]
+
+    def tiersOf(self, enemies, store):
+        """
+        Works out the tiers of a list of enemies from the columns of their
+        store, like tierOf does for one enemy.
+
+        Args:
+            enemies (list): The enemies, all of the store.
+            store (EnemyStore): The store of the enemies.
+
+        Returns:
+            list: The tier of each enemy.
+        """
+        rows = store.rowsOf(enemies)
+        states = store.state[rows]
+        codes = STATE_TIERS[states]
+        active = states < DYING
+        if self.enabled and not self.game.player.fire:
+            active &= store.distance[rows] < self.nearDistance
+        codes[active] = 0
+        return [TIERS[code] for code in codes.tolist()]
+
+    def plan(self, enemies, store=None):
+        """
+        Sorts the enemies near the player for this frame.
+
+        Args:
+            enemies (list): The enemies near the player.
+            store (EnemyStore): The store of the enemies, to work out their
+                                tiers together, or None.
+
+        Returns:
+            tuple: Lists of the enemies ticked every frame, of the enemies
+                   due this frame, most overdue first, and of the resting
+                   enemies.
+        """
+        self.frameNumber += 1
+        frame = self.frameNumber
+        intervals, nextTick = self.intervals, self.nextTick
+        counts = dict.fromkeys(TIERS, 0)
+        every, due, resting = [], [], []
+        if store is None:
+            tiers = [self.tierOf(enemy) for enemy in enemies]
+        else:
+            tiers = self.tiersOf(enemies, store)
+        for enemy, tier in zip(enemies, tiers):
+            counts[tier] += 1
+            interval = intervals[tier]
+            if interval == 1:
+                every.append(enemy)
+                continue
+            if interval is None:
+                nextTick.pop(enemy, None)
+                resting.append(enemy)
+                continue
+            tick = nextTick.get(enemy)
+            if tick is None:
+                # Spread the first ticks of new enemies over the interval
+                tick = nextTick[enemy] = frame + len(nextTick) % interval
+            if tick <= frame:
+                due.append(enemy)
+            else:
+                resting.append(enemy)
+        due.sort(key=nextTick.get)
+        self.tierCounts = counts
+        return every, due, resting
+
+    def run(self, every, due, resting, tick, rest):
+        """
+        Ticks the enemies of a plan within the budget and rests the others.
+
+        Args:
+            every, due, resting (list): The lists returned by plan.
+            tick (callable): Ticks an enemy.
+            rest (callable): Rests an enemy.
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget / 1000
+        for enemy in every:
+            tick(enemy)
+
+        frame = self.frameNumber
+        intervals, nextTick = self.intervals, self.nextTick
+        waiting = []
+        for enemy in due:
+            # Enemies that waited a whole interval are ticked regardless
+            if time.perf_counter() >= deadline and frame - nextTick[enemy] < \
+                    intervals[self.tierOf(enemy)]:
+                waiting.append(enemy)
+                continue
+            tick(enemy)
+            nextTick[enemy] = frame + (intervals[self.tierOf(enemy)] or 1)
+        self.spent = (time.perf_counter() - start) * 1000
+
+        for enemy in resting + waiting:
+            rest(enemy)
+
+        deferred = len(waiting)
+        self.ticks += len(every) + len(due) - deferred
+        self.deferred = deferred
+        self.totalDeferred += deferred
+        if self.spent > self.budget:
+            self.overruns += 1
+
+    def forget(self, enemy):
+        """
+        Drops an enemy that will not be planned again, such as a corpse.
+
+        Args:
+            enemy (Enemy): The enemy.
+        """
+        self.nextTick.pop(enemy, None)
+
+    def stats(self):
+        """
+        Returns the scheduler statistics used to tune the tiers and the
+        budget.
+
+        Returns:
+            dict: Tier counts of this frame and counters of all frames.
+        """
+        return {
+            'tiers': dict(self.tierCounts),
+            'ticks': self.ticks,
+            'deferred': self.deferred,
+            'totalDeferred': self.totalDeferred,
+            'overruns': self.overruns,
+            'frames': self.frameNumber,
+            'spent': self.spent,
+            'budget': self.budget,
+        }
@@ -0,0 +1,89 @@
+import math
+import numpy as np
+from source.settings import *
+
+
+class CameraTables:
+    """
+    The CameraTables class holds the trigonometry of the camera that does
+    not change from frame to frame. The angle of every ray relative to the
+    player's heading and its fisheye correction only depend on the field of
+    view and the number of rays, and the player's heading is looked up in a
+    quantized sine and cosine table. The direction of every ray is then
+    found from the heading with the angle addition formulas instead of
+    calling sin and cos for each ray.
+
+    The tables are built once and rebuilt by RayCasting.setResolution
+    whenever the number of rays changes.
+
+    Attributes:
+        numbRays (int): Number of rays the tables are built for.
+        fieldOfView (float): Field of view the tables are built for.
+        angleChange (float): Angle between two neighbouring rays.
+        columnOffsets (ndarray): Angle of each ray relative to the heading.
+        offsetSin, offsetCos (ndarray): Sine and cosine of the offsets.
+        fisheye (ndarray): Fisheye correction factor of each ray.
+        fisheyeList (list): The fisheye correction factors as floats.
+        headingSteps (int): Number of entries of the heading tables.
+        headingSin, headingCos (list): Sine and cosine of every quantized
+                                       heading.
+    """
+
+    def __init__(
+            self, numbRays=NUMB_RAYS, fieldOfView=FIELD_OF_VIEW,
+            headingSteps=CAMERA_HEADING_STEPS
+    ):
+        """
+        Builds the per-ray and heading tables.
+
+        Args:
+            numbRays (int): Number of rays cast each frame.
+            fieldOfView (float): Horizontal field of view in radians.
+            headingSteps (int): Number of quantized headings in a full turn.
+        """
+        self.numbRays = numbRays
+        self.fieldOfView = fieldOfView
+        self.angleChange = fieldOfView / numbRays
+
+        # The first ray is nudged off the edge of the view so that no ray
+        # is ever exactly parallel to the grid lines
+        offsets = np.full(numbRays, self.angleChange)
+        offsets[0] = -fieldOfView / 2 + 0.0001
+        self.columnOffsets = np.cumsum(offsets)
+        self.offsetSin = np.sin(self.columnOffsets)
+        self.offsetCos = np.cos(self.columnOffsets)
+        self.fisheye = self.offsetCos
+        self.fisheyeList = self.fisheye.tolist()
+
+        self.headingSteps = headingSteps
+        headings = np.arange(headingSteps) * (math.tau / headingSteps)
+        self.headingSin = np.sin(headings).tolist()
+        self.headingCos = np.cos(headings).tolist()
+
+    def heading(self, angle):
+        """
+        Looks up the sine and cosine of a heading.
+
+        Args:
+            angle (float): The heading in radians.
+
+        Returns:
+            tuple: The sine and cosine of the nearest quantized heading.
+        """
+        step = round(angle * self.headingSteps / math.tau) % self.headingSteps
+        return self.headingSin[step], self.headingCos[step]
+
+    def rayDirections(self, angle):
+        """
+        Returns the direction of every ray for a heading.
+
+        Args:
+            angle (float): The player's heading in radians.
+
+        Returns:
+            tuple: The sine and cosine arrays of the ray angles.
+        """
+        sin, cos = self.heading(angle)
+        raySin = sin * self.offsetCos + cos * self.offsetSin
+        rayCos = cos * self.offsetCos - sin * self.offsetSin
+        return raySin, rayCos
@@ -0,0 +1,152 @@
+import math
+from source.settings import *
+
+
+class ChunkIndex:
+    """
+    The ChunkIndex class splits the world into square chunks of tiles and
+    keeps track of which entities are in each chunk, so that per-frame work
+    can be limited to the entities near the player.
+
+    Every chunk is also given one of farTickInterval phases. Entities in
+    chunks outside the view distance are only ticked on the frames of their
+    chunk's phase, which spreads the work of ticking far entities evenly
+    over the frames.
+
+    Attributes:
+        chunkSize (int): Width and height of a chunk in tiles.
+        farTickInterval (int): Number of frames between two ticks of a far
+                               chunk.
+        chunks (dict): Lists of entities by (x, y) chunk key. Only chunks
+                       holding entities are stored.
+    """
+
+    def __init__(
+            self, chunkSize=CHUNK_SIZE, farTickInterval=CHUNK_FAR_TICK_INTERVAL
+    ):
+        """
+        Initializes an empty chunk index.
+
+        Args:
+            chunkSize (int): Width and height of a chunk in tiles.
+            farTickInterval (int): Number of frames between two ticks of a
+                                   far chunk.
+        """
+        self.chunkSize = chunkSize
+        self.farTickInterval = farTickInterval
+        self.chunks = {}
+
+    def keyOf(self, x, y):
+        """
+        Returns the key of the chunk holding a position.
+
+        Args:
+            x (float): X coordinate of the position.
+            y (float): Y coordinate of the position.
+
+        Returns:
+            tuple: The (x, y) key of the chunk.
+        """
+        return int(x) // self.chunkSize, int(y) // self.chunkSize
+
+    def phaseOf(self, key):
+        """
+        Returns the phase on which a chunk is ticked while it is far away.
+        Neighbouring chunks get different phases.
+
+        Args:
+            key (tuple): The key of the chunk.
+
+        Returns:
+            int: The phase of the chunk.
+        """
+        return (key[0] + 3 * key[1]) % self.farTickInterval
+
+    def add(self, entity):
+        """
+        Adds an entity to the chunk of its position and remembers the
+        chunk's key in the entity's chunk attribute.
+
+        Args:
+            entity (Sprite): The entity to add.
+        """
+        key = self.keyOf(entity.x, entity.y)
+        entity.chunk = key
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = []
+        chunk.append(entity)
+
+    def remove(self, entity):
+        """
+        Removes an entity from its chunk.
+
+        Args:
+            entity (Sprite): The entity to remove.
+        """
+        chunk = self.chunks[entity.chunk]
+        chunk.remove(entity)
+        if not chunk:
+            del self.chunks[entity.chunk]
+        entity.chunk = None
+
+    def move(self, entity):
+        """
+        Moves an entity to another chunk if it has left its chunk.
+
+        Args:
+            entity (Sprite): The entity that may have moved.
+        """
+        if self.keyOf(entity.x, entity.y) != entity.chunk:
+            self.remove(entity)
+            self.add(entity)
+
+    def nearKeys(self, x, y, distance):
+        """
+        Returns the keys of the occupied chunks within a distance of a
+        position.
+
+        Args:
+            x (float): X coordinate of the position.
+            y (float): Y coordinate of the position.
+            distance (float): The distance in tiles.
+
+        Returns:
+            list: The keys of the near chunks.
+        """
+        centerX, centerY = self.keyOf(x, y)
+        reach = math.ceil(distance / self.chunkSize)
+        chunks = self.chunks
+        return [
+            (chunkX, chunkY)
+            for chunkY in range(centerY - reach, centerY + reach + 1)
+            for chunkX in range(centerX - reach, centerX + reach + 1)
+            if (chunkX, chunkY) in chunks
+        ]
+
+    def entities(self, keys):
+        """
+        Returns the entities of a set of chunks. The list is a copy, so the
+        entities may move between chunks while it is iterated over.
+
+        Args:
+            keys (list): The keys of the chunks.
+
+        Returns:
+            list: The entities of the chunks.
+        """
+        chunks = self.chunks
+        return [entity for key in keys for entity in chunks[key]]
+
+    def isDue(self, key, frame):
+        """
+        Checks whether a far chunk is ticked on a frame.
+
+        Args:
+            key (tuple): The key of the chunk.
+            frame (int): Number of the frame.
+
+        Returns:
+            bool: True if the frame is on the chunk's phase.
+        """
+        return self.phaseOf(key) == frame % self.farTickInterval
@@ -1,6 +1,10 @@
 from source.sprites import *
+from source.enemystore import EnemyStore, StoreField
 from random import random, randint
 
+# States of an enemy, the store keeps the index of each enemy's state
+STATES = ('Idle', 'Search', 'Chase', 'Attack', 'Pain', 'Dying', 'Corpse')
+IDLE, SEARCH, CHASE, ATTACK, PAIN, DYING, CORPSE = range(len(STATES))
 
 class Enemy(AnimatedSprite):
     """
@@ -9,6 +13,20 @@ class Enemy(AnimatedSprite):
     and adds specific logic for movement, attacking the player,
     detecting sightlines, and handling health and death states.
 
+    The enemy's position, stats, state flags and timers are not kept on the
+    object but in a row of an EnemyStore, and are read and written through
+    StoreField attributes. The sprite manager adopts every enemy it is
+    given into its own store, so that the enemies near the player are
+    located and moved together, and an enemy only runs its own decisions
+    and animations. The kinds of enemies differ only by the SPRITE and
+    STATS tables and the class constants below.
+
+    The behaviour of an enemy is a state machine over STATES. Each tick a
+    living enemy looks for the player and checks whether it was shot, which
+    sends the events that move it between states, and then does what its
+    state says and nothing more. The sprite manager is told of every state
+    change, and a corpse is only drawn from then on.
+
     Attributes:
         game (Game): A reference to the main game instance.
         position (tuple): The initial position of the enemy on the map.
@@ -16,6 +34,8 @@ class Enemy(AnimatedSprite):
         change (float): Animation speed change factor.
         duration (int): Duration for enemy animation cycles.
         path (str): Path to the enemy sprite resources.
+        store (EnemyStore): The store holding the enemy's values.
+        row (int): The enemy's row in the store.
         attackAnimation (list): Frames for the enemy attack animation.
         deathAnimation (list): Frames for the enemy death animation.
         idleAnimation (list): Frames for the enemy idle animation.
@@ -33,21 +53,76 @@ class Enemy(AnimatedSprite):
         sightLineCheker (bool): Flag indicating whether the player is in sight.
         animationFrameCounter (int): Tracks the frame of the death animation.
         searchActivate (bool): Flag for enabling the search animation.
+        state (int): Index of the enemy's state in STATES.
+        manager (SpriteManager): The sprite manager the enemy was added to,
+        told of its state changes and movements, or None.
+        tile (tuple): The tile the enemy takes in its manager's occupancy,
+        or None.
+        routeTile (tuple): The tile path finding last told the enemy to
+        move to.
+        heading (tuple): The step the enemy took in its last movement, kept
+        up on the frames the AI scheduler does not tick it, or None.
     """
 
+    # Sprite defaults of the kind of enemy
+    SPRITE = {
+        'position': (6, 1.5),
+        'scale': 0.8,
+        'change': 0.27,
+        'duration': 180,
+        'path': 'resources/sprites/enemies/trooper/0.png',
+    }
+    # Stats of the kind of enemy, an attack range of None is drawn from 3 to 5
+    STATS = {
+        'attackRange': None,
+        'movementSpeed': 0.04,
+        'size': 20,
+        'health': 100,
+        'enemyDamage': 10,
+        'percision': 0.15,
+    }
+    # Sound of the enemy's shots
+    FIRE_SOUND = 'enemyFire'
+    # Health the player gets back for killing the enemy
+    HEALTH_RECOUPE = 10
+
+    x = StoreField()
+    y = StoreField()
+    sx = StoreField()
+    sy = StoreField()
+    thetaAngle = StoreField()
+    screenX = StoreField()
+    distance = StoreField()
+    normDistance = StoreField()
+    IMG_HALF_WIDTH = StoreField('imageHalfWidth')
+    duration = StoreField()
+    durationPrev = StoreField()
+    attackRange = StoreField()
+    movementSpeed = StoreField()
+    size = StoreField()
+    health = StoreField()
+    enemyDamage = StoreField()
+    percision = StoreField()
+    alive = StoreField()
+    pain = StoreField()
+    sightLineCheker = StoreField()
+    animationFrameCounter = StoreField()
+    searchActivate = StoreField()
+    state = StoreField()
+
     def __init__(
             self,
             game,
-            position=(6, 1.5),
-            scale=0.8,
-            change=0.27,
-            duration=180,
-            path='resources/sprites/enemies/trooper/0.png'
+            position=None,
+            scale=None,
+            change=None,
+            duration=None,
+            path=None
     ):
         """
         Initializes the Enemy class by loading animations, setting the enemy's
         stats, and defining initial parameters such as position, speed, and
-        health.
+        health. The enemy starts in a store of its own.
 
         Args:
             game (Game): Reference to the main game object.
@@ -56,75 +131,179 @@ class Enemy(AnimatedSprite):
             change (float): Animation change rate.
             duration (int): Animation duration cycle.
             path (str): Path to the enemy sprite directory.
+
+        Arguments left as None take the value of the SPRITE table.
         """
-        super().__init__(game, position, scale, change, duration, path)
+        self.store = EnemyStore(1)
+        self.row = self.store.addRow()
+        sprite = self.SPRITE
+        super().__init__(
+            game,
+            sprite['position'] if position is None else position,
+            sprite['scale'] if scale is None else scale,
+            sprite['change'] if change is None else change,
+            sprite['duration'] if duration is None else duration,
+            sprite['path'] if path is None else path
+        )
         self.attackAnimation = self.getFrames(self.path + '/attack')
         self.deathAnimation = self.getFrames(self.path + '/death')
         self.idleAnimtion = self.getFrames(self.path + '/idle')
         self.painAnimation = self.getFrames(self.path + '/pain')
         self.searchAnimation = self.getFrames(self.path + '/search')
-        self.attackRange = randint(3, 5)
-        self.movementSpeed = 0.04
-        self.size = 20
-        self.health = 100
-        self.enemyDamage = 10
-        self.percision = 0.15
+        for name, value in self.STATS.items():
+            setattr(self, name, randint(3, 5) if value is None else value)
         self.alive = True
         self.pain = False
         self.sightLineCheker = False
         self.animationFrameCounter = 0
         self.searchActivate = False
+        self.state = IDLE
+        self.manager = None
+        self.tile = None
+        self.routeTile = None
+        self.heading = None
+
+    @property
+    def heading(self):
+        """Returns the step of the enemy's last movement, or None."""
+        store, row = self.store, self.row
+        if not store.moving[row]:
+            return None
+        return store.headingX.item(row), store.headingY.item(row)
+
+    @heading.setter
+    def heading(self, heading):
+        """Sets the step of the enemy's movement, None to stand still."""
+        store, row = self.store, self.row
+        store.moving[row] = heading is not None
+        if heading is not None:
+            store.headingX[row], store.headingY[row] = heading
 
     def enemyLogic(self):
         """
-        Defines the core logic for the enemy, including sightline detection,
-        movement, attacking, and handling pain and death animations.
-        """
-        if self.alive:
-            self.sightLineCheker = self.rayCastSightLine()
-
-            self.shotHitDetection()
-            if self.pain:
-                self.animatePain()
-            elif self.sightLineCheker:
-                self.searchActivate = True
-                if self.distance < self.attackRange:
-                    self.animate(self.attackAnimation)
-                    self.attack()
-                else:
-                    self.animate(self.searchAnimation)
-                    self.movement()
-            elif self.searchActivate:
-                self.animate(self.searchAnimation)
-                self.movement()
-            else:
-                self.animate(self.idleAnimtion)
-        else:
-            self.animateDeath()
+        Defines the core logic for the enemy. A living enemy first senses
+        the player, which may change its state, and then acts as its state
+        says:
+
+            Idle    stands guard.
+            Search  heads for the player it has lost sight of.
+            Chase   heads for the player in sight but out of range.
+            Attack  fires at the player within its attack range.
+            Pain    flinches after being shot.
+            Dying   plays the death animation.
+            Corpse  does nothing.
+        """
+        self.heading = None
+        if self.state < DYING:
+            self.sense()
+        self.STATE_ACTIONS[self.state](self)
+
+    def sense(self):
+        """
+        Looks for the player, checks whether the enemy was shot and whether
+        the player came within or went out of its attack range, and sends
+        an event for whatever changed.
+        """
+        seen = self.rayCastSightLine()
+        if seen != self.sightLineCheker:
+            self.sightLineCheker = seen
+            self.onEvent('spotted' if seen else 'lost')
+
+        self.shotHitDetection()
+        state = self.state
+        if state == CHASE or state == ATTACK:
+            inRange = self.distance < self.attackRange
+            if inRange != (state == ATTACK):
+                self.onEvent('inRange' if inRange else 'outOfRange')
+
+    def onEvent(self, event):
+        """
+        Moves the enemy to the state an event leads to. Being shot, killed
+        or done dying decide the state on their own. The other events only
+        lead out of the pain state once the enemy has recovered, to the
+        state for whether the player is in sight and in range.
+
+        Args:
+            event (str): 'spotted', 'lost', 'inRange', 'outOfRange', 'hit',
+                         'recovered', 'killed' or 'decayed'.
+        """
+        if event == 'hit':
+            self.changeState(PAIN)
+        elif event == 'killed':
+            self.changeState(DYING)
+        elif event == 'decayed':
+            self.changeState(CORPSE)
+        elif event == 'recovered' or self.state != PAIN:
+            self.changeState(self.pursuitState())
+
+    def pursuitState(self):
+        """
+        Returns:
+            int: The state of a living enemy that is not in pain.
+        """
+        if self.sightLineCheker:
+            return ATTACK if self.distance < self.attackRange else CHASE
+        return SEARCH if self.searchActivate else IDLE
+
+    def changeState(self, state):
+        """
+        Moves the enemy to a state, keeping its flags in step and telling
+        its manager.
+
+        Args:
+            state (int): The new state.
+        """
+        previous = self.state
+        if state == previous:
+            return
+        self.state = state
+        self.pain = state == PAIN
+        if SEARCH <= state <= ATTACK:
+            self.searchActivate = True
+        elif state >= DYING:
+            self.alive = False
+        if self.manager is not None:
+            self.manager.enemyChangedState(self, previous, state)
+
+    def idle(self):
+        """Stands guard until the player is spotted."""
+        self.animate(self.idleAnimtion)
+
+    def search(self):
+        """Heads for the player while they are out of sight or range."""
+        self.animate(self.searchAnimation)
+        self.movement()
+
+    def fire(self):
+        """Fires at the player within the attack range."""
+        self.animate(self.attackAnimation)
+        self.attack()
 
     def animatePain(self):
         """
-        Plays the pain animation when the enemy is injured and resets the
-        pain flag once the animation is complete.
+        Plays the pain animation when the enemy is injured and sends the
+        recovered event once the animation is complete.
         """
         self.animate(self.painAnimation)
         if self.animationTrigger:
-            self.pain = False
+            self.onEvent('recovered')
 
     def animateDeath(self):
         """
         Plays the death animation when the enemy's health reaches zero,
-        advancing through the animation frames until completion.
-        """
-        if not self.alive:
-            # if self.animationFrameCounter == 0:
-            #     self.game.player.killedEnemy = True
-            #     self.game.spriteManager.enemyHealthRecoupe = 10
-            if self.game.universalTrigger and self.animationFrameCounter\
-                    < len(self.deathAnimation) - 1:
-                self.deathAnimation.rotate(-1)
-                self.image = self.deathAnimation[0]
-                self.animationFrameCounter += 1
+        advancing through the animation frames until completion, when the
+        decayed event is sent.
+        """
+        if self.game.universalTrigger and self.animationFrameCounter\
+                < len(self.deathAnimation) - 1:
+            self.deathAnimation.rotate(-1)
+            self.image = self.deathAnimation[0]
+            self.animationFrameCounter += 1
+        if self.animationFrameCounter >= len(self.deathAnimation) - 1:
+            self.onEvent('decayed')
+
+    def rest(self):
+        """Does nothing, a corpse is only drawn."""
 
     def shotHitDetection(self):
         """
@@ -137,7 +316,7 @@ class Enemy(AnimatedSprite):
                     < HALF_WIDTH + self.spriteHalfWidth:
                 self.game.audio.enemyPain.play()
                 self.game.player.fire = False
-                self.pain = True
+                self.onEvent('hit')
                 self.health -= self.game.weapon.damage
                 self.checkHealth()
 
@@ -147,9 +326,9 @@ class Enemy(AnimatedSprite):
         considered dead, triggering the death animation and sound effect.
         """
         if self.health < 1:
-            self.alive = False
+            self.onEvent('killed')
             self.game.player.killedEnemy = True
-            self.game.spriteManager.enemyHealthRecoupe = 10
+            self.game.spriteManager.enemyHealthRecoupe = self.HEALTH_RECOUPE
             self.game.audio.enemyDeath.play()
 
     def attack(self):
@@ -160,7 +339,7 @@ class Enemy(AnimatedSprite):
         """
         if self.animationTrigger:
             if MODE != 'Test':
-                self.game.audio.enemyFire.play()
+                getattr(self.game.audio, self.FIRE_SOUND).play()
                 if random() < self.percision:
                     self.game.player.getDamage(self.enemyDamage)
 
@@ -169,96 +348,39 @@ class Enemy(AnimatedSprite):
         """Returns the enemy's current position on the game map grid."""
         return int(self.x), int(self.y)
 
-    def getWallBounds(self, x, y):
-        """
-        Checks whether a given coordinate on the map is a wall or an open
-        space.
-
-        Args:
-            x (int): X coordinate to check.
-            y (int): Y coordinate to check.
-
-        Returns:
-            bool: True if the given position is not a wall, False otherwise.
-        """
-        return (x, y) not in self.game.map.gameWorld
-
     def rayCastSightLine(self):
         """
-        Performs a raycast from the enemy's position to the player's position
-        to detect whether the player is within line of sight without any walls
-        blocking the view.
+        Looks up whether the player is within line of sight without any walls
+        blocking the view. The sight lines of all the enemies near the player
+        are cast together once a frame by the game's SightLines, so this
+        only reads the enemy's result for the frame.
 
         Returns:
             bool: True if the player is in sight, False otherwise.
         """
-        if self.game.player.mapPosition == self.enemyMapPosition:
-            return True
-
-        vertWallDist, hortWallDist = 0, 0
-        vertPlayerDist, hortPlayerDist = 0, 0
-        px, py = self.game.player.position
-        mapX, mapY = self.game.player.mapPosition
-        rayAngle = self.thetaAngle
-        raySin = math.sin(rayAngle)
-        rayCos = math.cos(rayAngle)
-
-        # horizontals
-        yHort, dy = (mapY + 1, 1) if raySin > 0 else (mapY - 1e-6, -1)
-        depthHort = (yHort - py) / raySin
-        xHort = px + depthHort * rayCos
-        deltaChange = dy / raySin
-        dx = deltaChange * rayCos
-
-        for i in range(MAXIMUM_DEPTH):
-            tileHort = int(xHort), int(yHort)
-            if tileHort == self.enemyMapPosition:
-                hortPlayerDist = depthHort
-                break
-            if tileHort in self.game.map.gameWorld:
-                hortWallDist = depthHort
-                break
-            xHort += dx
-            yHort += dy
-            depthHort += deltaChange
-
-        # verticals
-        xVert, dx = (mapX + 1, 1) if rayCos > 0 else (mapX - 1e-6, -1)
-        depthVert = (xVert - px) / rayCos
-        yVert = py + depthVert * raySin
-        deltaChange = dx / rayCos
-        dy = deltaChange * raySin
-
-        for i in range(MAXIMUM_DEPTH):
-            tileVert = int(xVert), int(yVert)
-            if tileVert == self.enemyMapPosition:
-                vertPlayerDist = depthVert
-                break
-            if tileVert in self.game.map.gameWorld:
-                vertWallDist = depthVert
-                break
-            xVert += dx
-            yVert += dy
-            depthVert += deltaChange
-
-        playerDistance = max(vertPlayerDist, hortPlayerDist)
-        wallDistance = max(vertWallDist, hortWallDist)
-
-        if 0 < playerDistance < wallDistance or not wallDistance:
-            return True
-        return False
+        return self.game.sightLines.canSee(self)
 
     def movement(self):
         """
         Moves the enemy towards the player's position. Depending on the game's
         pathfinding setting, the enemy can either follow a pre-calculated route
-        or move directly toward the player.
+        or move directly toward the player. While the path worker is busy
+        with a new route, the enemy keeps heading for the tile of its last
+        route. Only the heading is set here, the step itself is taken by
+        the store together with those of the other enemies.
         """
         if PATH_FINDING_SETTING:
             nextPosition = self.game.pathfinding.getRoute(
                     self.enemyMapPosition,
-                    self.game.player.mapPosition
+                    self.game.player.mapPosition,
+                    self
             )
+            # Keep to the last route while the path worker finds a new one
+            if nextPosition is None:
+                nextPosition = self.routeTile
+                if nextPosition is None:
+                    return
+            self.routeTile = nextPosition
         else:
             nextPosition = self.game.player.mapPosition
         nextPositionX, nextPositionY = nextPosition
@@ -270,39 +392,67 @@ class Enemy(AnimatedSprite):
                     'green',
                     (100 * nextPositionX, 100 * nextPositionY, 100, 100)
             )
-        if nextPosition not in self.game.spriteManager.enemyPositions:
+        if nextPosition not in self.game.spriteManager.enemyHash:
             angle = math.atan2(
                     nextPositionY + 0.5 - self.y,
                     nextPositionX + 0.5 - self.x
             )
             ex = math.cos(angle) * self.movementSpeed
             ey = math.sin(angle) * self.movementSpeed
-            self.wallCollusion(ex, ey)
+            self.heading = ex, ey
 
-    def wallCollusion(self, dx, dy):
+    def step(self):
         """
-        Checks for wall collisions and updates the enemy's position
-        accordingly.
+        Moves the enemy along its heading on its own, stopping at walls,
+        and tells its manager.
+        """
+        self.store.move(self.store.rowsOf([self]), self.game.map.grid)
+        if self.manager is not None:
+            self.manager.enemyMoved(self)
 
-        Args:
-            dx (float): Change in the enemy's X position.
-            dy (float): Change in the enemy's Y position.
+    def think(self):
         """
-        if self.getWallBounds(int(self.x + dx * self.size), int(self.y)):
-            self.x += dx
-        if self.getWallBounds(int(self.x), int(self.y + dy * self.size)):
-            self.y += dy
+        Runs the enemy's own part of an update: its animation timer and its
+        logic. The enemy must have been located and projected this frame,
+        and the step it decides on is left for the caller to take.
+        """
+        self.durationCheck()
+        self.enemyLogic()
 
     def update(self):
         """
         Updates the enemy's state by checking animations, executing
-        logic, and drawing test visuals if in debug mode.
+        logic, and drawing test visuals if in debug mode. The sprite
+        manager does the same for all the near enemies at once. A corpse
+        is only projected, like scenery.
         """
-        self.durationCheck()
         self.getSprite()
-        self.enemyLogic()
+        if self.state == CORPSE:
+            return
+        self.think()
+        self.step()
         self.testDraw()
 
+    def farUpdate(self, steps=1):
+        """
+        Updates the enemy while it is too far from the player to be seen.
+        Only an enemy that is already hunting the player keeps moving
+        towards them, without looking for the player or being drawn. As
+        far enemies are only updated every few frames, the enemy takes the
+        steps of all the frames since its last update, one at a time so
+        that each stops at walls, and keeps its normal speed.
+
+        Args:
+            steps (int): Number of frames since the last update.
+        """
+        if self.alive and self.searchActivate:
+            self.locate()
+            # Stay put unless movement finds a free tile to head for
+            self.heading = None
+            self.movement()
+            for _ in range(steps):
+                self.step()
+
     def testDraw(self):
         """
         Draws visual elements for debugging, such as the enemy's
@@ -324,141 +474,85 @@ class Enemy(AnimatedSprite):
                     2
                 )
 
+    # What each state does, in the order of STATES
+    STATE_ACTIONS = (
+        idle, search, search, fire, animatePain, animateDeath, rest
+    )
+
+
 class Trooper(Enemy):
-    def __init__(
-            self,
-            game,
-            position=(6, 1.5),
-            scale=0.8,
-            change=0.27,
-            duration=180,
-            path='resources/sprites/enemies/trooper/0.png'
-    ):
-        super().__init__(game, position, scale, change, duration, path)
-        self.attackRange = randint(3, 5)
-        self.health = 100
-        self.movementSpeed = 0.04
-        self.enemyDamage = 10
-        self.percision = 0.15
-    
-    def checkHealth(self):
-        """
-        Checks the enemy's health, and if it drops below 1, the enemy is
-        considered dead, triggering the death animation and sound effect.
-        """
-        if self.health < 1:
-            self.alive = False
-            self.game.player.killedEnemy = True
-            self.game.spriteManager.enemyHealthRecoupe = 10
-            self.game.audio.enemyDeath.play()
+    """
+    The Trooper class is the default enemy, with the stats of Enemy and
+    an attack range drawn from 3 to 5.
+    """
 
 
 class DeathKnight(Enemy):
-    def __init__(
-            self,
-            game,
-            position=(5.5, 4),
-            scale=1.1,
-            change=0.05,
-            duration=250,
-            path='resources/sprites/enemies/death_knight/0.png'
-    ):
-        super().__init__(game, position, scale, change, duration, path)
-        self.attackRange = 6
-        self.health = 300
-        self.movementSpeed = 0.01
-        self.enemyDamage = 20
-        self.percision = 0.17
+    """
+    The DeathKnight class is a slow and tough enemy firing a minigun.
+    """
 
-    def attack(self):
-        """
-        Executes the enemy's attack logic. If the enemy is within attack
-        range and the animation is triggered, the enemy fires at the player,
-        dealing damage based on a random precision check.
-        """
-        if self.animationTrigger:
-            if MODE != 'Test':
-                self.game.audio.minigun.play()
-                if random() < self.percision:
-                    self.game.player.getDamage(self.enemyDamage)
-    
-    def checkHealth(self):
-        """
-        Checks the enemy's health, and if it drops below 1, the enemy is
-        considered dead, triggering the death animation and sound effect.
-        """
-        if self.health < 1:
-            self.alive = False
-            self.game.player.killedEnemy = True
-            self.game.spriteManager.enemyHealthRecoupe = 50
-            self.game.audio.enemyDeath.play()
+    SPRITE = {
+        'position': (5.5, 4),
+        'scale': 1.1,
+        'change': 0.05,
+        'duration': 250,
+        'path': 'resources/sprites/enemies/death_knight/0.png',
+    }
+    STATS = {
+        'attackRange': 6,
+        'movementSpeed': 0.01,
+        'size': 20,
+        'health': 300,
+        'enemyDamage': 20,
+        'percision': 0.17,
+    }
+    FIRE_SOUND = 'minigun'
+    HEALTH_RECOUPE = 50
 
 
 class CyberDemon(Enemy):
-    def __init__(
-            self,
-            game,
-            position=(20, 19),
-            scale=1.3,
-            change=0.01,
-            duration=300,
-            path='resources/sprites/enemies/cyber_demon/0.png'
-    ):
-        super().__init__(game, position, scale, change, duration, path)
-        self.attackRange = 7
-        self.health = 300
-        self.movementSpeed = 0.03
-        self.enemyDamage = 20
-        self.percision = 0.17
+    """
+    The CyberDemon class is a tough enemy with a long attack range.
+    """
 
-    def checkHealth(self):
-        """
-        Checks the enemy's health, and if it drops below 1, the enemy is
-        considered dead, triggering the death animation and sound effect.
-        """
-        if self.health < 1:
-            self.alive = False
-            self.game.player.killedEnemy = True
-            self.game.spriteManager.enemyHealthRecoupe = 100
-            self.game.audio.enemyDeath.play()
+    SPRITE = {
+        'position': (20, 19),
+        'scale': 1.3,
+        'change': 0.01,
+        'duration': 300,
+        'path': 'resources/sprites/enemies/cyber_demon/0.png',
+    }
+    STATS = {
+        'attackRange': 7,
+        'movementSpeed': 0.03,
+        'size': 20,
+        'health': 300,
+        'enemyDamage': 20,
+        'percision': 0.17,
+    }
+    HEALTH_RECOUPE = 100
 
 
 class Arachnotron(Enemy):
-    def __init__(
-            self,
-            game,
-            position=(4.5, 10),
-            scale=1.5,
-            change=0.0001,
-            duration=250,
-            path='resources/sprites/enemies/arachnotron/0.png'
-    ):
-        super().__init__(game, position, scale, change, duration, path)
-        self.attackRange = 6
-        self.health = 300
-        self.movementSpeed = 0.04
-        self.enemyDamage = 20
-        self.percision = 0.2
+    """
+    The Arachnotron class is a tough and accurate enemy firing a minigun.
+    """
 
-    def attack(self):
-        """
-        Executes the enemy's attack logic. If the enemy is within attack
-        range and the animation is triggered, the enemy fires at the player,
-        dealing damage based on a random precision check.
-        """
-        if self.animationTrigger:
-            if MODE != 'Test':
-                self.game.audio.minigun.play()
-                if random() < self.percision:
-                    self.game.player.getDamage(self.enemyDamage)
-    
-    def checkHealth(self):
-        """
-        Checks the enemy's health, and if it drops below 1, the enemy is
-        considered dead, triggering the death animation and sound effect.
-        """
-        if self.health < 1:
-            self.alive = False
-            self.game.player.killedEnemy = True
-            self.game.spriteManager.enemyHealthRecoupe = 100
-            self.game.audio.enemyDeath.play()
\ No newline at end of file
+    SPRITE = {
+        'position': (4.5, 10),
+        'scale': 1.5,
+        'change': 0.0001,
+        'duration': 250,
+        'path': 'resources/sprites/enemies/arachnotron/0.png',
+    }
+    STATS = {
+        'attackRange': 6,
+        'movementSpeed': 0.04,
+        'size': 20,
+        'health': 300,
+        'enemyDamage': 20,
+        'percision': 0.2,
+    }
+    FIRE_SOUND = 'minigun'
+    HEALTH_RECOUPE = 100
@@ -0,0 +1,269 @@
+import math
+import numpy as np
+from source.settings import *
+from source.maps import Map
+
+# Columns of the store and their types
+COLUMNS = (
+    ('x', np.float64), ('y', np.float64),
+    ('health', np.int64), ('alive', np.bool_), ('pain', np.bool_),
+    ('sightLineCheker', np.bool_), ('searchActivate', np.bool_),
+    ('state', np.int64),
+    ('animationFrameCounter', np.int64),
+    ('duration', np.int64), ('durationPrev', np.int64),
+    ('attackRange', np.int64), ('movementSpeed', np.float64),
+    ('size', np.int64), ('enemyDamage', np.int64), ('percision', np.float64),
+    ('sx', np.float64), ('sy', np.float64), ('thetaAngle', np.float64),
+    ('screenX', np.float64), ('distance', np.float64),
+    ('normDistance', np.float64), ('imageHalfWidth', np.int64),
+    ('headingX', np.float64), ('headingY', np.float64),
+    ('moving', np.bool_),
+)
+
+
+class StoreField:
+    """
+    A column of an EnemyStore seen as an attribute of a single enemy, so
+    that the per-enemy logic can keep reading and writing self.health or
+    self.x while the values live in the store's arrays.
+    """
+
+    __slots__ = ('column',)
+
+    def __init__(self, column=None):
+        """
+        Args:
+            column (str): Name of the column, defaults to the attribute's.
+        """
+        self.column = column
+
+    def __set_name__(self, owner, name):
+        """Takes the attribute's name as the column name if none was given."""
+        if self.column is None:
+            self.column = name
+
+    def __get__(self, enemy, owner=None):
+        """Reads the enemy's value as a Python scalar."""
+        if enemy is None:
+            return self
+        return getattr(enemy.store, self.column).item(enemy.row)
+
+    def __set__(self, enemy, value):
+        """Writes the enemy's value."""
+        getattr(enemy.store, self.column)[enemy.row] = value
+
+
+class EnemyStore:
+    """
+    The EnemyStore class keeps the state of enemies as a struct of arrays:
+    one NumPy array per value, such as position, health, timers or speed,
+    with one row per enemy. The per-frame work shared by all the enemies
+    near the player - locating them relative to the player, finding which
+    are on screen and moving them with wall collision - runs over whole
+    columns at once, while each enemy object only does its own decisions
+    and animation through StoreField attributes.
+
+    Rows are never removed, dead enemies keep their rows as corpses. The
+    arrays grow by doubling, so rows stay valid but arrays taken from the
+    store before an enemy is added may be stale.
+
+    Attributes:
+        used (int): Number of rows in use.
+        capacity (int): Number of rows the arrays have room for.
+        x, y, health, ... (ndarray): One array for each of COLUMNS.
+    """
+
+    def __init__(self, capacity=16):
+        """
+        Initializes an empty store.
+
+        Args:
+            capacity (int): Number of rows to make room for.
+        """
+        self.used = 0
+        self.capacity = max(1, capacity)
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(self.capacity, dtype=dtype))
+
+    def __len__(self):
+        """Returns the number of rows in use."""
+        return self.used
+
+    def addRow(self):
+        """
+        Adds a row of zeros, growing the arrays if they are full.
+
+        Returns:
+            int: The index of the new row.
+        """
+        if self.used == self.capacity:
+            self.capacity *= 2
+            for name, _ in COLUMNS:
+                column = getattr(self, name)
+                grown = np.zeros(self.capacity, dtype=column.dtype)
+                grown[:self.used] = column
+                setattr(self, name, grown)
+        self.used += 1
+        return self.used - 1
+
+    def adopt(self, enemy):
+        """
+        Moves an enemy's row from its current store into this one.
+
+        Args:
+            enemy (Enemy): The enemy to move.
+        """
+        if enemy.store is self:
+            return
+        row = self.addRow()
+        for name, _ in COLUMNS:
+            getattr(self, name)[row] = getattr(enemy.store, name)[enemy.row]
+        enemy.store, enemy.row = self, row
+
+    @staticmethod
+    def rowsOf(enemies):
+        """
+        Returns:
+            ndarray: The rows of a list of enemies of this store.
+        """
+        return np.fromiter(
+            (enemy.row for enemy in enemies), dtype=np.int64,
+            count=len(enemies)
+        )
+
+    @staticmethod
+    def gather(enemies, column):
+        """
+        Reads a column for a list of enemies, which may come from several
+        stores.
+
+        Args:
+            enemies (list): The enemies to read.
+            column (str): Name of the column.
+
+        Returns:
+            ndarray: The enemies' values.
+        """
+        if not enemies:
+            return np.zeros(0, dtype=dict(COLUMNS)[column])
+        store = enemies[0].store
+        if all(enemy.store is store for enemy in enemies):
+            return getattr(store, column)[EnemyStore.rowsOf(enemies)]
+        return np.array([
+            getattr(enemy.store, column)[enemy.row] for enemy in enemies
+        ])
+
+    def locate(self, rows, player, raycasting):
+        """
+        Works out the position, angle, distance and screen column of some
+        rows relative to the player, like Sprite.locate does for a single
+        sprite.
+
+        Args:
+            rows (ndarray): The rows to locate.
+            player (Player): The player.
+            raycasting (RayCasting): The ray caster, for the screen columns
+                                     and the camera tables.
+        """
+        sx = self.x[rows] - player.x
+        sy = self.y[rows] - player.y
+        thetaAngle = np.arctan2(sy, sx)
+        deltaAngle = thetaAngle - player.angle
+        deltaAngle[
+            ((sx > 0) & (player.angle > math.pi)) | ((sx < 0) & (sy < 0))
+        ] += math.tau
+        headingSin, headingCos = raycasting.camera.heading(player.angle)
+
+        self.sx[rows], self.sy[rows] = sx, sy
+        self.thetaAngle[rows] = thetaAngle
+        self.screenX[rows] = (
+            raycasting.halfNumbRays + deltaAngle / raycasting.angleChange
+        ) * raycasting.scale
+        self.distance[rows] = np.hypot(sx, sy)
+        self.normDistance[rows] = sx * headingCos + sy * headingSin
+
+    def onScreen(self, rows):
+        """
+        Returns:
+            ndarray: Which of some located rows are in front of the player
+                     and within the screen, and so need projecting.
+        """
+        screenX = self.screenX[rows]
+        imageHalfWidth = self.imageHalfWidth[rows]
+        return (-imageHalfWidth < screenX) & \
+            (screenX < WIDTH + imageHalfWidth) & (self.normDistance[rows] > 0.5)
+
+    def separate(self, own, others, radius, weight, neighbours):
+        """
+        Turns the headings of some moving rows away from their nearest
+        neighbours, keeping their speed. Each neighbour closer than radius
+        pushes harder the closer it is, and only the given number of
+        nearest neighbours of each row count.
+
+        Args:
+            own (ndarray): The rows to steer, once for each pair.
+            others (ndarray): The candidate neighbours of the pairs.
+            radius (float): Distance within which neighbours push.
+            weight (float): Strength of the push against the heading.
+            neighbours (int): Number of nearest neighbours that count.
+        """
+        dx = self.x[own] - self.x[others]
+        dy = self.y[own] - self.y[others]
+        distance = np.hypot(dx, dy)
+        close = np.flatnonzero((distance > 0) & (distance < radius))
+        if not close.size:
+            return
+
+        # Keep the pairs of the nearest neighbours of each row
+        pairs = close[np.lexsort((distance[close], own[close]))]
+        owners = own[pairs]
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        counts = np.diff(np.r_[starts, owners.size])
+        rank = np.arange(owners.size) - np.repeat(starts, counts)
+        pairs = pairs[rank < neighbours]
+        own, dx, dy = own[pairs], dx[pairs], dy[pairs]
+        distance = distance[pairs]
+
+        push = (radius - distance) / (radius * distance)
+        rows, owners = np.unique(own, return_inverse=True)
+        pushX = np.bincount(owners, dx * push, minlength=rows.size)
+        pushY = np.bincount(owners, dy * push, minlength=rows.size)
+        speed = self.movementSpeed[rows]
+        headingX = self.headingX[rows] + weight * speed * pushX
+        headingY = self.headingY[rows] + weight * speed * pushY
+        norm = np.hypot(headingX, headingY)
+        steered = norm > 0
+        scale = np.divide(speed, norm, out=np.zeros_like(norm), where=steered)
+        rows = rows[steered]
+        self.headingX[rows] = headingX[steered] * scale[steered]
+        self.headingY[rows] = headingY[steered] * scale[steered]
+
+    def move(self, rows, grid):
+        """
+        Moves the rows that have a heading one step along it, stopping at
+        walls along each axis separately.
+
+        Args:
+            rows (ndarray): The rows to move.
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+
+        Returns:
+            ndarray: Which of the rows have a heading.
+        """
+        moving = self.moving[rows]
+        rows = rows[moving]
+        if not rows.size:
+            return moving
+        x, y = self.x[rows], self.y[rows]
+        dx, dy = self.headingX[rows], self.headingY[rows]
+        size = self.size[rows]
+        free = Map.lookup(
+            grid, (x + dx * size).astype(np.int64), y.astype(np.int64)
+        ) == 0
+        x = np.where(free, x + dx, x)
+        free = Map.lookup(
+            grid, x.astype(np.int64), (y + dy * size).astype(np.int64)
+        ) == 0
+        self.x[rows] = x
+        self.y[rows] = np.where(free, y + dy, y)
+        return moving
@@ -0,0 +1,201 @@
+import pygame as pg
+import numpy as np
+from source.settings import *
+
+
+class FramebufferRenderer:
+    """
+    The FramebufferRenderer class draws the walls by writing texture pixels
+    straight into the screen's pixel array instead of building and blitting
+    a scaled Surface per ray. The texel rows of every ray are computed at
+    once and gathered from a precomputed texture array, so a full frame of
+    walls is drawn with a few bulk NumPy operations.
+
+    The texture array stores the SCALE texels a ray covers side by side as
+    a single item, which lets one gather fill all the screen columns of a
+    ray at once.
+
+    Attributes:
+        game (Game): Reference to the main game instance.
+        screen (Surface): The display surface that is drawn into.
+        textures (dict): The wall textures the texture array is built from.
+        scale (int): Width of each ray in screen columns.
+        texelType (dtype): Item type holding the SCALE pixels of a ray.
+        textureArray (ndarray): Flat texel array indexed by texture id,
+                                texel column and texel row.
+        rows (ndarray): Screen row offsets relative to the horizon.
+    """
+
+    def __init__(self, game, textures):
+        """
+        Initializes the renderer by converting the wall textures into pixel
+        arrays in the screen's pixel format.
+
+        Args:
+            game (Game): A reference to the main game object.
+            textures (dict): A dictionary mapping wall types to textures.
+        """
+        self.game = game
+        self.screen = game.screen
+        self.textures = textures
+        self.rows = np.arange(HEIGHT, dtype=np.float32) - HALF_HEIGHT
+        self.setScale(SCALE)
+
+    def setScale(self, scale):
+        """
+        Rebuilds the texture array for a new ray width.
+
+        Args:
+            scale (int): Width of each ray in screen columns.
+        """
+        self.scale = scale
+        self.texelType = np.dtype((np.void, 4 * scale))
+        self.textureArray = self.loadTextureArray(self.textures, scale)
+
+    def loadTextureArray(self, textures, scale):
+        """
+        Converts the wall textures into a single flat array of mapped pixel
+        values matching the screen format. Each item holds the pixel of a
+        texel column followed by the next scale - 1 columns.
+
+        Args:
+            textures (dict): A dictionary mapping wall types to textures.
+            scale (int): Width of each ray in screen columns.
+
+        Returns:
+            ndarray: Array of (max id + 1) * TEXTURE_SIZE ** 2 items laid out
+                     texture by texture and texel column by texel column.
+        """
+        return self.packTexels(self.loadTexturePixels(textures), scale)
+
+    def loadTexturePixels(self, textures):
+        """
+        Converts the wall textures into mapped pixel values matching the
+        screen format.
+
+        Args:
+            textures (dict): A dictionary mapping wall types to textures.
+
+        Returns:
+            ndarray: Array of shape (max id + 1, TEXTURE_SIZE, TEXTURE_SIZE)
+                     indexed by texture id, texel column and texel row.
+        """
+        pixels = np.zeros(
+            (max(textures) + 1, TEXTURE_SIZE, TEXTURE_SIZE),
+            dtype=np.uint32
+        )
+        for texture, image in textures.items():
+            pixels[texture] = pg.surfarray.array2d(
+                image.convert(self.screen)
+            )
+        return pixels
+
+    @staticmethod
+    def packTexels(pixels, scale):
+        """
+        Packs texture pixels into the flat texel array used by fillColumns,
+        with each item holding scale neighbouring texel columns.
+
+        Args:
+            pixels (ndarray): Texture pixels from loadTexturePixels.
+            scale (int): Width of each ray in screen columns.
+
+        Returns:
+            ndarray: The flat texel array.
+        """
+        texels = np.stack(
+            [np.roll(pixels, -column, axis=1) for column in range(scale)],
+            axis=-1
+        )
+        return texels.view(np.dtype((np.void, 4 * scale))).reshape(-1)
+
+    @staticmethod
+    def fillBackground(pixels, skyPixels, columns, skyDisplacement, ground):
+        """
+        Writes the sky and the floor of a range of screen columns into a
+        pixel array, matching Renderer.drawSky.
+
+        Args:
+            pixels (ndarray): Pixel array of shape (HEIGHT, columns).
+            skyPixels (ndarray): Mapped sky texture of shape
+                                 (HALF_HEIGHT, WIDTH).
+            columns (ndarray): Screen columns the pixel array covers.
+            skyDisplacement (float): Horizontal displacement of the sky.
+            ground (int): Mapped floor color.
+        """
+        # The two sky blits are placed at truncated positions, so the
+        # second copy starts at int(WIDTH - displacement)
+        seam = int(WIDTH - skyDisplacement)
+        skyColumns = np.where(
+            columns < seam,
+            columns + int(skyDisplacement),
+            columns - seam
+        )
+        pixels[:HALF_HEIGHT] = skyPixels[:, skyColumns]
+        pixels[HALF_HEIGHT:] = ground
+
+    @staticmethod
+    def fillColumns(
+            pixels, textureArray, rows, projectionHeights, textureIds,
+            textureOffsets, scale=SCALE
+    ):
+        """
+        Writes the wall columns of a set of rays into a pixel array.
+
+        Args:
+            pixels (ndarray): Pixel array of shape (HEIGHT, rays) whose
+                              items hold the scale pixels of each ray.
+            textureArray (ndarray): Flat texel array from loadTextureArray.
+            rows (ndarray): Screen row offsets relative to the horizon.
+            projectionHeights, textureIds, textureOffsets (ndarray): The
+                per-ray results of the raycaster.
+            scale (int): Width of each ray in screen columns.
+        """
+        heights = np.asarray(projectionHeights, dtype=np.float32)
+        texelRows = rows[:, None] * (TEXTURE_SIZE / heights)[None, :]
+        texelRows += HALF_TEXTURE_SIZE
+        visible = (texelRows >= 0) & (texelRows < TEXTURE_SIZE)
+        texels = texelRows.astype(np.int32)
+        np.clip(texels, 0, TEXTURE_SIZE - 1, out=texels)
+
+        texelColumns = (
+            np.asarray(textureOffsets) * (TEXTURE_SIZE - scale)
+        ).astype(np.int32)
+        columnStarts = (
+            np.asarray(textureIds, dtype=np.int32) * TEXTURE_SIZE
+            + texelColumns
+        ) * TEXTURE_SIZE
+        texels += columnStarts[None, :]
+        np.copyto(pixels, textureArray[texels], where=visible)
+
+    def screenPixels(self, pixels):
+        """
+        Views a pixels2d array of the screen as rows of ray items.
+
+        Args:
+            pixels (ndarray): The (WIDTH, HEIGHT) array from pixels2d.
+
+        Returns:
+            ndarray: A (HEIGHT, WIDTH // scale) view into the same pixels.
+        """
+        return pixels.T[:, :WIDTH // self.scale * self.scale].view(
+            self.texelType
+        )
+
+    def drawWalls(self):
+        """
+        Draws the walls of the latest raycast straight into the screen's
+        pixel array.
+        """
+        raycasting = self.game.raycasting
+        pixels = pg.surfarray.pixels2d(self.screen)
+        self.fillColumns(
+            self.screenPixels(pixels),
+            self.textureArray,
+            self.rows,
+            raycasting.projectionHeights,
+            raycasting.textureIds,
+            raycasting.textureOffsets,
+            self.scale
+        )
+        del pixels
@@ -0,0 +1,457 @@
+import math
+import numpy as np
+from heapq import heappush, heappop
+from source.settings import *
+from source.navgraph import DIRECTIONS
+
+DIAGONAL = math.sqrt(2)
+
+
+class HierarchicalPathFinder:
+    """
+    The HierarchicalPathFinder class finds routes on large maps without
+    searching tile by tile across the whole map (HPA*). The map is split
+    into square clusters. Where an open stretch of tiles crosses the border
+    of two clusters, an entrance is placed: a pair of tiles, one on each
+    side, joined by a single step. Entrances in the same cluster are joined
+    by the cost of the shortest route between them inside the cluster.
+    Routes are planned with A* over this abstract graph of entrances, and
+    only the first hop, from the start to the first entrance, is refined
+    into tiles.
+
+    Moves are those of the PathFinding graph, including its rule on
+    diagonal moves past wall corners, with diagonal moves costing the
+    square root of two. Clusters are only laid out when a route first
+    reaches them, so nothing is built when the map loads.
+
+    Attributes:
+        map (Map): The game map.
+        graph (NavGraph): The graph whose moves routes are made of.
+        clusterSize (int): Width and height of a cluster in tiles.
+        borders (dict): Entrances as (tile, tile, cost) lists by border
+                        key, for the borders built so far.
+        links (dict): Costs of the steps across borders, by tile and then
+                      by the tile on the other side.
+        nodes (dict): Entrance tiles of each laid out cluster.
+        intraEdges (dict): Costs between the entrance tiles of each laid
+                           out cluster, by cluster, tile and tile.
+        goal (tuple): The goal the cached goalCosts were found for.
+        goalCosts (dict): Costs from the entrances of the goal's cluster to
+                          the goal.
+    """
+
+    def __init__(
+            self, map, graph, clusterSize=HPA_CLUSTER_SIZE,
+            wideEntrance=HPA_WIDE_ENTRANCE
+    ):
+        """
+        Initializes an empty abstract graph.
+
+        Args:
+            map (Map): The game map.
+            graph (NavGraph): The graph whose moves routes are made of.
+            clusterSize (int): Width and height of a cluster in tiles.
+            wideEntrance (int): Open stretches across a border at least
+                                this long get an entrance at both ends
+                                instead of one in the middle.
+        """
+        self.map = map
+        self.graph = graph
+        self.clusterSize = clusterSize
+        self.wideEntrance = wideEntrance
+        self.borders = {}
+        self.links = {}
+        self.nodes = {}
+        self.intraEdges = {}
+        self.goal = None
+        self.goalCosts = {}
+
+    def clusterOf(self, tile):
+        """Returns the (x, y) key of the cluster holding a tile."""
+        return tile[0] // self.clusterSize, tile[1] // self.clusterSize
+
+    def clusterBounds(self, cluster):
+        """
+        Returns:
+            tuple: The left, top, right and bottom tile coordinates of a
+                   cluster, the last two exclusive.
+        """
+        size = self.clusterSize
+        left, top = cluster[0] * size, cluster[1] * size
+        return left, top, min(left + size, self.map.verticals), \
+            min(top + size, self.map.horizontals)
+
+    @staticmethod
+    def octile(start, goal):
+        """
+        Returns the cost of the shortest route between two tiles on an open
+        floor, used as the A* heuristic.
+        """
+        dx, dy = abs(start[0] - goal[0]), abs(start[1] - goal[1])
+        return max(dx, dy) + (DIAGONAL - 1) * min(dx, dy)
+
+    def borderKeys(self, cluster):
+        """
+        Returns the keys of the eight borders of a cluster. A key names the
+        kind of border and the cluster on its top left side: 'v' borders
+        run between a cluster and the one to its right, 'h' borders between
+        a cluster and the one below it, and 'd' and 'a' are the corners
+        between diagonal neighbours.
+        """
+        cx, cy = cluster
+        return (
+            ('v', cx, cy), ('v', cx - 1, cy), ('h', cx, cy), ('h', cx, cy - 1),
+            ('d', cx, cy), ('d', cx - 1, cy - 1),
+            ('a', cx - 1, cy), ('a', cx, cy - 1),
+        )
+
+    def cornerKeys(self, cluster):
+        """
+        Returns the keys of the four corner borders between two other
+        clusters that pass beside a corner tile of a cluster. Without corner
+        cutting, whether such a diagonal step is allowed depends on that
+        tile.
+        """
+        cx, cy = cluster
+        return (
+            ('d', cx - 1, cy), ('d', cx, cy - 1),
+            ('a', cx, cy), ('a', cx - 1, cy - 1),
+        )
+
+    def buildBorder(self, key):
+        """
+        Finds the entrances of a border and links their tiles.
+
+        Args:
+            key (tuple): The border key.
+        """
+        kind, cx, cy = key
+        size = self.clusterSize
+        canMove = self.graph.canMove
+        entrances = []
+        if kind in 'vh':
+            # Walk along the border, fixed being the last column or row of
+            # the first cluster
+            if kind == 'v':
+                fixed = (cx + 1) * size - 1
+                along = range(
+                    cy * size, min((cy + 1) * size, self.map.horizontals)
+                )
+
+                def pair(i, offset):
+                    return (fixed, i), (fixed + 1, i + offset)
+            else:
+                fixed = (cy + 1) * size - 1
+                along = range(
+                    cx * size, min((cx + 1) * size, self.map.verticals)
+                )
+
+                def pair(i, offset):
+                    return (i, fixed), (i + offset, fixed + 1)
+
+            def crossing(i):
+                # The step across the border at i, straight if possible
+                for offset in (0, -1, 1):
+                    if along.start <= i + offset < along.stop:
+                        first, second = pair(i, offset)
+                        if canMove(first, second):
+                            return first, second, DIAGONAL if offset else 1
+                return None
+
+            run = []
+            for i in list(along) + [None]:
+                step = crossing(i) if i is not None else None
+                if step is not None:
+                    run.append(step)
+                    continue
+                if run:
+                    if len(run) >= self.wideEntrance:
+                        entrances += [run[0], run[-1]]
+                    else:
+                        entrances.append(run[len(run) // 2])
+                    run = []
+        else:
+            x, y = (cx + 1) * size - 1, (cy + 1) * size - 1
+            first, second = ((x, y), (x + 1, y + 1)) if kind == 'd' else \
+                ((x + 1, y), (x, y + 1))
+            if canMove(first, second):
+                entrances.append((first, second, DIAGONAL))
+
+        self.borders[key] = entrances
+        links = self.links
+        for first, second, cost in entrances:
+            links.setdefault(first, {})[second] = cost
+            links.setdefault(second, {})[first] = cost
+
+    def openCluster(self, cluster):
+        """
+        Lays out a cluster: builds its borders, collects its entrance tiles
+        and joins them by their costs inside the cluster.
+
+        Args:
+            cluster (tuple): The cluster key.
+
+        Returns:
+            set: The entrance tiles of the cluster.
+        """
+        nodes = self.nodes.get(cluster)
+        if nodes is not None:
+            return nodes
+        nodes = set()
+        for key in self.borderKeys(cluster):
+            if key not in self.borders:
+                self.buildBorder(key)
+            for first, second, _ in self.borders[key]:
+                for tile in (first, second):
+                    if self.clusterOf(tile) == cluster:
+                        nodes.add(tile)
+        self.nodes[cluster] = nodes
+        self.intraEdges[cluster] = self.joinNodes(cluster, list(nodes))
+        return nodes
+
+    def joinNodes(self, cluster, nodes):
+        """
+        Finds the costs between every two entrance tiles of a cluster, with
+        Dijkstra's algorithm from each entrance tile over the moves inside
+        the cluster. Moves go both ways at the same cost, so each search
+        only has to reach the tiles not searched from yet, and stops once
+        it has. Clusters without walls need no search.
+
+        Args:
+            cluster (tuple): The cluster key.
+            nodes (list): The entrance tiles of the cluster.
+
+        Returns:
+            dict: Costs by tile and then by the tiles reachable from it.
+        """
+        edges = {tile: {} for tile in nodes}
+        if len(nodes) < 2:
+            return edges
+        left, top, right, bottom = self.clusterBounds(cluster)
+        if not self.map.grid[top:bottom, left:right].any():
+            # Across an open floor every route is as short as it can be
+            for i, tile in enumerate(nodes):
+                for other in nodes[i + 1:]:
+                    edges[tile][other] = edges[other][tile] = \
+                        self.octile(tile, other)
+            return edges
+        width = right - left
+        neighbours = self.clusterMoves(cluster)
+        ids = [(y - top) * width + x - left for x, y in nodes]
+        for i, origin in enumerate(ids[:-1]):
+            targets = set(ids[i + 1:])
+            costs = [math.inf] * len(neighbours)
+            costs[origin] = 0
+            queue = [(0, origin)]
+            while queue:
+                cost, tileId = heappop(queue)
+                if cost > costs[tileId]:
+                    continue
+                # The cost of a tile is final once it leaves the queue
+                targets.discard(tileId)
+                if not targets:
+                    break
+                for nextId, stepCost in neighbours[tileId]:
+                    nextCost = cost + stepCost
+                    if nextCost < costs[nextId]:
+                        costs[nextId] = nextCost
+                        heappush(queue, (nextCost, nextId))
+            tile = nodes[i]
+            for other, otherId in zip(nodes[i + 1:], ids[i + 1:]):
+                if costs[otherId] < math.inf:
+                    edges[tile][other] = edges[other][tile] = costs[otherId]
+        return edges
+
+    def clusterMoves(self, cluster):
+        """
+        Lists the moves between the tiles of a cluster that stay inside it,
+        with the tiles numbered row by row from the cluster's top left.
+
+        Args:
+            cluster (tuple): The cluster key.
+
+        Returns:
+            list: (tile number, cost) pairs of the moves from each tile.
+        """
+        left, top, right, bottom = self.clusterBounds(cluster)
+        width, height = right - left, bottom - top
+        moves = self.graph.moves[:, top:bottom, left:right]
+        neighbours = [[] for _ in range(width * height)]
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            ys, xs = np.nonzero(moves[direction])
+            inside = (0 <= xs + dx) & (xs + dx < width) & \
+                (0 <= ys + dy) & (ys + dy < height)
+            ys, xs = ys[inside], xs[inside]
+            step = (dy * width + dx, DIAGONAL if dx and dy else 1)
+            for tileId in (ys * width + xs).tolist():
+                neighbours[tileId].append((tileId + step[0], step[1]))
+        return neighbours
+
+    def searchCluster(self, origin, cluster, blocked=()):
+        """
+        Runs Dijkstra's algorithm from a tile over the graph, staying inside
+        the cluster of the tile.
+
+        Args:
+            origin (tuple): The tile to search from.
+            cluster (tuple): The cluster to stay inside.
+            blocked (set): Tiles that may not be walked onto, such as tiles
+                           taken by enemies.
+
+        Returns:
+            tuple: The cost of the route to each reached tile and the tile
+                   each one was reached from.
+        """
+        left, top, right, bottom = self.clusterBounds(cluster)
+        graph = self.graph
+        width = graph.width
+        indptr, indices, flat = graph.indptr, graph.indices, graph.flat
+        originId = graph.tileId(*origin)
+        if originId < 0:
+            return {}, {}
+        tiles = {originId: origin}
+        costs = {originId: 0}
+        parents = {originId: None}
+        queue = [(0, originId)]
+        while queue:
+            cost, tileId = heappop(queue)
+            if cost > costs[tileId]:
+                continue
+            x, y = tiles[tileId]
+            nextIds = indices[indptr[tileId]:indptr[tileId + 1]]
+            for nextId, position in zip(
+                    nextIds.tolist(), flat[nextIds].tolist()
+            ):
+                nextY, nextX = divmod(position, width)
+                if not (left <= nextX < right and top <= nextY < bottom):
+                    continue
+                nextTile = (nextX, nextY)
+                nextCost = cost + (DIAGONAL if nextX != x and nextY != y else 1)
+                if nextCost < costs.get(nextId, math.inf) and \
+                        nextTile not in blocked:
+                    tiles[nextId] = nextTile
+                    costs[nextId] = nextCost
+                    parents[nextId] = tileId
+                    heappush(queue, (nextCost, nextId))
+        return (
+            {tiles[tileId]: cost for tileId, cost in costs.items()},
+            {
+                tiles[tileId]: tiles[parent] if parent is not None else None
+                for tileId, parent in parents.items()
+            }
+        )
+
+    def findRoute(self, start, goal, blocked=()):
+        """
+        Plans a route from the start to the goal over the abstract graph and
+        refines its first hop into tiles. The first hop is searched around
+        the blocked tiles, the rest of the route only around walls.
+
+        Args:
+            start (tuple): The tile to start from.
+            goal (tuple): The tile to reach.
+            blocked (set): Tiles that may not be walked onto.
+
+        Returns:
+            list: The tiles of the first hop after the start, the first of
+                  them being the next tile to move to, or None if no route
+                  was found.
+        """
+        if start == goal:
+            return [goal]
+        startCluster = self.clusterOf(start)
+        goalCluster = self.clusterOf(goal)
+        self.openCluster(startCluster)
+        self.openCluster(goalCluster)
+        if goal != self.goal:
+            self.goal = goal
+            self.goalCosts, _ = self.searchCluster(goal, goalCluster)
+        goalCosts = self.goalCosts
+        startCosts, parents = self.searchCluster(start, startCluster, blocked)
+
+        # Queue entries are (estimate, cost, tile, first entrance), with an
+        # empty tile standing for the goal itself
+        queue = []
+        if goal in startCosts:
+            heappush(queue, (startCosts[goal], startCosts[goal], (), goal))
+        for tile in self.nodes[startCluster]:
+            if tile != start and tile in startCosts:
+                cost = startCosts[tile]
+                heappush(queue, (
+                    cost + self.octile(tile, goal), cost, tile, tile
+                ))
+        for tile, cost in self.links.get(start, {}).items():
+            if tile not in blocked:
+                heappush(queue, (
+                    cost + self.octile(tile, goal), cost, tile, tile
+                ))
+
+        best = {start: 0}
+        while queue:
+            _, cost, tile, first = heappop(queue)
+            if not tile:
+                return self.firstHop(start, first, parents)
+            if cost > best.get(tile, math.inf):
+                continue
+            best[tile] = cost
+            cluster = self.clusterOf(tile)
+            if cluster == goalCluster and tile in goalCosts:
+                total = cost + goalCosts[tile]
+                heappush(queue, (total, total, (), first))
+            self.openCluster(cluster)
+            neighbours = list(self.intraEdges[cluster][tile].items()) + \
+                list(self.links.get(tile, {}).items())
+            for nextTile, stepCost in neighbours:
+                nextCost = cost + stepCost
+                if nextCost < best.get(nextTile, math.inf):
+                    best[nextTile] = nextCost
+                    heappush(queue, (
+                        nextCost + self.octile(nextTile, goal), nextCost,
+                        nextTile, first
+                    ))
+        return None
+
+    @staticmethod
+    def firstHop(start, first, parents):
+        """
+        Walks the search tree of the start cluster back from the first
+        entrance of a route.
+
+        Returns:
+            list: The tiles from the next tile to move to up to the first
+                  entrance, or just the entrance if it lies across a
+                  border next to the start.
+        """
+        if first not in parents:
+            return [first]
+        hop = [first]
+        while parents[hop[-1]] != start:
+            hop.append(parents[hop[-1]])
+        return hop[::-1]
+
+    def updateTile(self, x, y):
+        """
+        Forgets the parts of the abstract graph a changed tile can affect:
+        the borders of its cluster, the corner borders passing beside it,
+        and the layout of its cluster and of the neighbours at the ends of
+        those borders. They are laid out again when a route next reaches
+        them.
+
+        Args:
+            x (int): X coordinate of the changed tile.
+            y (int): Y coordinate of the changed tile.
+        """
+        cx, cy = self.clusterOf((x, y))
+        links = self.links
+        for key in self.borderKeys((cx, cy)) + self.cornerKeys((cx, cy)):
+            for first, second, _ in self.borders.pop(key, ()):
+                links.get(first, {}).pop(second, None)
+                links.get(second, {}).pop(first, None)
+                for tile in (first, second):
+                    if not links.get(tile, True):
+                        del links[tile]
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                self.nodes.pop((cx + dx, cy + dy), None)
+                self.intraEdges.pop((cx + dx, cy + dy), None)
+        self.goal = None
@@ -0,0 +1,174 @@
+import pygame as pg
+from source.settings import *
+
+
+class TextCache:
+    """
+    The TextCache class keeps the rendered surfaces of strings drawn with a
+    font, so that a string is only rendered again when it was not drawn
+    recently.
+
+    Attributes:
+        font (Font): The font strings are rendered with.
+        color (str): The color strings are rendered in.
+        surfaces (dict): Rendered surfaces by string.
+        maxEntries (int): Number of surfaces kept before the cache is
+                          cleared.
+    """
+
+    def __init__(self, font, color, maxEntries=HUD_TEXT_CACHE_SIZE):
+        """
+        Initializes an empty cache for a font and color.
+
+        Args:
+            font (Font): The font strings are rendered with.
+            color (str): The color strings are rendered in.
+            maxEntries (int): Number of surfaces kept before the cache is
+                              cleared.
+        """
+        self.font = font
+        self.color = color
+        self.surfaces = {}
+        self.maxEntries = maxEntries
+
+    def render(self, text):
+        """
+        Returns the rendered surface of a string.
+
+        Args:
+            text (str): The string to render.
+
+        Returns:
+            Surface: The rendered string.
+        """
+        surface = self.surfaces.get(text)
+        if surface is None:
+            if len(self.surfaces) >= self.maxEntries:
+                self.surfaces.clear()
+            surface = self.font.render(text, False, self.color)
+            self.surfaces[text] = surface
+        return surface
+
+
+class HUD:
+    """
+    The HUD class draws the text on top of the game, the player's health
+    and the pause, game over and victory menus, and presents the screen.
+
+    The menus are rendered once when the HUD is created and the health text
+    is only rendered again when the health changes. Everything drawn during
+    a frame is presented with a single display update: a full flip when the
+    3D view was redrawn, or an update of just the changed rectangles when
+    only a menu was drawn over the last frame. A menu that is already on
+    screen is not drawn or presented again.
+
+    Attributes:
+        game (Game): Reference to the main game instance.
+        screen (Surface): The display surface that is drawn into.
+        titleText, optionsText (TextCache): Cached strings of the title and
+                                            options fonts.
+        menus (dict): Pre-rendered (surface, rect) lists of each menu.
+        health (float): The health value the health text was built for.
+        healthSurface (Surface): The rendered health text.
+        healthRect (Rect): Where the health text is drawn.
+        fullFrame (bool): Whether the whole screen was redrawn this frame.
+        dirtyRects (list): Changed rectangles to present this frame.
+        menu (str): Name of the menu currently on screen, if any.
+    """
+
+    def __init__(self, game):
+        """
+        Loads the fonts and pre-renders the menus.
+
+        Args:
+            game (Game): A reference to the main game object.
+        """
+        self.game = game
+        self.screen = game.screen
+        self.titleText = TextCache(
+            pg.font.Font('resources/fonts/Halo3.ttf', 150), 'red'
+        )
+        self.optionsText = TextCache(
+            pg.font.Font('resources/fonts/hyperion.ttf', 50), 'red'
+        )
+        self.menus = {
+            'pause': self.buildMenu("PAUSE MENU"),
+            'gameOver': self.buildMenu("GAME OVER"),
+            'victory': self.buildMenu("Victory"),
+        }
+        self.health = None
+        self.healthSurface = None
+        self.healthRect = None
+        self.fullFrame = False
+        self.dirtyRects = []
+        self.menu = None
+
+    def buildMenu(self, title):
+        """
+        Renders a menu with a title and the restart and quit options.
+
+        Args:
+            title (str): The title of the menu.
+
+        Returns:
+            list: The (surface, rect) pairs of the menu.
+        """
+        titleSurface = self.titleText.render(title)
+        restartSurface = self.optionsText.render("Restart (R)")
+        exitSurface = self.optionsText.render("Quit (ESC)")
+        return [
+            (titleSurface, titleSurface.get_rect(midtop=(800, 100))),
+            (restartSurface, restartSurface.get_rect(bottomleft=(200, 700))),
+            (exitSurface, exitSurface.get_rect(bottomright=(1400, 700))),
+        ]
+
+    def invalidate(self):
+        """
+        Marks the whole screen as redrawn, so the frame is presented with a
+        full flip and any menu has to be drawn again.
+        """
+        self.fullFrame = True
+        self.menu = None
+
+    def drawStats(self):
+        """
+        Draws the player's health as a percentage in the top left corner of
+        the screen, rendering the text again only when the health changed.
+        """
+        health = self.game.player.health
+        if health != self.health:
+            self.health = health
+            self.healthSurface = self.optionsText.render(
+                f"{(health/PLAYER_MAX_HEALTH) * 100}%"
+            )
+            self.healthRect = self.healthSurface.get_rect(topleft=(20, 20))
+        self.screen.blit(self.healthSurface, self.healthRect)
+        if not self.fullFrame:
+            self.dirtyRects.append(self.healthRect)
+
+    def drawMenu(self, name):
+        """
+        Draws a pre-rendered menu over the screen unless it is already
+        shown.
+
+        Args:
+            name (str): 'pause', 'gameOver' or 'victory'.
+        """
+        if name == self.menu:
+            return
+        self.menu = name
+        for surface, rect in self.menus[name]:
+            self.screen.blit(surface, rect)
+            if not self.fullFrame:
+                self.dirtyRects.append(rect)
+
+    def present(self):
+        """
+        Presents what was drawn this frame with a single display update.
+        """
+        if self.fullFrame:
+            pg.display.flip()
+        elif self.dirtyRects:
+            pg.display.update(self.dirtyRects)
+        self.fullFrame = False
+        self.dirtyRects = []
@@ -0,0 +1,384 @@
+import sys
+import random
+import argparse
+import numpy as np
+from collections import deque
+from source.settings import *
+from source.mapfile import saveLevel
+
+
+class LevelGenerator:
+    """
+    The LevelGenerator class builds seeded levels of any size for testing
+    how the game scales. It can lay out a maze of one tile wide corridors,
+    a cave grown with a cellular automaton, or an open arena with pillars.
+    The walls are painted with the wall texture ids 1 to 5, and torches and
+    enemies are spread over the open tiles at a configurable density.
+
+    The generated level is a dictionary with the arguments of saveLevel, so
+    it can be written to a level file and opened by Map and SpriteManager
+    like any other level.
+
+    Attributes:
+        width, height (int): Size of the level in tiles.
+        seed (int): Seed the level is generated from.
+        spriteDensity (float): Torches per open tile.
+        enemyDensity (float): Enemies per open tile.
+        random (Random): Random generator for single draws.
+        rng (Generator): NumPy random generator for bulk draws.
+        walls (ndarray): Boolean wall layer of the last generated level.
+        start (tuple): Tile the player starts on in the last level.
+    """
+
+    KINDS = ('maze', 'cave', 'arena')
+    # Share of each enemy kind among the placed enemies
+    ENEMY_WEIGHTS = {
+        'Trooper': 0.7,
+        'DeathKnight': 0.1,
+        'CyberDemon': 0.1,
+        'Arachnotron': 0.1,
+    }
+    # Size of the square blocks of tiles painted with the same texture
+    TEXTURE_BLOCK = 8
+    # No enemy is placed within this many tiles of the player's start
+    SAFE_DISTANCE = 3
+    # Size of the room opened in levels left with less floor than it
+    ROOM_SIZE = 3
+
+    def __init__(
+            self, width, height, seed=0,
+            spriteDensity=LEVELGEN_SPRITE_DENSITY,
+            enemyDensity=LEVELGEN_ENEMY_DENSITY
+    ):
+        """
+        Initializes the generator.
+
+        Args:
+            width (int): Width of the level in tiles, at least 5.
+            height (int): Height of the level in tiles, at least 5.
+            seed (int): Seed the level is generated from.
+            spriteDensity (float): Torches per open tile.
+            enemyDensity (float): Enemies per open tile.
+        """
+        if width < 5 or height < 5:
+            raise ValueError('levels must be at least 5x5 tiles')
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.spriteDensity = spriteDensity
+        self.enemyDensity = enemyDensity
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.walls = None
+        self.start = None
+
+    def generate(self, kind):
+        """
+        Generates a level.
+
+        Args:
+            kind (str): 'maze', 'cave' or 'arena'.
+
+        Returns:
+            dict: The tiles, sprites, enemies, playerPosition and
+                  playerAngle of the level, as taken by saveLevel.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f'unknown level kind {kind!r}')
+        walls = getattr(self, kind)()
+        walls[0, :] = walls[-1, :] = True
+        walls[:, 0] = walls[:, -1] = True
+        if kind != 'maze':
+            # Mazes are connected by construction
+            walls = self.keepLargestRegion(walls)
+            if np.count_nonzero(~walls) < self.ROOM_SIZE ** 2:
+                # Small caves can fill in almost completely
+                self.carveRoom(walls, self.ROOM_SIZE)
+                walls = self.keepLargestRegion(walls)
+        self.start = self.findStart(walls)
+        self.walls = walls
+        sprites, enemies = self.populate(walls, self.start)
+        startX, startY = self.start
+        return {
+            'tiles': self.paint(walls),
+            'sprites': sprites,
+            'enemies': enemies,
+            'playerPosition': (startX + 0.5, startY + 0.5),
+            'playerAngle': 0,
+        }
+
+    def save(self, path, kind):
+        """
+        Generates a level and writes it to a level file.
+
+        Args:
+            path (str): Path of the file to write.
+            kind (str): 'maze', 'cave' or 'arena'.
+        """
+        saveLevel(path, **self.generate(kind))
+
+    def maze(self):
+        """
+        Carves a maze of one tile wide corridors with a randomized depth
+        first search over every other tile, then knocks out a few walls so
+        that there is more than one route between places.
+
+        Returns:
+            ndarray: The boolean wall layer.
+        """
+        walls = np.ones((self.height, self.width), dtype=bool)
+        cellsX, cellsY = (self.width - 1) // 2, (self.height - 1) // 2
+        visited = bytearray(cellsX * cellsY)
+        visited[0] = 1
+        walls[1, 1] = False
+        stack = [(0, 0)]
+        directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        choice = self.random.choice
+        while stack:
+            cellX, cellY = stack[-1]
+            options = [
+                (cellX + dx, cellY + dy) for dx, dy in directions
+                if 0 <= cellX + dx < cellsX and 0 <= cellY + dy < cellsY
+                and not visited[(cellY + dy) * cellsX + cellX + dx]
+            ]
+            if not options:
+                stack.pop()
+                continue
+            nextX, nextY = choice(options)
+            visited[nextY * cellsX + nextX] = 1
+            walls[2 * nextY + 1, 2 * nextX + 1] = False
+            walls[cellY + nextY + 1, cellX + nextX + 1] = False
+            stack.append((nextX, nextY))
+
+        # Open walls standing between two corridors
+        between = np.zeros_like(walls)
+        between[1:-1, 2:-2:2] = ~walls[1:-1, 1:-3:2] & ~walls[1:-1, 3:-1:2]
+        between[2:-2:2, 1:-1] |= ~walls[1:-3:2, 1:-1] & ~walls[3:-1:2, 1:-1]
+        loops = between & walls & \
+            (self.rng.random(walls.shape) < LEVELGEN_MAZE_LOOPS)
+        walls[loops] = False
+        return walls
+
+    def cave(self):
+        """
+        Grows a cave from random noise with a cellular automaton: a tile
+        becomes a wall when most of its neighbours are walls.
+
+        Returns:
+            ndarray: The boolean wall layer.
+        """
+        walls = self.rng.random((self.height, self.width)) < 0.45
+        for _ in range(5):
+            padded = np.pad(walls, 1, constant_values=True).astype(np.uint8)
+            neighbours = sum(
+                padded[1 + dy:padded.shape[0] - 1 + dy,
+                       1 + dx:padded.shape[1] - 1 + dx]
+                for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                if dx or dy
+            )
+            walls = (neighbours >= 5) | (walls & (neighbours == 4))
+        return walls
+
+    def arena(self):
+        """
+        Lays out an open floor scattered with square pillars.
+
+        Returns:
+            ndarray: The boolean wall layer.
+        """
+        pillars = self.rng.random((self.height, self.width)) < 0.015
+        walls = pillars.copy()
+        walls[1:, :] |= pillars[:-1, :]
+        walls[:, 1:] |= pillars[:, :-1]
+        walls[1:, 1:] |= pillars[:-1, :-1]
+        return walls
+
+    @staticmethod
+    def carveRoom(walls, size=3):
+        """
+        Opens a square room in the middle of a level, within its outer
+        walls, so that the level has somewhere to start.
+
+        Args:
+            walls (ndarray): The boolean wall layer, changed in place.
+            size (int): Width and height of the room in tiles.
+        """
+        height, width = walls.shape
+        top = max(1, (height - size) // 2)
+        left = max(1, (width - size) // 2)
+        walls[top:min(top + size, height - 1),
+              left:min(left + size, width - 1)] = False
+
+    @staticmethod
+    def findStart(walls):
+        """
+        Finds the open tile closest to the top left corner.
+
+        Args:
+            walls (ndarray): The boolean wall layer.
+
+        Returns:
+            tuple: The (x, y) tile the player starts on.
+        """
+        ys, xs = np.nonzero(~walls)
+        if not len(xs):
+            raise ValueError('the level has no open tiles')
+        closest = np.argmin(xs + ys)
+        return int(xs[closest]), int(ys[closest])
+
+    @staticmethod
+    def keepLargestRegion(walls):
+        """
+        Fills every open tile outside the largest connected region with
+        wall, so that no enemy or torch ends up sealed off from the player.
+
+        Args:
+            walls (ndarray): The boolean wall layer, walled in on all sides.
+
+        Returns:
+            ndarray: The wall layer with only the largest region open.
+        """
+        height, width = walls.shape
+        floor = (~walls).astype(np.uint8).tobytes()
+        regions = [0] * (width * height)
+        sizes = [0]
+        for first in range(width * height):
+            if not floor[first] or regions[first]:
+                continue
+            region = len(sizes)
+            regions[first] = region
+            queue = deque([first])
+            size = 0
+            while queue:
+                tile = queue.popleft()
+                size += 1
+                for nextTile in (
+                        tile - 1, tile + 1, tile - width, tile + width
+                ):
+                    if floor[nextTile] and not regions[nextTile]:
+                        regions[nextTile] = region
+                        queue.append(nextTile)
+            sizes.append(size)
+        if len(sizes) == 1:
+            return walls
+        largest = max(range(len(sizes)), key=sizes.__getitem__)
+        return np.array(regions, dtype=np.int64).reshape(
+            height, width
+        ) != largest
+
+    def paint(self, walls):
+        """
+        Paints the walls with texture ids 1 to 5, one random texture per
+        block of tiles.
+
+        Args:
+            walls (ndarray): The boolean wall layer.
+
+        Returns:
+            ndarray: The uint8 tile layer.
+        """
+        block = self.TEXTURE_BLOCK
+        textures = self.rng.integers(
+            1, 6, (self.height // block + 1, self.width // block + 1),
+            dtype=np.uint8
+        )
+        ys, xs = np.indices(walls.shape)
+        return np.where(walls, textures[ys // block, xs // block], 0).astype(
+            np.uint8
+        )
+
+    def populate(self, walls, start):
+        """
+        Places torches and enemies on random open tiles.
+
+        Args:
+            walls (ndarray): The boolean wall layer.
+            start (tuple): The (x, y) tile the player starts on.
+
+        Returns:
+            tuple: The sprite and enemy spawns as (kind, (x, y)) lists.
+        """
+        ys, xs = np.nonzero(~walls)
+        rng = self.rng
+
+        count = min(round(self.spriteDensity * len(xs)), len(xs))
+        sprites = [
+            ('AnimatedSprite', (xs[pick] + 0.5, ys[pick] + 0.5))
+            for pick in rng.choice(len(xs), count, replace=False).tolist()
+        ]
+
+        startX, startY = start
+        safe = (np.abs(xs - startX) <= self.SAFE_DISTANCE) & \
+            (np.abs(ys - startY) <= self.SAFE_DISTANCE)
+        xs, ys = xs[~safe], ys[~safe]
+        count = min(round(self.enemyDensity * len(xs)), len(xs))
+        picks = rng.choice(len(xs), count, replace=False).tolist()
+        kinds = rng.choice(
+            list(self.ENEMY_WEIGHTS), count,
+            p=list(self.ENEMY_WEIGHTS.values())
+        ).tolist()
+        enemies = [
+            (kind, (xs[pick] + 0.5, ys[pick] + 0.5))
+            for kind, pick in zip(kinds, picks)
+        ]
+        return sprites, enemies
+
+    def waypoints(self, count=5, window=LEVELGEN_WAYPOINT_WINDOW):
+        """
+        Picks open tiles near the start of the last generated level for a
+        benchmark's camera to visit, so that runs over different level
+        sizes look at comparable surroundings.
+
+        Args:
+            count (int): Number of waypoints, the first being the start.
+            window (int): The waypoints lie within this many tiles of the
+                          top left corner.
+
+        Returns:
+            list: (x, y) tiles.
+        """
+        ys, xs = np.nonzero(~self.walls[:window, :window])
+        picks = self.rng.choice(
+            len(xs), min(count - 1, len(xs)), replace=False
+        ).tolist()
+        return [self.start] + [(int(xs[pick]), int(ys[pick])) for pick in picks]
+
+
+def main(arguments=None):
+    """
+    Generates a level from the command line and writes it to a file.
+    """
+    parser = argparse.ArgumentParser(
+        description='Generate a maze, cave or arena level file.'
+    )
+    parser.add_argument('kind', choices=LevelGenerator.KINDS)
+    parser.add_argument('output', help='level file to write')
+    parser.add_argument(
+        '--size', type=int, nargs=2, default=(64, 64),
+        metavar=('WIDTH', 'HEIGHT')
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--sprite-density', type=float, default=LEVELGEN_SPRITE_DENSITY,
+        help='torches per open tile'
+    )
+    parser.add_argument(
+        '--enemy-density', type=float, default=LEVELGEN_ENEMY_DENSITY,
+        help='enemies per open tile'
+    )
+    args = parser.parse_args(arguments)
+
+    generator = LevelGenerator(
+        *args.size, args.seed, args.sprite_density, args.enemy_density
+    )
+    level = generator.generate(args.kind)
+    saveLevel(args.output, **level)
+    sys.stdout.write(
+        f'{args.output}: {args.size[0]}x{args.size[1]} {args.kind}, '
+        f'{len(level["sprites"])} torches, '
+        f'{len(level["enemies"])} enemies\n'
+    )
+
+
+if __name__ == '__main__':
+    main()
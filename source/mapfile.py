@@ -0,0 +1,165 @@
+import os
+import sys
+import mmap
+import struct
+import argparse
+import numpy as np
+
+# Binary level layout, all little endian:
+#   header       HEADER
+#   tile layer   width * height uint8 texture ids, row by row
+#   sprite table spriteCount SPAWN records
+#   enemy table  enemyCount SPAWN records
+MAGIC = b'MWMP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIfff')
+SPAWN = np.dtype([('kind', '<u2'), ('x', '<f4'), ('y', '<f4')])
+
+# Spawn records store the index of their kind in these tables
+SPRITE_KINDS = ('Sprite', 'AnimatedSprite')
+ENEMY_KINDS = ('Trooper', 'DeathKnight', 'CyberDemon', 'Arachnotron')
+
+
+class Level:
+    """
+    The Level class holds the contents of a level file. The tile layer and
+    the spawn tables are NumPy views straight into the memory-mapped file,
+    so even very large levels are opened without reading the whole file or
+    building Python lists.
+
+    Attributes:
+        path (str): The file the level was loaded from.
+        width, height (int): Size of the level in tiles.
+        tiles (ndarray): Read-only uint8 tile layer indexed as
+                         tiles[y, x].
+        sprites, enemies (ndarray): Spawn tables with kind, x and y
+                                    fields.
+        playerPosition (tuple): Where the player starts.
+        playerAngle (float): Which way the player faces at the start.
+    """
+
+    def __init__(self, path):
+        """
+        Memory-maps a level file and checks its header.
+
+        Args:
+            path (str): Path to the level file.
+
+        Raises:
+            ValueError: If the file is not a level file of this version or
+                        is shorter than its header says.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            raise ValueError(f'{path}: too short for a level header')
+        (
+            magic, version, _, self.width, self.height,
+            spriteCount, enemyCount, playerX, playerY, self.playerAngle
+        ) = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: not a level file')
+        if version != VERSION:
+            raise ValueError(f'{path}: unsupported level version {version}')
+        self.playerPosition = playerX, playerY
+
+        tileBytes = self.width * self.height
+        size = HEADER.size + tileBytes + \
+            (spriteCount + enemyCount) * SPAWN.itemsize
+        if len(self.buffer) < size:
+            raise ValueError(f'{path}: truncated level file')
+        self.tiles = np.frombuffer(
+            self.buffer, np.uint8, tileBytes, HEADER.size
+        ).reshape(self.height, self.width)
+        offset = HEADER.size + tileBytes
+        self.sprites = np.frombuffer(self.buffer, SPAWN, spriteCount, offset)
+        offset += spriteCount * SPAWN.itemsize
+        self.enemies = np.frombuffer(self.buffer, SPAWN, enemyCount, offset)
+
+    def close(self):
+        """
+        Drops the views into the file and unmaps it. Any array taken from
+        the level must have been copied or dropped before.
+        """
+        self.tiles = self.sprites = self.enemies = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+
+    def spawns(self, table, kinds):
+        """
+        Lists the spawns of a spawn table with their kind names.
+
+        Args:
+            table (ndarray): The sprite or enemy spawn table.
+            kinds (tuple): The kind names the table's indexes refer to.
+
+        Returns:
+            list: (kind name, (x, y)) tuples.
+        """
+        return [
+            (kinds[kind], (x, y))
+            for kind, x, y in zip(
+                table['kind'].tolist(), table['x'].tolist(),
+                table['y'].tolist()
+            )
+        ]
+
+
+def saveLevel(
+        path, tiles, sprites=(), enemies=(), playerPosition=(2, 2),
+        playerAngle=0
+):
+    """
+    Writes a level file.
+
+    Args:
+        path (str): Path of the file to write.
+        tiles: 2D tile layer indexed as tiles[y][x].
+        sprites (list): (kind name, (x, y)) sprite spawns.
+        enemies (list): (kind name, (x, y)) enemy spawns.
+        playerPosition (tuple): Where the player starts.
+        playerAngle (float): Which way the player faces at the start.
+    """
+    tiles = np.ascontiguousarray(tiles, dtype=np.uint8)
+    height, width = tiles.shape
+
+    def table(spawns, kinds):
+        records = np.zeros(len(spawns), dtype=SPAWN)
+        for record, (kind, (x, y)) in zip(records, spawns):
+            record['kind'] = kinds.index(kind)
+            record['x'], record['y'] = x, y
+        return records
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(
+            MAGIC, VERSION, 0, width, height, len(sprites), len(enemies),
+            playerPosition[0], playerPosition[1], playerAngle
+        ))
+        file.write(tiles.tobytes())
+        file.write(table(sprites, SPRITE_KINDS).tobytes())
+        file.write(table(enemies, ENEMY_KINDS).tobytes())
+
+
+def main(arguments=None):
+    """
+    Converts the levels defined as Python lists in source/maps.py into
+    level files.
+    """
+    parser = argparse.ArgumentParser(
+        description='Convert the built-in maps into level files.'
+    )
+    parser.add_argument('--output', default='resources/maps')
+    args = parser.parse_args(arguments)
+
+    from source.maps import levels
+    os.makedirs(args.output, exist_ok=True)
+    for name, level in levels.items():
+        path = os.path.join(args.output, f'{name}.map')
+        saveLevel(path, **level)
+        sys.stdout.write(f'{path}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 import pygame as pg
+import numpy as np
+from source.settings import *
+from source.mapfile import Level
+from source.visibility import PotentiallyVisibleSet
 
 _ = 0
 mapOne = [
@@ -43,6 +47,48 @@ mapTwo = [
     [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
 ]
 
+# Spawns of the built-in maps, (kind, position) as stored in level files
+mapTwoSprites = [
+    ('AnimatedSprite', (3, 3)),
+    ('AnimatedSprite', (3, 6)),
+    ('AnimatedSprite', (21.5, 9.5)),
+    ('AnimatedSprite', (23.5, 9.5)),
+    ('AnimatedSprite', (21.5, 16.5)),
+    ('AnimatedSprite', (3.5, 22.5)),
+]
+
+mapTwoEnemies = [
+    ('Trooper', (5.5, 1.5)),
+    ('Trooper', (5.5, 6)),
+    ('Trooper', (14.5, 3.5)),
+    ('Trooper', (13.5, 8.5)),
+    ('Trooper', (18.5, 11.5)),
+    ('Trooper', (21.5, 7.5)),
+    ('Trooper', (21, 19)),
+    ('Trooper', (10.5, 11)),
+    ('Trooper', (14.5, 17.5)),
+    ('Trooper', (5, 24)),
+    ('DeathKnight', (18.5, 5.5)),
+    ('CyberDemon', (20.5, 23)),
+    ('Arachnotron', (6, 9)),
+]
+
+# Built-in maps converted to level files by source/mapfile.py
+levels = {
+    'mapOne': {
+        'tiles': mapOne,
+        'playerPosition': PLAYER_POSITION,
+        'playerAngle': PLAYER_ANGLE,
+    },
+    'mapTwo': {
+        'tiles': mapTwo,
+        'sprites': mapTwoSprites,
+        'enemies': mapTwoEnemies,
+        'playerPosition': PLAYER_POSITION,
+        'playerAngle': PLAYER_ANGLE,
+    },
+}
+
 
 class Map:
     """
@@ -54,41 +100,233 @@ class Map:
     Attributes:
         game (Game): An instance of the Game class, used to access
                      the game environment.
-        map (list): A predefined 2D list representing the layout of
-                    the game world.
+        level (Level): The memory-mapped level file the map was
+                       loaded from, which also holds the spawns.
+        map (ndarray): The layout of the game world indexed as
+                       map[y][x], the same array as grid.
         gameWorld (dict): A dictionary mapping coordinates to values
-                          in the game map.
+                          in the game map, kept for compatibility and
+                          only built when first used.
+        grid (ndarray): A dense read-only uint8 array of the map
+                        indexed as grid[y, x], used for bulk queries.
+        cells (bytearray): The grid flattened row by row, used for fast
+                           single tile lookups.
+        visibility (PotentiallyVisibleSet): Tile to tile visibility table
+                                            used to skip sight tests, or
+                                            None when disabled.
         horizontals (int): The number of horizontal rows in the map.
         verticals (int): The number of vertical columns in the map.
+
+    Tiles outside the map are treated as empty space by all accessors, the
+    same way the gameWorld dictionary has no entries for them.
     """
 
-    def __init__(self, game):
+    def __init__(self, game, path=MAP_PATH):
         """
-        Initializes the Map class by loading the predefined map
-        layout and setting up attributes for use within the game.
+        Initializes the Map class by memory-mapping a level file and
+        setting up attributes for use within the game.
 
         Args:
             game (Game): A reference to the main Game object that
                          contains the game state and display surface.
+            path (str): Path to the level file.
         """
         self.game = game
-        self.map = mapTwo
-        self.gameWorld = {}
-        self.horizontals = len(self.map)
-        self.verticals = len(self.map[0])
-        self.getMap()
+        self.level = Level(path)
+        self.grid = self.level.tiles
+        self.map = self.grid
+        self.horizontals, self.verticals = self.grid.shape
+        self.cells = bytearray(self.grid.tobytes())
+        self.worldDict = None
+        self.visibility = None
+        if PVS_ENABLED:
+            self.visibility = PotentiallyVisibleSet(
+                self.grid, path + PVS_SUFFIX if PVS_CACHE else None
+            )
+            self.visibility.load()
+            if np.count_nonzero(self.grid == 0) <= PVS_BUILD_TILES:
+                self.visibility.build()
+                self.visibility.save()
 
-    def getMap(self):
+    @property
+    def gameWorld(self):
         """
-        Populates the gameWorld dictionary with non-empty cells from the map.
+        Returns the gameWorld dictionary, building it on first use.
 
         Each non-zero cell in the map is stored in the gameWorld dictionary
         with its coordinates as the key and the cell value as the value.
         """
-        for y, horizontal in enumerate(self.map):
-            for x, value in enumerate(horizontal):
-                if value != 0:
-                    self.gameWorld[(x, y)] = value
+        if self.worldDict is None:
+            ys, xs = np.nonzero(self.grid)
+            self.worldDict = dict(zip(
+                zip(xs.tolist(), ys.tolist()),
+                self.grid[ys, xs].tolist()
+            ))
+        return self.worldDict
+
+    def tileAt(self, x, y):
+        """
+        Returns the value of a tile.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+
+        Returns:
+            int: The wall texture id of the tile, or zero for empty space
+                 and tiles outside the map.
+        """
+        if 0 <= x < self.verticals and 0 <= y < self.horizontals:
+            return self.cells[y * self.verticals + x]
+        return 0
+
+    def isWall(self, x, y):
+        """
+        Checks whether a tile is a wall.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+
+        Returns:
+            bool: True if the tile is a wall, False otherwise.
+        """
+        if 0 <= x < self.verticals and 0 <= y < self.horizontals:
+            return self.cells[y * self.verticals + x] != 0
+        return False
+
+    def tilesAt(self, xs, ys):
+        """
+        Returns the values of many tiles at once.
+
+        Args:
+            xs (ndarray): X coordinates of the tiles.
+            ys (ndarray): Y coordinates of the tiles.
+
+        Returns:
+            ndarray: The values of the tiles, zero outside the map.
+        """
+        return self.lookup(self.grid, xs, ys)
+
+    @staticmethod
+    def lookup(grid, xs, ys):
+        """
+        Looks up many tiles of a dense grid at once, treating tiles outside
+        the grid as empty space.
+
+        Args:
+            grid (ndarray): A dense grid indexed as grid[y, x].
+            xs (ndarray): Integer x coordinates of the tiles.
+            ys (ndarray): Integer y coordinates of the tiles.
+
+        Returns:
+            ndarray: The values of the tiles, zero outside the grid.
+        """
+        height, width = grid.shape
+        inBounds = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        return np.where(
+            inBounds,
+            grid[np.clip(ys, 0, height - 1), np.clip(xs, 0, width - 1)],
+            0
+        )
+
+    def setTile(self, x, y, value):
+        """
+        Changes a tile of the map, for example to open a door. The grid is
+        copied out of the level file on the first change, and only the rows
+        of the visibility table the tile can appear in are dropped. The
+        path finding graph is updated around the tile, and the renderer's
+        copy of the grid, if it keeps one.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+            value (int): The wall texture id, or zero for empty space.
+        """
+        if not self.grid.flags.writeable:
+            self.grid = self.grid.copy()
+            self.map = self.grid
+            if self.visibility is not None:
+                self.visibility.setGrid(self.grid)
+        self.grid[y, x] = value
+        self.cells[y * self.verticals + x] = value
+        if self.worldDict is not None:
+            if value:
+                self.worldDict[x, y] = value
+            else:
+                self.worldDict.pop((x, y), None)
+        if self.visibility is not None:
+            self.visibility.invalidate(x, y)
+        pathfinding = getattr(self.game, 'pathfinding', None)
+        if pathfinding is not None:
+            pathfinding.updateTile(x, y)
+        renderer = getattr(self.game, 'renderer', None)
+        if renderer is not None:
+            renderer.updateTile(x, y, value)
+
+    def isVisible(self, fromX, fromY, toX, toY, near=False):
+        """
+        Checks the visibility table for whether a tile may be seen from
+        another.
+
+        Args:
+            fromX, fromY (int): The tile looked from.
+            toX, toY (int): The tile looked at.
+            near (bool): Whether to also accept the neighbours of the tile
+                         looked at, for things that stick out of their tile.
+
+        Returns:
+            bool: False if the tile certainly cannot be seen, True if it
+                  may be or the table is disabled.
+        """
+        if self.visibility is None:
+            return True
+        if near:
+            return self.visibility.isNearVisible(fromX, fromY, toX, toY)
+        return self.visibility.isVisible(fromX, fromY, toX, toY)
+
+    def areVisible(self, fromX, fromY, xs, ys):
+        """
+        Checks the visibility table for many tiles looked at from one tile,
+        like isVisible.
+
+        Args:
+            fromX, fromY (int): The tile looked from.
+            xs, ys (ndarray): Integer coordinates of the tiles looked at.
+
+        Returns:
+            ndarray: False for each tile that certainly cannot be seen, True
+                     for each one that may be or if the table is disabled.
+        """
+        if self.visibility is None:
+            return np.ones(np.shape(xs), dtype=bool)
+        return self.visibility.areVisible(fromX, fromY, xs, ys)
+
+    def close(self):
+        """
+        Writes the rows of the visibility table built while playing, and
+        closes the level file. A grid still read from the file is copied
+        out first, so the map can be read until it is dropped.
+        """
+        if self.visibility is not None:
+            self.visibility.save()
+        if not self.grid.flags.writeable:
+            self.grid = self.grid.copy()
+            self.grid.flags.writeable = False
+            self.map = self.grid
+            if self.visibility is not None:
+                self.visibility.setGrid(self.grid)
+        self.level.close()
+
+    def emptyTiles(self):
+        """
+        Returns every empty tile of the map.
+
+        Returns:
+            list: (x, y) tuples of the empty tiles, row by row.
+        """
+        ys, xs = np.nonzero(self.grid == 0)
+        return list(zip(xs.tolist(), ys.tolist()))
 
     def testDraw(self):
         """
@@ -0,0 +1,323 @@
+import numpy as np
+from source.settings import *
+
+# Directions of the moves between tiles, in the order neighbours are listed
+DIRECTIONS = (
+    (-1, 0), (0, -1), (1, 0), (0, 1),
+    (-1, -1), (1, -1), (1, 1), (-1, 1)
+)
+
+
+class NavGraph:
+    """
+    The NavGraph class is the navigation graph of a map in compressed sparse
+    row form. Every empty tile gets an integer id, row by row, and the ids
+    of the tiles it can move to are stored next to each other in one flat
+    array, so the graph of a large map is a handful of NumPy arrays instead
+    of a dictionary of lists.
+
+    A tile can move to each of its eight neighbours that is empty. Without
+    corner cutting, a diagonal move also needs both tiles beside it to be
+    empty, so that routes never clip the corner of a wall.
+
+    Attributes:
+        width, height (int): Size of the map in tiles.
+        cornerCutting (bool): Whether diagonal moves may pass wall corners.
+        moves (ndarray): Whether each move is allowed, indexed as
+                         moves[direction, y, x] for the tile moved from.
+        ids (ndarray): Id of each tile indexed as ids[y, x], -1 for walls.
+        flat (ndarray): Position y * width + x of the tile of each id.
+        indptr (ndarray): Where the neighbours of each id start in
+                          indices, with one extra entry at the end.
+        indices (ndarray): Ids of the neighbours of every tile.
+        components (ndarray): Label of the connected part of the map each
+                              id is in, the smallest id of that part, or
+                              None until first needed after a build.
+    """
+
+    def __init__(self, grid, cornerCutting=NAV_CORNER_CUTTING):
+        """
+        Builds the graph of a map grid.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            cornerCutting (bool): Whether diagonal moves may pass wall
+                                  corners.
+        """
+        self.cornerCutting = cornerCutting
+        self.build(grid)
+
+    def build(self, grid):
+        """
+        Builds the moves and the sparse rows from the grid with array
+        operations, for when the graph is created or the map changed.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+        """
+        self.height, self.width = height, width = grid.shape
+        floor = grid == 0
+        padded = np.pad(floor, 1, constant_values=False)
+
+        def shifted(dx, dy):
+            return padded[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+
+        self.moves = np.empty((len(DIRECTIONS), height, width), dtype=bool)
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            allowed = floor & shifted(dx, dy)
+            if dx and dy and not self.cornerCutting:
+                allowed &= shifted(dx, 0) & shifted(0, dy)
+            self.moves[direction] = allowed
+
+        self.ids = np.full((height, width), -1, dtype=np.int64)
+        self.flat = np.flatnonzero(floor)
+        self.ids.flat[self.flat] = np.arange(self.flat.size)
+
+        # Rows of (tile, direction) pairs, tile by tile and then in the
+        # order of DIRECTIONS
+        allowed = self.moves.reshape(len(DIRECTIONS), -1)[:, self.flat].T
+        tiles, directions = np.nonzero(allowed)
+        steps = np.array([dy * width + dx for dx, dy in DIRECTIONS])
+        self.indices = self.ids.flat[self.flat[tiles] + steps[directions]]
+        self.indptr = np.zeros(self.flat.size + 1, dtype=np.int64)
+        np.cumsum(allowed.sum(axis=1), out=self.indptr[1:])
+        self.components = None
+
+    def labelComponents(self):
+        """
+        Labels the connected parts of the graph by hooking the larger label
+        of the two ends of every move onto the smaller one and then following the
+        labels to their roots, until every move joins equal labels. The
+        number of labels at least halves with each pass.
+
+        Returns:
+            ndarray: The smallest id of the part each id is in.
+        """
+        # Moves go both ways, so the moves right and down are enough, and
+        # without corner cutting a diagonal move needs both of those too
+        forward = [(1, 0), (0, 1)]
+        if self.cornerCutting:
+            forward += [(1, 1), (-1, 1)]
+        sources, targets = [], []
+        for dx, dy in forward:
+            ys, xs = np.nonzero(self.moves[DIRECTIONS.index((dx, dy))])
+            sources.append(self.ids[ys, xs])
+            targets.append(self.ids[ys + dy, xs + dx])
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        labels = np.arange(self.flat.size)
+        while sources.size:
+            first, second = labels[sources], labels[targets]
+            apart = first != second
+            if not apart.any():
+                break
+            sources, targets = sources[apart], targets[apart]
+            first, second = first[apart], second[apart]
+            np.minimum.at(
+                labels, np.maximum(first, second), np.minimum(first, second)
+            )
+            while True:
+                roots = labels[labels]
+                if np.array_equal(roots, labels):
+                    break
+                labels = roots
+        return labels
+
+    def connected(self, start, goal):
+        """
+        Checks whether a route between two tiles may exist, going around
+        walls only.
+
+        Returns:
+            bool: False if both tiles are in the graph but in parts of it
+                  no move joins, True otherwise.
+        """
+        startId, goalId = self.tileId(*start), self.tileId(*goal)
+        if startId < 0 or goalId < 0:
+            return True
+        if self.components is None:
+            self.components = self.labelComponents()
+        return self.components[startId] == self.components[goalId]
+
+    def __len__(self):
+        """Returns the number of tiles in the graph."""
+        return self.flat.size
+
+    def __contains__(self, tile):
+        """Checks whether a tile is in the graph."""
+        return self.tileId(*tile) >= 0
+
+    def tileId(self, x, y):
+        """
+        Returns:
+            int: The id of a tile, or -1 for walls and tiles outside the
+                 map.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.ids[y, x])
+        return -1
+
+    def tileOf(self, tileId):
+        """
+        Returns:
+            tuple: The (x, y) tile of an id.
+        """
+        y, x = divmod(int(self.flat[tileId]), self.width)
+        return x, y
+
+    def tiles(self):
+        """
+        Returns:
+            list: (x, y) tuples of every tile, in id order.
+        """
+        ys, xs = np.divmod(self.flat, self.width)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def neighbours(self, tileId):
+        """
+        Returns:
+            list: The ids of the tiles a tile can move to.
+        """
+        return self.indices[
+            self.indptr[tileId]:self.indptr[tileId + 1]
+        ].tolist()
+
+    def neighbourTiles(self, x, y):
+        """
+        Returns:
+            list: The (x, y) tiles a tile can move to.
+        """
+        tileId = self.tileId(x, y)
+        if tileId < 0:
+            return []
+        return [self.tileOf(nextId) for nextId in self.neighbours(tileId)]
+
+    def canMove(self, start, end):
+        """
+        Checks whether a single move between two neighbouring tiles is
+        allowed.
+
+        Returns:
+            bool: True if the move is allowed.
+        """
+        x, y = start
+        direction = DIRECTIONS.index((end[0] - x, end[1] - y))
+        return 0 <= x < self.width and 0 <= y < self.height and \
+            bool(self.moves[direction, y, x])
+
+    def blockedMask(self, tiles):
+        """
+        Returns:
+            ndarray: A boolean array over the ids that is set for the given
+                     tiles.
+        """
+        mask = np.zeros(self.flat.size, dtype=bool)
+        ids = [self.tileId(x, y) for x, y in tiles]
+        ids = [tileId for tileId in ids if tileId >= 0]
+        mask[ids] = True
+        return mask
+
+    def expand(self, frontier):
+        """
+        Lists the neighbours of a set of tiles.
+
+        Args:
+            frontier (ndarray): Ids of the tiles.
+
+        Returns:
+            tuple: The ids of the neighbours and the id of the tile each
+                   one is a neighbour of, tile by tile in frontier order.
+        """
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        owners = np.repeat(frontier, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        return self.indices[np.repeat(starts, counts) + offsets], owners
+
+    def search(self, start, goal, blocked=()):
+        """
+        Runs a breadth-first search from the start until the goal is found.
+        A whole level of the search is expanded at once, and tiles found
+        by several tiles of a level keep the first one, so the result is
+        the same as that of a search one tile at a time.
+
+        Args:
+            start (tuple): The tile to start from.
+            goal (tuple): The tile to find.
+            blocked (set): Tiles that may not be walked onto.
+
+        Returns:
+            ndarray: The id each tile was reached from, -1 for the start
+                     and -2 for tiles that were not reached.
+        """
+        parents = np.full(self.flat.size, -2, dtype=np.int64)
+        startId, goalId = self.tileId(*start), self.tileId(*goal)
+        if startId < 0:
+            return parents
+        closed = self.blockedMask(blocked)
+        first = np.empty(self.flat.size, dtype=np.int64)
+        parents[startId] = -1
+        closed[startId] = True
+        frontier = np.array([startId])
+        while frontier.size and (goalId < 0 or parents[goalId] == -2):
+            candidates, owners = self.expand(frontier)
+            fresh = ~closed[candidates]
+            candidates, owners = candidates[fresh], owners[fresh]
+            # Keep the first tile to reach each new tile, in the order they
+            # were reached. Written in reverse, the last write of a
+            # repeated index is its first occurrence.
+            positions = np.arange(candidates.size)
+            first[candidates[::-1]] = positions[::-1]
+            keep = first[candidates] == positions
+            frontier = candidates[keep]
+            parents[frontier] = owners[keep]
+            closed[frontier] = True
+        return parents
+
+    def traceRoute(self, parents, start, goal):
+        """
+        Follows the results of a search back from the goal.
+
+        Returns:
+            list: The tiles of the route after the start, ending with the
+                  goal, or None if the search did not reach the goal.
+        """
+        goalId = self.tileId(*goal)
+        if goalId < 0 or parents[goalId] == -2:
+            return None
+        if start == goal:
+            return [goal]
+        route = [goalId]
+        step = int(parents[goalId])
+        while step >= 0 and self.tileOf(step) != start:
+            route.append(step)
+            step = int(parents[step])
+        return [self.tileOf(tileId) for tileId in reversed(route)]
+
+    def distances(self, goal, radius):
+        """
+        Counts the moves from every tile within a number of moves to a goal.
+
+        Args:
+            goal (tuple): The tile to count from.
+            radius (int): The most moves to count.
+
+        Returns:
+            ndarray: The number of moves of each id, -1 for tiles farther
+                     than radius or not reached.
+        """
+        distances = np.full(self.flat.size, -1, dtype=np.int32)
+        goalId = self.tileId(*goal)
+        if goalId < 0:
+            return distances
+        distances[goalId] = 0
+        frontier = np.array([goalId])
+        for distance in range(1, radius + 1):
+            candidates, _ = self.expand(frontier)
+            candidates = candidates[distances[candidates] < 0]
+            if not candidates.size:
+                break
+            frontier = np.unique(candidates)
+            distances[frontier] = distance
+        return distances
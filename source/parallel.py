@@ -0,0 +1,244 @@
+import pygame as pg
+import numpy as np
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from source.settings import *
+from source.raycasting import RayCasting
+from source.camera import CameraTables
+from source.framebuffer import FramebufferRenderer
+
+
+def attachArrays(specs):
+    """
+    Attaches to the shared memory blocks described by specs and views
+    each of them as a NumPy array.
+
+    Args:
+        specs (dict): Maps array names to (block name, shape, dtype).
+
+    Returns:
+        tuple: The attached SharedMemory blocks and a dict of the arrays.
+    """
+    blocks, arrays = [], {}
+    for key, (name, shape, dtype) in specs.items():
+        block = SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def renderBand(connection, specs):
+    """
+    Worker process loop. For every frame request it casts the rays of its
+    band of screen columns and writes the sky, floor and wall texels of
+    those columns into the shared framebuffer, along with the per-ray
+    results the main process needs to depth-test the sprites.
+
+    Args:
+        connection (Connection): Pipe to the main process. A None message
+                                 ends the loop.
+        specs (dict): Shared arrays to attach to, see attachArrays.
+    """
+    blocks, arrays = attachArrays(specs)
+    grid = arrays['grid']
+    framebuffer = arrays['framebuffer']
+    rows = np.arange(HEIGHT, dtype=np.float32) - HALF_HEIGHT
+    textureArrays = {}
+    cameras = {}
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        position, angle, skyDisplacement, numbRays, first, last = message
+        scale = WIDTH // numbRays
+        if scale not in textureArrays:
+            textureArrays[scale] = FramebufferRenderer.packTexels(
+                arrays['textures'], scale
+            )
+
+        if numbRays not in cameras:
+            cameras[numbRays] = CameraTables(numbRays)
+        camera = cameras[numbRays]
+        raySin, rayCos = camera.rayDirections(angle)
+        depth, projectionHeight, texture, displacement = \
+            RayCasting.castRays(
+                grid, position, raySin[first:last], rayCos[first:last],
+                camera.fisheye[first:last]
+            )
+        arrays['depths'][first:last] = depth
+        arrays['projectionHeights'][first:last] = projectionHeight
+        arrays['textureIds'][first:last] = texture
+        arrays['textureOffsets'][first:last] = displacement
+
+        # The last band also covers the columns right of the last ray
+        end = WIDTH if last == numbRays else last * scale
+        FramebufferRenderer.fillBackground(
+            framebuffer[:, first * scale:end],
+            arrays['sky'],
+            np.arange(first * scale, end),
+            skyDisplacement,
+            int(arrays['ground'][0])
+        )
+        band = framebuffer[:, first * scale:last * scale]
+        FramebufferRenderer.fillColumns(
+            band.view(np.dtype((np.void, 4 * scale))),
+            textureArrays[scale],
+            rows,
+            projectionHeight,
+            texture,
+            displacement,
+            scale
+        )
+        connection.send(True)
+
+    for block in blocks:
+        block.close()
+
+
+class ParallelWallRenderer:
+    """
+    The ParallelWallRenderer class splits the screen's ray columns into
+    bands and has a pool of worker processes raycast and fill their band
+    into a shared-memory framebuffer. The main process then presents the
+    whole framebuffer with a single blit.
+
+    The map grid and texture pixels are copied into shared memory once and
+    only read by the workers, so nothing but the player's pose has to be
+    sent to them each frame. Tiles changed while playing are written into
+    the shared grid between frames.
+
+    Attributes:
+        game (Game): Reference to the main game instance.
+        workers (int): Number of worker processes.
+        blocks (dict): The shared memory blocks by array name.
+        arrays (dict): NumPy views of the shared memory blocks.
+        connections (list): Pipes to the worker processes.
+        processes (list): The worker processes.
+    """
+
+    def __init__(self, game, renderer, workers=WALL_WORKERS):
+        """
+        Copies the map grid, wall textures and sky into shared memory and
+        starts the worker processes.
+
+        Args:
+            game (Game): A reference to the main game object.
+            renderer (Renderer): The renderer owning the textures.
+            workers (int): Number of worker processes.
+        """
+        self.game = game
+        self.workers = workers
+        self.blocks = {}
+        self.arrays = {}
+        screen = game.screen
+
+        self.share('grid', game.map.grid)
+        self.share(
+            'textures',
+            renderer.framebuffer.loadTexturePixels(renderer.wallTextures)
+        )
+        self.share(
+            'sky',
+            pg.surfarray.array2d(renderer.skyTexture.convert(screen)).T
+        )
+        self.share('ground', np.array([screen.map_rgb(GROUND_COLOR)],
+                                      dtype=np.uint32))
+        self.share('framebuffer', np.zeros((HEIGHT, WIDTH), dtype=np.uint32))
+        self.share('depths', np.zeros(WIDTH))
+        self.share('projectionHeights', np.zeros(WIDTH))
+        self.share('textureIds', np.zeros(WIDTH, dtype=np.uint8))
+        self.share('textureOffsets', np.zeros(WIDTH))
+
+        specs = {
+            key: (self.blocks[key].name, array.shape, array.dtype)
+            for key, array in self.arrays.items()
+        }
+        context = multiprocessing.get_context('spawn')
+        self.connections = []
+        self.processes = []
+        for _ in range(workers):
+            connection, childConnection = context.Pipe()
+            process = context.Process(
+                target=renderBand,
+                args=(childConnection, specs),
+                daemon=True
+            )
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def share(self, key, array):
+        """
+        Copies an array into a new shared memory block.
+
+        Args:
+            key (str): Name the array is stored under.
+            array (ndarray): The array to share.
+        """
+        block = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        self.blocks[key] = block
+        self.arrays[key] = shared
+
+    def updateTile(self, x, y, value):
+        """
+        Changes a tile of the shared grid. The workers are idle between
+        frames, so the next frame is drawn with the new tile.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+            value (int): The wall texture id, or zero for empty space.
+        """
+        self.arrays['grid'][y, x] = value
+
+    def render(self):
+        """
+        Has the workers raycast and fill their bands for the current player
+        pose, waits for all of them, and copies the per-ray results into
+        the raycaster so the sprites can be depth-tested against them.
+        """
+        raycasting = self.game.raycasting
+        player = self.game.player
+        numbRays = raycasting.numbRays
+        skyDisplacement = self.game.renderer.moveSky()
+
+        bands = np.linspace(0, numbRays, self.workers + 1).astype(int)
+        for connection, first, last in zip(
+                self.connections, bands[:-1], bands[1:]
+        ):
+            connection.send((
+                player.position, player.angle, skyDisplacement,
+                numbRays, int(first), int(last)
+            ))
+        for connection in self.connections:
+            connection.recv()
+
+        arrays = self.arrays
+        raycasting.depthBuffer = arrays['depths'][:numbRays].copy()
+        raycasting.projectionHeights = \
+            arrays['projectionHeights'][:numbRays].copy()
+        raycasting.textureIds = arrays['textureIds'][:numbRays].copy()
+        raycasting.textureOffsets = arrays['textureOffsets'][:numbRays].copy()
+
+    def present(self):
+        """Blits the shared framebuffer onto the screen."""
+        pg.surfarray.blit_array(self.game.screen, self.arrays['framebuffer'].T)
+
+    def close(self):
+        """Stops the worker processes and frees the shared memory."""
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=1)
+        self.connections, self.processes = [], []
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
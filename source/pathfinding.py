@@ -1,5 +1,9 @@
-from collections import deque
-from functools import lru_cache
+from source.settings import *
+from source.profiler import profiled
+from source.routecache import RouteCache
+from source.navgraph import NavGraph
+from source.hierarchical import HierarchicalPathFinder
+from source.pathworker import PathWorker
 
 
 class PathFinding:
@@ -11,12 +15,26 @@ class PathFinding:
 
     Core Attributes:
         game (Game): A reference to the main game instance.
-        map (list): A 2D grid representing the game map layout.
-        routes (list): Possible directions for movement, including
-                       diagonals.
-        graph (dict): Graph representation of the map where nodes
-                      are tiles, and edges represent possible
-                      movement directions.
+        map (Map): The game map, queried through its dense grid.
+        graph (NavGraph): Graph of the map in compressed sparse row form,
+                          where nodes are the ids of empty tiles and
+                          edges the moves allowed between them.
+        mode (str): 'FlowField' to route every enemy along one shared
+                    distance field from the goal, 'Search' to search
+                    from each enemy, or 'Hierarchical' to plan over
+                    clusters of tiles for large maps.
+        flowRadius (int): Number of steps the distance field reaches.
+        flowGoal (tuple): The tile the distance field leads to.
+        flowField (ndarray): Number of steps to flowGoal by tile id, -1
+                             for tiles more than flowRadius steps away.
+        routeCache (RouteCache): Routes found by searching, kept until
+                                 enemies block them or the map changes.
+        hierarchy (HierarchicalPathFinder): The cluster planner used by
+                                            the 'Hierarchical' mode.
+        worker (PathWorker): The thread searches and plans are handed to,
+                             or None to run them during the frame.
+        arrived (dict): Goals to head straight for, by (start, goal), for
+                        requests the worker found no route for.
     """
 
     def __init__(self, game):
@@ -26,13 +44,16 @@ class PathFinding:
         movement.
         """
         self.game = game
-        self.map = game.map.map
-        self.routes = [
-                [-1, 0], [0, -1], [1, 0], [0, 1],
-                [-1, -1], [1, -1], [1, 1], [-1, 1]
-        ]
-        self.graph = {}
+        self.map = game.map
         self.constructGraph()
+        self.mode = PATH_FINDING_MODE
+        self.flowRadius = FLOW_FIELD_RADIUS
+        self.flowGoal = None
+        self.flowField = None
+        self.routeCache = RouteCache()
+        self.hierarchy = HierarchicalPathFinder(self.map, self.graph)
+        self.worker = PathWorker(self) if PATH_WORKER else None
+        self.arrived = {}
 
     def constructGraph(self):
         """
@@ -40,56 +61,217 @@ class PathFinding:
         walkable tile is a node, and edges connect adjacent,
         accessible tiles.
         """
-        for y, row in enumerate(self.map):
-            for x, col in enumerate(row):
-                if not col:
-                    self.graph[(x, y)] = self.graph.get((x, y), [])\
-                            + self.getNextTile(x, y)
+        self.graph = NavGraph(self.map.grid)
 
     def getNextTile(self, x, y):
         """
         Identifies and returns the valid adjacent tiles for a given
         position (x, y).
         """
-        nextTilesList = []
-        for dx, dy in self.routes:
-            nextPosition = (x + dx, y + dy)
-            if nextPosition not in self.game.map.gameWorld:
-                nextTilesList.append(nextPosition)
-        return nextTilesList
+        return self.graph.neighbourTiles(x, y)
 
+    @profiled('breadFirstSearch')
     def breadFirstSearch(self, start, goal, graph):
         """
         Implements a breadth-first search algorithm to find the
         shortest path from the start position to the goal within
         the given graph.
         """
-        queue = deque([start])
-        visitedTiles = {start: None}
-        while queue:
-            currentTile = queue.popleft()
-            if currentTile == goal:
-                break
-            nextTiles = graph[currentTile]
-            for nextTile in nextTiles:
-                if nextTile not in visitedTiles and nextTile not in \
-                        self.game.spriteManager.enemyPositions:
-                    queue.append(nextTile)
-                    visitedTiles[nextTile] = currentTile
-        return visitedTiles
-
-    @lru_cache
-    def getRoute(self, start, goal):
+        return self.searchGraph(
+            graph, start, goal, self.game.spriteManager.enemyHash.occupied
+        )
+
+    @staticmethod
+    def searchGraph(graph, start, goal, blocked):
+        """
+        Runs the breadth-first search without touching the game, so that it
+        can also run on the path worker's thread.
+
+        Args:
+            graph (NavGraph): The graph to search.
+            start (tuple): The tile to start from.
+            goal (tuple): The tile to reach.
+            blocked (set): Tiles that may not be walked onto.
+
+        Returns:
+            ndarray: The id each tile id was reached from, see
+                     NavGraph.search.
+        """
+        return graph.search(start, goal, blocked)
+
+    def getRoute(self, start, goal, owner=None):
+        """
+        Returns the next tile to move to on the way from the start to the
+        goal, using the distance field or a search depending on the mode.
+        While the path worker is still busy with a route this returns None,
+        and the enemy keeps to its last route. The enemy asking is passed
+        on to the path worker, which drops the route it asked for before
+        if nobody else needs it.
+        """
+        if start == goal:
+            return goal
+        if self.mode == 'FlowField':
+            return self.getFlowRoute(start, goal, owner)
+        if self.mode == 'Hierarchical':
+            return self.getHierarchicalRoute(start, goal, owner)
+        return self.getSearchRoute(start, goal, owner)
+
+    @profiled('buildFlowField')
+    def buildFlowField(self, goal):
+        """
+        Runs a single breadth-first search outwards from the goal over the
+        walls of the map, recording how many steps each tile within
+        flowRadius steps is from the goal. Every enemy heading for the
+        same goal then reads its route from this one field.
+        """
+        self.flowGoal = goal
+        self.flowField = self.graph.distances(goal, self.flowRadius)
+
+    def getFlowRoute(self, start, goal, owner=None):
+        """
+        Returns the neighbour of the start that is closest to the goal on
+        the distance field and not taken by an enemy. The field is only
+        rebuilt when the goal moves to a new tile, and starts beyond its
+        reach fall back to a search. An enemy whose way is blocked by
+        other enemies is given its own tile and waits.
+        """
+        if goal != self.flowGoal:
+            self.buildFlowField(goal)
+        graph = self.graph
+        field = self.flowField
+        startId = graph.tileId(*start)
+        distance = field[startId] if startId >= 0 else -1
+        if distance < 0:
+            return self.getSearchRoute(start, goal, owner)
+        if distance == 0:
+            return goal
+
+        occupied = self.game.spriteManager.enemyHash.occupied
+        nextPosition = start
+        for nextId in graph.neighbours(startId):
+            nextDistance = field[nextId]
+            if 0 <= nextDistance < distance:
+                nextTile = graph.tileOf(nextId)
+                if nextTile not in occupied:
+                    nextPosition, distance = nextTile, nextDistance
+        return nextPosition
+
+    def getSearchRoute(self, start, goal, owner=None):
         """
         Computes and returns the next position in the optimal path from
         the start to the goal using the results of the breadth-first
-        search algorithm.
+        search algorithm. Routes that reach the goal are cached, routes
+        that do not are searched again next time, as a way may open up.
+        Goals walled off from the start are not searched at all.
         """
+        nextPosition = self.routeCache.get(start, goal)
+        if nextPosition is not None:
+            return nextPosition
+        if not self.graph.connected(start, goal):
+            return goal
+        if self.worker is not None:
+            return self.requestRoute('Search', start, goal, owner)
+
         self.visited = self.breadFirstSearch(start, goal, self.graph)
-        path = [goal]
-        step = self.visited.get(goal, start)
+        route = self.graph.traceRoute(self.visited, start, goal)
+        if route is None:
+            return goal
+        self.routeCache.put(start, goal, route[0], route)
+        return route[0]
+
+    @profiled('getHierarchicalRoute')
+    def getHierarchicalRoute(self, start, goal, owner=None):
+        """
+        Returns the next position on the way from the start to the goal as
+        planned over the clusters of the map. Routes are cached like those
+        of the search, and goals walled off from the start are not planned
+        at all. When the planner finds no route the goal is returned like
+        after a search: the planner only avoids enemies near the start, so
+        a search avoiding all of them could not find one either.
+        """
+        nextPosition = self.routeCache.get(start, goal)
+        if nextPosition is not None:
+            return nextPosition
+        if not self.graph.connected(start, goal):
+            return goal
+        if self.worker is not None:
+            return self.requestRoute('Hierarchical', start, goal, owner)
+        hop = self.hierarchy.findRoute(
+            start, goal, self.game.spriteManager.enemyHash.occupied
+        )
+        if hop is None:
+            return goal
+        self.routeCache.put(start, goal, hop[0], hop)
+        return hop[0]
+
+    def requestRoute(self, mode, start, goal, owner=None):
+        """
+        Asks the path worker for a route on behalf of an enemy, unless it
+        already found there is none, in which case the goal is returned
+        like after a search.
+
+        Returns:
+            tuple: The goal if there is no route, otherwise None.
+        """
+        goalTile = self.arrived.pop((start, goal), None)
+        if goalTile is not None:
+            return goalTile
+        self.worker.request(
+            mode, start, goal, self.game.spriteManager.enemyHash.share(),
+            owner
+        )
+        return None
+
+    @profiled('collectRoutes')
+    def collectRoutes(self):
+        """
+        Takes in the routes the path worker finished, within its per-frame
+        budget. Routes through tiles enemies have moved onto since they
+        were requested are dropped and asked for again. Every route is
+        also cached from the tiles along its start, so an enemy following
+        it finds its next step cached on each tile it reaches.
+        """
+        if self.worker is None:
+            return
+        occupied = self.game.spriteManager.enemyHash.occupied
+        for start, goal, route in self.worker.collect():
+            if route is None:
+                self.arrived[(start, goal)] = goal
+            elif occupied.isdisjoint(route):
+                starts = [start] + route[:PATH_WORKER_SUFFIXES - 1]
+                for i, tile in enumerate(starts[:len(route)]):
+                    self.routeCache.put(tile, goal, route[i], route[i:])
+
+    def occupyTiles(self, tiles):
+        """
+        Drops the cached routes that run through tiles enemies have moved
+        onto.
+
+        Args:
+            tiles (set): The tiles newly taken by enemies.
+        """
+        self.routeCache.invalidateTiles(tiles)
+
+    def updateTile(self, x, y):
+        """
+        Rebuilds the graph after a tile of the map changed, and drops every
+        cached route and the distance field, as any of them may now run
+        through a wall or miss a shorter way.
+
+        Args:
+            x (int): X coordinate of the changed tile.
+            y (int): Y coordinate of the changed tile.
+        """
+        self.graph.build(self.map.grid)
+        self.routeCache.clear()
+        self.flowGoal = None
+        self.hierarchy.updateTile(x, y)
+        self.arrived.clear()
+        if self.worker is not None:
+            self.worker.updateTile(x, y)
 
-        while step and step != start:
-            path.append(step)
-            step = self.visited[step]
-        return path[-1]
+    def close(self):
+        """Stops the path worker, so that routes are found during the frame."""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
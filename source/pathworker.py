@@ -0,0 +1,203 @@
+import copy
+import time
+import queue
+import threading
+from source.settings import *
+from source.hierarchical import HierarchicalPathFinder
+
+
+class PathWorker:
+    """
+    The PathWorker class answers route requests on a background thread, so
+    that a burst of requests does not stall the frame that made them. The
+    thread holds its own copy of the path finding graph and its own cluster
+    planner, which are only changed through messages on the request queue,
+    so it never shares mutable state with the game loop. The copy starts
+    out sharing the arrays of the game's graph, which are replaced rather
+    than changed when the graph is rebuilt.
+
+    Requests for a start and goal that are already queued are dropped, and
+    finished routes are handed back to the game loop only for as long as
+    the per-frame budget allows, the rest waiting for the next frame. A
+    request is cancelled when every enemy waiting for it has asked for
+    another route since, for example after moving on or when the player
+    left the goal, and the thread skips it.
+
+    Attributes:
+        pathfinding (PathFinding): The path finding the requests come from.
+        graph (NavGraph): The thread's copy of the path finding graph.
+        hierarchy (HierarchicalPathFinder): The thread's cluster planner.
+        budget (float): Milliseconds per frame spent taking in routes.
+        requests (SimpleQueue): Messages for the thread.
+        results (SimpleQueue): Finished routes for the game loop.
+        pending (dict): Cancel flags of the (start, goal) pairs requested
+                        and not yet collected.
+        waiting (dict): Sets of the enemies waiting for each pending pair,
+                        None standing for a caller that cannot cancel.
+        asked (dict): The pair each enemy asked for last.
+        generation (int): Number of map changes, routes found before the
+                          latest change are thrown away.
+        requested, deduplicated, superseded, collected (int): Counters of
+            requests queued, dropped as duplicates and cancelled, and of
+            routes taken in.
+    """
+
+    def __init__(self, pathfinding, budget=PATH_WORKER_BUDGET):
+        """
+        Copies the graph and starts the thread.
+
+        Args:
+            pathfinding (PathFinding): The path finding to answer for.
+            budget (float): Milliseconds per frame spent taking in routes.
+        """
+        self.pathfinding = pathfinding
+        self.graph = copy.copy(pathfinding.graph)
+        self.hierarchy = HierarchicalPathFinder(pathfinding.map, self.graph)
+        self.budget = budget
+        self.requests = queue.SimpleQueue()
+        self.results = queue.SimpleQueue()
+        self.pending = {}
+        self.waiting = {}
+        self.asked = {}
+        self.generation = 0
+        self.requested = 0
+        self.deduplicated = 0
+        self.superseded = 0
+        self.collected = 0
+        self.thread = threading.Thread(
+            target=self.run, name='PathWorker', daemon=True
+        )
+        self.thread.start()
+
+    def request(self, mode, start, goal, blocked, owner=None):
+        """
+        Queues a route request unless the same one is already queued, and
+        cancels the request the owner made before if it asked for another
+        route and nobody else is waiting for it.
+
+        Args:
+            mode (str): 'Search' or 'Hierarchical'.
+            start (tuple): The tile to start from.
+            goal (tuple): The tile to reach.
+            blocked (set): Tiles taken by enemies. The set is not changed
+                           after it is handed over.
+            owner (Enemy): The enemy asking, or None if the request should
+                           never be cancelled.
+        """
+        key = (start, goal)
+        if owner is not None:
+            previous = self.asked.get(owner)
+            if previous is not None and previous != key:
+                self.release(owner, previous)
+            self.asked[owner] = key
+        self.waiting.setdefault(key, set()).add(owner)
+        if key in self.pending:
+            self.deduplicated += 1
+            return
+        cancelled = threading.Event()
+        self.pending[key] = cancelled
+        self.requested += 1
+        self.requests.put(
+            ('route', self.generation, mode, start, goal, blocked, cancelled)
+        )
+
+    def release(self, owner, key):
+        """
+        Stops an enemy waiting for a request, and cancels the request if
+        nobody is waiting for it any more.
+
+        Args:
+            owner (Enemy): The enemy.
+            key (tuple): The (start, goal) pair it was waiting for.
+        """
+        waiting = self.waiting.get(key)
+        if waiting is None:
+            return
+        waiting.discard(owner)
+        if not waiting:
+            del self.waiting[key]
+            cancelled = self.pending.pop(key, None)
+            if cancelled is not None:
+                cancelled.set()
+                self.superseded += 1
+
+    def updateTile(self, x, y):
+        """
+        Passes a changed tile on to the thread and discards the routes
+        requested before it.
+
+        Args:
+            x (int): X coordinate of the changed tile.
+            y (int): Y coordinate of the changed tile.
+        """
+        self.generation += 1
+        for cancelled in self.pending.values():
+            cancelled.set()
+        self.pending.clear()
+        self.waiting.clear()
+        self.asked.clear()
+        self.requests.put(('tile', x, y))
+
+    def collect(self):
+        """
+        Takes in finished routes until none are left or the budget of the
+        frame is spent.
+
+        Returns:
+            list: (start, goal, route) tuples, where route lists the tiles
+                  after the start and is None if the goal was not reached.
+        """
+        deadline = time.perf_counter() + self.budget / 1000
+        routes = []
+        while True:
+            try:
+                generation, start, goal, route = self.results.get_nowait()
+            except queue.Empty:
+                break
+            # Requests of older generations were already let go
+            if generation == self.generation:
+                key = (start, goal)
+                self.pending.pop(key, None)
+                for owner in self.waiting.pop(key, ()):
+                    if self.asked.get(owner) == key:
+                        del self.asked[owner]
+                routes.append((start, goal, route))
+                self.collected += 1
+            if time.perf_counter() >= deadline:
+                break
+        return routes
+
+    def run(self):
+        """Answers messages until it is told to stop."""
+        pathfinding = self.pathfinding
+        while True:
+            message = self.requests.get()
+            if message is None:
+                return
+            if message[0] == 'tile':
+                _, x, y = message
+                self.graph.build(pathfinding.map.grid)
+                self.hierarchy.updateTile(x, y)
+                continue
+
+            _, generation, mode, start, goal, blocked, cancelled = message
+            if cancelled.is_set():
+                continue
+            if not self.graph.connected(start, goal):
+                # Walled off, neither the planner nor a search can get there
+                route = None
+            elif mode == 'Hierarchical':
+                # The planner only avoids enemies near the start, a search
+                # avoiding all of them would not find a route either
+                route = self.hierarchy.findRoute(start, goal, blocked)
+            else:
+                visited = pathfinding.searchGraph(
+                    self.graph, start, goal, blocked
+                )
+                route = self.graph.traceRoute(visited, start, goal)
+            self.results.put((generation, start, goal, route))
+
+    def close(self):
+        """Stops the thread."""
+        self.requests.put(None)
+        self.thread.join()
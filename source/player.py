@@ -23,14 +23,15 @@ class Player:
     def __init__(self, game):
         """
         Initializes the Player instance, setting its position, angle, health,
-        and input-related attributes.
+        and input-related attributes. The player starts where the level
+        file places them.
 
         Args:
             game (Game): A reference to the main game instance.
         """
         self.game = game
-        self.x, self.y = PLAYER_POSITION
-        self.angle = PLAYER_ANGLE
+        self.x, self.y = game.map.level.playerPosition
+        self.angle = game.map.level.playerAngle
         self.health = PLAYER_MAX_HEALTH
         self.relativePosition = 0
         self.fire = False
@@ -42,10 +43,10 @@ class Player:
         Handles movement controls for the player. Movement speed is scaled
         by deltaTime to ensure consistency across frame rates. Players can
         move in all four cardinal directions (WASD) and rotate if rotation
-        keys are enabled.
+        keys are enabled. The sine and cosine of the heading are looked up
+        in the camera tables.
         """
-        angleSin = math.sin(self.angle)
-        angleCos = math.cos(self.angle)
+        angleSin, angleCos = self.game.raycasting.camera.heading(self.angle)
         px, py = 0, 0
         speed = PLAYER_SPEED * self.sprintMultiplier * self.game.deltaTime
         speedSin = speed * angleSin
@@ -116,10 +117,10 @@ class Player:
     def checkGame(self):
         """
         Checks whether the player's health has fallen below one. If so,
-        the game is considered over, and the game over screen is displayed.
+        the game is considered over, and the game over screen is displayed
+        from the next frame on.
         """
         if self.health < 1:
-            self.game.renderer.drawGameOver()
             self.game.active = False
             self.game.gameOver = True
 
@@ -143,7 +144,7 @@ class Player:
         Checks if the given coordinates (x, y) are within the boundaries of
         the game's world and are not occupied by a wall.
         """
-        return (x, y) not in self.game.map.gameWorld
+        return not self.game.map.isWall(x, y)
 
     def mouseControl(self):
         """
@@ -0,0 +1,241 @@
+import pygame as pg
+import csv
+import cProfile
+import functools
+from time import perf_counter, strftime
+from collections import deque
+from source.settings import *
+
+
+class Span:
+    """
+    A timing span used as a context manager. The time spent inside the
+    with block is added to the profiler's current frame under its name.
+    """
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        """Creates a span recording into the given profiler."""
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        """Starts the span."""
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        """Stops the span and records its duration."""
+        self.profiler.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    The Profiler class collects per-frame timings of the game loop. Each
+    stage of the frame and the hot methods record named timing spans, and
+    the totals of every frame are kept in a ring buffer. The recent frame
+    times can be shown as an on-screen graph, dumped to CSV on exit, and the
+    next few frames can be captured with cProfile on demand.
+
+    Attributes:
+        game (Game): Reference to the main game instance.
+        enabled (bool): Whether spans are recorded at all.
+        samples (deque): Ring buffer of (frame, frame time, spans) tuples
+                         with the times in milliseconds.
+        current (dict): Span totals in seconds of the frame in progress.
+        frameNumber (int): Number of the frame in progress.
+        showGraph (bool): Whether the frame-time graph is drawn.
+        captureFrames (int): Frames left in the running cProfile capture.
+    """
+
+    def __init__(self, game, history=PROFILER_HISTORY):
+        """
+        Initializes the profiler with an empty ring buffer.
+
+        Args:
+            game (Game): A reference to the main game object.
+            history (int): Number of frames kept in the ring buffer.
+        """
+        self.game = game
+        self.enabled = PROFILER_ENABLED
+        self.samples = deque(maxlen=history)
+        self.names = []
+        self.current = {}
+        self.frameNumber = 0
+        self.frameStart = perf_counter()
+        self.showGraph = False
+        self.captureFrames = 0
+        self.capture = None
+        self.capturePath = None
+        self.font = None
+
+    def span(self, name):
+        """
+        Returns a timing span context manager for the named stage.
+
+        Args:
+            name (str): Name of the stage being timed.
+        """
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        """
+        Adds a duration to the named span of the current frame. A span that
+        runs several times in a frame, such as a per-enemy method, adds up.
+
+        Args:
+            name (str): Name of the span.
+            seconds (float): Duration to add in seconds.
+        """
+        if self.enabled:
+            self.current[name] = self.current.get(name, 0) + seconds
+
+    def beginFrame(self):
+        """Starts timing a new frame."""
+        self.current = {}
+        self.frameStart = perf_counter()
+        if self.captureFrames and self.capture is None:
+            self.capture = cProfile.Profile()
+            self.capture.enable()
+
+    def endFrame(self):
+        """
+        Finishes the current frame and pushes its frame time and spans in
+        milliseconds into the ring buffer.
+        """
+        frameTime = (perf_counter() - self.frameStart) * 1000
+        if self.enabled:
+            spans = {name: t * 1000 for name, t in self.current.items()}
+            for name in spans:
+                if name not in self.names:
+                    self.names.append(name)
+            self.samples.append((self.frameNumber, frameTime, spans))
+        self.frameNumber += 1
+
+        if self.capture is not None:
+            self.captureFrames -= 1
+            if self.captureFrames <= 0:
+                self.capture.disable()
+                self.capture.dump_stats(self.capturePath)
+                self.capture = None
+
+    def startCapture(self, frames=PROFILER_CAPTURE_FRAMES, path=None):
+        """
+        Captures the next frames with cProfile and writes the stats to a
+        file once they have run.
+
+        Args:
+            frames (int): Number of frames to capture.
+            path (str): File the stats are written to. Defaults to a
+                        timestamped file name.
+        """
+        if self.capture is None:
+            self.captureFrames = frames
+            self.capturePath = path or strftime('profile_%Y%m%d_%H%M%S.prof')
+
+    def handleEvent(self, event):
+        """
+        Handles the profiler hotkeys: toggling the frame-time graph and
+        starting a cProfile capture.
+
+        Args:
+            event (Event): The pygame event to handle.
+        """
+        if event.type != pg.KEYDOWN:
+            return
+        if event.key == PROFILER_GRAPH_KEY:
+            self.showGraph = not self.showGraph
+        elif event.key == PROFILER_CAPTURE_KEY:
+            self.startCapture()
+
+    def draw(self):
+        """
+        Draws the frame-time graph of the frames in the ring buffer, with a
+        line marking the frame budget and the averages of the slowest spans.
+        """
+        if not self.showGraph or not self.samples:
+            return
+        if self.font is None:
+            self.font = pg.font.Font(None, 22)
+
+        screen = self.game.screen
+        width, height = 2 * min(len(self.samples), 300), 120
+        left, top = 20, HEIGHT - height - 20
+        budget = 1000 / FPS
+        scale = height / (3 * budget)
+        pg.draw.rect(screen, (0, 0, 0), (left, top, 600, height))
+
+        samples = list(self.samples)[-width // 2:]
+        for i, (_, frameTime, _) in enumerate(samples):
+            barHeight = min(frameTime * scale, height)
+            color = 'green' if frameTime <= budget else \
+                'yellow' if frameTime <= 2 * budget else 'red'
+            pg.draw.line(
+                screen, color,
+                (left + 2 * i, top + height),
+                (left + 2 * i, top + height - barHeight),
+                2
+            )
+        pg.draw.line(
+            screen, 'white',
+            (left, top + height - budget * scale),
+            (left + 600, top + height - budget * scale)
+        )
+
+        averages = {
+            name: sum(spans.get(name, 0) for _, _, spans in samples)
+            / len(samples)
+            for name in self.names
+        }
+        slowest = sorted(averages.items(), key=lambda a: a[1], reverse=True)
+        lines = [f'frame {samples[-1][1]:.1f} ms'] + [
+            f'{name} {value:.2f} ms' for name, value in slowest[:5]
+        ]
+        for i, line in enumerate(lines):
+            text = self.font.render(line, True, 'white')
+            screen.blit(text, (left + 610, top + 20 * i))
+
+    def dumpCsv(self, path=PROFILER_CSV_PATH):
+        """
+        Writes the frames in the ring buffer to a CSV file, one row per
+        frame with a column per span.
+
+        Args:
+            path (str): The CSV file to write.
+        """
+        if not path or not self.samples:
+            return
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'frame_ms'] + self.names)
+            for frame, frameTime, spans in self.samples:
+                writer.writerow(
+                    [frame, f'{frameTime:.4f}']
+                    + [f'{spans.get(name, 0):.4f}' for name in self.names]
+                )
+
+
+def profiled(name):
+    """
+    Decorator that records every call of a game object's method as a timing
+    span of the game's profiler. The object needs a game attribute.
+
+    Args:
+        name (str): Name of the span.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.game.profiler
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            start = perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                profiler.record(name, perf_counter() - start)
+        return wrapper
+    return decorator
@@ -1,6 +1,10 @@
 import pygame as pg
-import math
+import numpy as np
 from source.settings import *
+from source.wallcache import WallStripCache
+from source.camera import CameraTables
+from source.maps import Map
+from source.profiler import profiled
 
 
 class RayCasting:
@@ -14,10 +18,23 @@ class RayCasting:
         game (Game): Reference to the main game instance.
         rayCastResult (list): Stores the results of each raycast, including
                               depth and texture information.
+        depthBuffer (ndarray): Depth of the wall in each ray column, used
+                               to depth-test sprites against the walls.
+        projectionHeights, textureIds, textureOffsets (ndarray):
+            Per-ray results of the raycaster, one entry per ray.
         objectRenderList (list): Stores the objects (walls) that need to be
                                  rendered on screen.
+        spriteRenderList (list): Stores the projected sprites that need to
+                                 be rendered on screen.
         textures (dict): A dictionary of wall textures used for rendering
                          walls.
+        stripCache (WallStripCache): Cache of scaled wall strips reused
+                                     between frames.
+        numbRays, halfNumbRays (int): Current number of rays and half of it.
+        camera (CameraTables): Ray angle, fisheye and heading tables for
+                               the current number of rays.
+        angleChange (float): Angle between two neighbouring rays.
+        scale (int): Width of each ray in screen columns.
     """
 
     def __init__(self, game):
@@ -31,24 +48,62 @@ class RayCasting:
         self.game = game
         self.rayCastResult = []
         self.objectRenderList = []
+        self.spriteRenderList = []
         self.textures = self.game.renderer.wallTextures
+        self.stripCache = WallStripCache(self.game.renderer.wallColumns)
+        self.setResolution(NUMB_RAYS)
 
+    def setResolution(self, numbRays):
+        """
+        Changes the number of rays cast each frame and with it the width of
+        each screen column. Everything derived from the ray count is rebuilt
+        together: the camera tables, the per-ray result arrays, the
+        renderer's wall columns and framebuffer texels, and the wall strip
+        cache.
+
+        Args:
+            numbRays (int): The new number of rays.
+        """
+        self.numbRays = numbRays
+        self.halfNumbRays = numbRays // 2
+        self.camera = CameraTables(numbRays)
+        self.angleChange = self.camera.angleChange
+        self.scale = WIDTH // numbRays
+        self.rayCastResult = []
+        self.objectRenderList = []
+        self.depthBuffer = np.full(numbRays, np.inf)
+        self.projectionHeights = np.zeros(numbRays)
+        self.textureIds = np.ones(numbRays, dtype=np.uint8)
+        self.textureOffsets = np.zeros(numbRays)
+
+        renderer = self.game.renderer
+        if renderer.scale != self.scale:
+            renderer.setScale(self.scale)
+            self.stripCache.reset(renderer.wallColumns, self.scale)
+
+    @profiled('rayCast')
     def rayCast(self):
         """
         Implements the raycasting logic. For each ray, this method calculates
         the distance to the nearest vertical and horizontal walls, determines
         the wall texture, and adjusts for player movement and viewing angle.
-        The result is used to render 2.5D visuals.
+        The ray directions and fisheye correction come from the camera
+        tables. The result is used to render 2.5D visuals.
         """
         self.rayCastResult = []
         px, py = self.game.player.position
         mapX, mapY = self.game.player.mapPosition
         textureVert, textureHort = 1, 1
+        gameMap = self.game.map
+        cells, width, height = gameMap.cells, gameMap.verticals, \
+            gameMap.horizontals
 
-        rayAngle = self.game.player.angle - HALF_FOV + 0.0001
-        for ray in range(NUMB_RAYS):
-            raySin = math.sin(rayAngle)
-            rayCos = math.cos(rayAngle)
+        scale = self.scale
+        raySins, rayCoses = self.camera.rayDirections(self.game.player.angle)
+        fisheye = self.camera.fisheyeList
+        for ray, raySin, rayCos in zip(
+                range(self.numbRays), raySins.tolist(), rayCoses.tolist()
+        ):
 
             # horizontals
             yHort, dy = (mapY + 1, 1) if raySin > 0 else (mapY - 1e-6, -1)
@@ -58,9 +113,10 @@ class RayCasting:
             dx = depthChange * rayCos
 
             for i in range(MAXIMUM_DEPTH):
-                tileHort = int(xHort), int(yHort)
-                if tileHort in self.game.map.gameWorld:
-                    textureHort = self.game.map.gameWorld[tileHort]
+                tileX, tileY = int(xHort), int(yHort)
+                if 0 <= tileX < width and 0 <= tileY < height and \
+                        cells[tileY * width + tileX]:
+                    textureHort = cells[tileY * width + tileX]
                     break
                 xHort += dx
                 yHort += dy
@@ -74,9 +130,10 @@ class RayCasting:
             dy = depthChange * raySin
 
             for i in range(MAXIMUM_DEPTH):
-                tileVert = int(xVert), int(yVert)
-                if tileVert in self.game.map.gameWorld:
-                    textureVert = self.game.map.gameWorld[tileVert]
+                tileX, tileY = int(xVert), int(yVert)
+                if 0 <= tileX < width and 0 <= tileY < height and \
+                        cells[tileY * width + tileX]:
+                    textureVert = cells[tileY * width + tileX]
                     break
                 xVert += dx
                 yVert += dy
@@ -93,15 +150,15 @@ class RayCasting:
                 displacement = (1 - xHort) if raySin > 0 else xHort
 
             if MODE == 'Test' and TESTMODE == '3D':
-                depth *= math.cos(self.game.player.angle - rayAngle)
+                depth *= fisheye[ray]
                 projectionHeight = SCREEN_DISTANCE / (depth + 0.0001)
                 color = [255 / (1 + depth ** 5 * 0.00001)] * 3
                 pg.draw.rect(
                     self.game.screen,
                     color,
                     (
-                        ray * SCALE, HALF_HEIGHT - projectionHeight // 2,
-                        SCALE, projectionHeight
+                        ray * scale, HALF_HEIGHT - projectionHeight // 2,
+                        scale, projectionHeight
                     )
                 )
             elif MODE == 'Test' and TESTMODE == '2D':
@@ -114,52 +171,276 @@ class RayCasting:
                         2
                 )
             else:
-                depth *= math.cos(self.game.player.angle - rayAngle)
+                depth *= fisheye[ray]
                 projectionHeight = SCREEN_DISTANCE / (depth + 0.0001)
                 self.rayCastResult.append(
                     (depth, projectionHeight, texture, displacement)
                 )
 
-            rayAngle += ANGLE_CHANGE
+        if self.rayCastResult:
+            results = np.array(self.rayCastResult)
+            self.depthBuffer = results[:, 0]
+            self.projectionHeights = results[:, 1]
+            self.textureIds = results[:, 2].astype(np.uint8)
+            self.textureOffsets = results[:, 3]
+
+    @profiled('rayCast')
+    def rayCastVectorized(self):
+        """
+        Vectorized version of rayCast. Instead of stepping each ray in turn,
+        every ray is marched MAXIMUM_DEPTH steps at once as NumPy arrays
+        against the dense map grid, for both the horizontal and vertical
+        intersections. The results match the scalar implementation and are
+        stored as arrays as well as in rayCastResult.
+        """
+        raySin, rayCos = self.camera.rayDirections(self.game.player.angle)
+        (
+            self.depthBuffer, self.projectionHeights,
+            self.textureIds, self.textureOffsets
+        ) = self.castRays(
+                self.game.map.grid,
+                self.game.player.position,
+                raySin,
+                rayCos,
+                self.camera.fisheye
+        )
+        self.rayCastResult = list(zip(
+                self.depthBuffer.tolist(),
+                self.projectionHeights.tolist(),
+                self.textureIds.tolist(),
+                self.textureOffsets.tolist()
+        ))
 
+    @staticmethod
+    def castRays(grid, position, raySin, rayCos, fisheye):
+        """
+        Casts a set of rays against the dense map grid. This does the work
+        of rayCastVectorized without touching the game, so it can also run
+        on a band of rays in a worker process.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            position (tuple): The player's position.
+            raySin, rayCos (ndarray): The direction of each ray.
+            fisheye (ndarray): The fisheye correction factor of each ray.
+
+        Returns:
+            tuple: The fisheye corrected depth, projection height, texture
+                   id and texture offset arrays of the rays.
+        """
+        px, py = position
+        mapX, mapY = int(px), int(py)
+        marchRays = RayCasting.marchRays
+
+        # horizontals
+        sinPositive = raySin > 0
+        yHort = np.where(sinPositive, mapY + 1, mapY - 1e-6)
+        dy = np.where(sinPositive, 1, -1)
+        depthHort = (yHort - py) / raySin
+        xHort = px + depthHort * rayCos
+        depthChange = dy / raySin
+        dx = depthChange * rayCos
+        depthHort, xHort, _, textureHort = marchRays(
+                grid, depthHort, depthChange, xHort, dx, yHort, dy
+        )
+
+        # verticals
+        cosPositive = rayCos > 0
+        xVert = np.where(cosPositive, mapX + 1, mapX - 1e-6)
+        dx = np.where(cosPositive, 1, -1)
+        depthVert = (xVert - px) / rayCos
+        yVert = py + depthVert * raySin
+        depthChange = dx / rayCos
+        dy = depthChange * raySin
+        depthVert, _, yVert, textureVert = marchRays(
+                grid, depthVert, depthChange, xVert, dx, yVert, dy
+        )
+
+        # depth, texture offset
+        vertical = depthVert < depthHort
+        depth = np.where(vertical, depthVert, depthHort)
+        texture = np.where(vertical, textureVert, textureHort)
+        yVert %= 1
+        xHort %= 1
+        displacement = np.where(
+                vertical,
+                np.where(cosPositive, yVert, 1 - yVert),
+                np.where(sinPositive, 1 - xHort, xHort)
+        )
+
+        depth *= fisheye
+        projectionHeight = SCREEN_DISTANCE / (depth + 0.0001)
+        return depth, projectionHeight, texture, displacement
+
+    @staticmethod
+    def marchRays(grid, depth, depthChange, x, dx, y, dy):
+        """
+        Steps every ray MAXIMUM_DEPTH times along one set of grid lines and
+        finds the first wall each ray hits.
+
+        Rays that hit nothing keep stepping to MAXIMUM_DEPTH, and take the
+        texture of the closest preceding ray that did hit a wall, exactly
+        like the scalar loop which only overwrites its texture on a hit.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            depth, x, y (ndarray): Starting depth and position of each ray.
+            depthChange, dx, dy (ndarray): Per step change of each value.
+
+        Returns:
+            tuple: The depth, x, y and texture id of each ray where it
+                   stopped.
+        """
+        def march(start, step):
+            # cumsum adds the steps in order, like the scalar +=
+            values = np.empty((start.size, MAXIMUM_DEPTH + 1))
+            values[:, 0] = start
+            values[:, 1:] = step[:, None]
+            return np.cumsum(values, axis=1)
+
+        depths = march(depth, depthChange)
+        xs = march(x, dx)
+        ys = march(y, dy)
+
+        with np.errstate(invalid='ignore'):
+            tileX = xs[:, :MAXIMUM_DEPTH].astype(np.int64)
+            tileY = ys[:, :MAXIMUM_DEPTH].astype(np.int64)
+        tiles = Map.lookup(grid, tileX, tileY)
+        hits = tiles != 0
+        hitAny = hits.any(axis=1)
+        steps = np.where(hitAny, hits.argmax(axis=1), MAXIMUM_DEPTH)
+        rays = np.arange(depth.size)
+
+        # Carry the last hit texture forward onto rays that missed
+        hitTexture = tiles[rays, np.minimum(steps, MAXIMUM_DEPTH - 1)]
+        lastHit = np.maximum.accumulate(np.where(hitAny, rays, -1))
+        texture = np.where(lastHit >= 0, hitTexture[lastHit], 1)
+
+        return depths[rays, steps], xs[rays, steps], ys[rays, steps], texture
+
+    @profiled('getObjectRenderList')
     def getObjectRenderList(self):
         """
         Prepares a list of objects (walls) to be rendered based on the results
         of the raycasting. This includes determining the size of the wall
         strips and their position on the screen based on distance from the
-        player.
+        player. The framebuffer wall renderer needs no wall strips, so the
+        list is left for the sprites only.
         """
         self.objectRenderList = []
+        if self.game.renderer.wallRenderer != 'Blit':
+            # Walls are written straight into the screen by the renderer
+            return
+        if WALL_STRIP_CACHE:
+            self.getCachedRenderList()
+            return
+
+        scale = self.scale
         for ray, values in enumerate(self.rayCastResult):
             depth, projectionHeight, texture, displacement = values
 
             if projectionHeight < HEIGHT:
                 wallStrip = self.textures[texture].subsurface(
-                    displacement * (TEXTURE_SIZE - SCALE),
+                    displacement * (TEXTURE_SIZE - scale),
                     0,
-                    SCALE, TEXTURE_SIZE
+                    scale, TEXTURE_SIZE
                 )
                 wallStrip = pg.transform.scale(
-                        wallStrip, (SCALE, projectionHeight)
+                        wallStrip, (scale, projectionHeight)
                 )
-                position = (ray * SCALE, HALF_HEIGHT - projectionHeight // 2)
+                position = (ray * scale, HALF_HEIGHT - projectionHeight // 2)
             else:
                 texture_height = TEXTURE_SIZE * HEIGHT / projectionHeight
                 wallStrip = self.textures[texture].subsurface(
-                    displacement * (TEXTURE_SIZE - SCALE),
+                    displacement * (TEXTURE_SIZE - scale),
                     HALF_TEXTURE_SIZE - texture_height // 2,
-                    SCALE, texture_height
+                    scale, texture_height
                 )
-                wallStrip = pg.transform.scale(wallStrip, (SCALE, HEIGHT))
-                position = (ray * SCALE, 0)
+                wallStrip = pg.transform.scale(wallStrip, (scale, HEIGHT))
+                position = (ray * scale, 0)
 
             self.objectRenderList.append((depth, wallStrip, position))
 
+    def getCachedRenderList(self):
+        """
+        Same as getObjectRenderList, but takes the wall strips from the
+        strip cache instead of cutting and scaling a new Surface per ray.
+        """
+        getStrip = self.stripCache.getStrip
+        scale = self.scale
+        for ray, values in enumerate(self.rayCastResult):
+            depth, projectionHeight, texture, displacement = values
+            wallStrip, height = getStrip(
+                    texture, displacement, projectionHeight
+            )
+            if height < HEIGHT:
+                position = (ray * scale, HALF_HEIGHT - height // 2)
+            else:
+                position = (ray * scale, 0)
+            self.objectRenderList.append((depth, wallStrip, position))
+
+    def getVisibleRuns(self, depth, left, width):
+        """
+        Depth-tests an object against the wall depth buffer and returns the
+        runs of screen columns where it is in front of the walls.
+
+        Args:
+            depth (float): Distance of the object from the player.
+            left (float): Screen x position of the object's left edge.
+            width (int): Width of the object on screen.
+
+        Returns:
+            list: (start, end) screen column ranges where the object is
+                  visible, clipped to the screen.
+        """
+        first = max(int(left), 0)
+        last = min(int(left) + int(width), WIDTH)
+        if first >= last:
+            return []
+
+        depthBuffer = self.depthBuffer
+        rays = np.minimum(
+                np.arange(first, last) // self.scale, len(depthBuffer) - 1
+        )
+        visible = np.concatenate(([0], depthBuffer[rays] > depth, [0]))
+        edges = np.diff(visible.astype(np.int8))
+        starts = (np.flatnonzero(edges == 1) + first).tolist()
+        ends = (np.flatnonzero(edges == -1) + first).tolist()
+        return list(zip(starts, ends))
+
+    def isVisible(self, depth, left, width):
+        """
+        Checks whether any screen column of an object is in front of the
+        walls, so that hidden objects can be skipped before they are scaled.
+
+        Args:
+            depth (float): Distance of the object from the player.
+            left (float): Screen x position of the object's left edge.
+            width (int): Width of the object on screen.
+
+        Returns:
+            bool: True if at least one column of the object is visible.
+        """
+        first = max(int(left) // self.scale, 0)
+        last = min((int(left) + int(width) - 1) // self.scale + 1,
+                   len(self.depthBuffer))
+        return first < last and \
+            bool((self.depthBuffer[first:last] > depth).any())
+
     def update(self):
         """
-        Updates the raycasting calculations by running the rayCast method to
-        determine which walls are visible and how they should be rendered,
-        followed by preparing the object render list for display.
+        Updates the raycasting calculations by running the configured
+        raycast engine to determine which walls are visible and how they
+        should be rendered, followed by preparing the object render list
+        for display. The parallel wall renderer casts the rays in its
+        worker processes instead.
         """
-        self.rayCast()
+        self.spriteRenderList = []
+        if self.game.renderer.wallRenderer == 'Parallel' and \
+                MODE != 'Test':
+            self.game.renderer.parallel.render()
+        elif RAYCAST_ENGINE == 'Vectorized' and MODE != 'Test':
+            self.rayCastVectorized()
+        else:
+            self.rayCast()
         self.getObjectRenderList()
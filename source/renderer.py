@@ -1,5 +1,8 @@
 import pygame as pg
 from source.settings import *
+from source.framebuffer import FramebufferRenderer
+from source.parallel import ParallelWallRenderer
+from source.hud import HUD
 
 
 class Renderer:
@@ -12,8 +15,8 @@ class Renderer:
     def __init__(self, game):
         """
         Initializes the Renderer class by loading wall textures, setting up the
-        sky texture, and preparing fonts for UI elements like game over screens
-        and menus.
+        sky texture, and preparing the HUD that draws UI elements like game
+        over screens and menus.
 
         Args:
             game (Game): A reference to the main game object.
@@ -21,17 +24,22 @@ class Renderer:
         self.game = game
         self.screen = game.screen
         self.wallTextures = self.loadWallTextures()
+        self.scale = SCALE
+        self.wallColumns = self.loadWallColumns(self.scale)
+        self.framebuffer = FramebufferRenderer(game, self.wallTextures)
         self.skyDisplacement = 0
         self.skyTexture = self.getTexture(
                 'resources/textures/stars.png',
                 (WIDTH, HALF_HEIGHT)
         )
+        self.wallRenderer = None
+        self.parallel = None
+        self.setWallRenderer(WALL_RENDERER)
         self.gameOver = self.getTexture(
             'resources/textures/game_over.png',
             RES,
         )
-        self.gameFont = pg.font.Font('resources/fonts/Halo3.ttf', 150)
-        self.gameOptionsFont = pg.font.Font('resources/fonts/hyperion.ttf', 50)
+        self.hud = HUD(game)
 
     @staticmethod
     def getTexture(path, resolution=(TEXTURE_SIZE, TEXTURE_SIZE)):
@@ -66,19 +74,117 @@ class Renderer:
             5: self.getTexture('resources/textures/decorated_wall.png'),
         }
 
+    def loadWallColumns(self, scale=SCALE):
+        """
+        Cuts every wall texture into scale wide columns once at load time,
+        so that the wall strip cache only ever has to scale them.
+
+        Args:
+            scale (int): Width of each column in pixels.
+
+        Returns:
+            dict: A dictionary mapping wall types to a list of column
+                  subsurfaces indexed by their texel offset.
+        """
+        return {
+            texture: [
+                image.subsurface(column, 0, scale, TEXTURE_SIZE)
+                for column in range(TEXTURE_SIZE - scale + 1)
+            ]
+            for texture, image in self.wallTextures.items()
+        }
+
+    def setScale(self, scale):
+        """
+        Rebuilds the wall columns and framebuffer texels for a new screen
+        column width.
+
+        Args:
+            scale (int): Width of each ray in screen columns.
+        """
+        self.scale = scale
+        self.wallColumns = self.loadWallColumns(scale)
+        self.framebuffer.setScale(scale)
+
+    def setWallRenderer(self, wallRenderer, workers=WALL_WORKERS):
+        """
+        Switches how the walls are drawn, starting or stopping the worker
+        pool of the parallel renderer as needed.
+
+        Args:
+            wallRenderer (str): 'Framebuffer', 'Parallel' or 'Blit'.
+            workers (int): Number of worker processes of the parallel
+                           renderer.
+        """
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+        self.wallRenderer = wallRenderer
+        if wallRenderer == 'Parallel':
+            self.parallel = ParallelWallRenderer(
+                self.game, self, workers
+            )
+
+    def updateTile(self, x, y, value):
+        """
+        Passes a changed tile of the map on to the parallel renderer, if
+        any, whose workers draw from their own copy of the grid.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+            value (int): The wall texture id, or zero for empty space.
+        """
+        if self.parallel is not None:
+            self.parallel.updateTile(x, y, value)
+
+    def close(self):
+        """Releases the worker pool of the parallel renderer, if any."""
+        self.setWallRenderer('Framebuffer')
+
     def renderTextures(self):
         """
-        Renders all textures in the textureList by sorting them based on
-        depth, ensuring that objects farther from the player are rendered
-        first. This ensures proper layering of textures.
+        Renders the walls and sprites of the current frame. The walls are
+        drawn unsorted, as each wall strip covers its own screen columns.
+        Only the sprites are sorted by depth, farthest first, and each one
+        is depth-tested against the raycaster's depth buffer so that only
+        its columns in front of the walls are drawn.
         """
-        textureList = sorted(
-                self.game.raycasting.objectRenderList,
+        raycasting = self.game.raycasting
+        if self.wallRenderer == 'Framebuffer':
+            self.framebuffer.drawWalls()
+        elif self.wallRenderer == 'Blit':
+            for depth, image, position in raycasting.objectRenderList:
+                self.screen.blit(image, position)
+
+        spriteList = sorted(
+                raycasting.spriteRenderList,
                 key=lambda t: t[0],
                 reverse=True
         )
-        for depth, image, position in textureList:
-            self.screen.blit(image, position)
+        for depth, image, position in spriteList:
+            self.drawOccluded(depth, image, position)
+
+    def drawOccluded(self, depth, image, position):
+        """
+        Blits an image only in the screen columns where it is closer to the
+        player than the wall of that column.
+
+        Args:
+            depth (float): Distance of the image from the player.
+            image (Surface): The image to draw.
+            position (tuple): Screen position of the image's top left corner.
+        """
+        x, y = position
+        runs = self.game.raycasting.getVisibleRuns(
+                depth, x, image.get_width()
+        )
+        for start, end in runs:
+            self.screen.blit(
+                image,
+                (start, y),
+                (start - int(x), 0, end - start, image.get_height())
+            )
 
     def drawSky(self):
         """
@@ -86,9 +192,7 @@ class Renderer:
         horizontally based on the player's relative position to simulate
         movement. The floor is drawn as a rectangle beneath the horizon.
         """
-        self.skyDisplacement = (
-            self.skyDisplacement + 4.5 * self.game.player.relativePosition
-        ) % WIDTH
+        self.moveSky()
         self.screen.blit(self.skyTexture, (-self.skyDisplacement, 0))
         self.screen.blit(self.skyTexture, (-self.skyDisplacement + WIDTH, 0))
         # floor
@@ -98,6 +202,18 @@ class Renderer:
             (0, HALF_HEIGHT, WIDTH, HEIGHT)
         )
 
+    def moveSky(self):
+        """
+        Moves the sky along with the player's horizontal mouse movement.
+
+        Returns:
+            float: The new horizontal displacement of the sky.
+        """
+        self.skyDisplacement = (
+            self.skyDisplacement + 4.5 * self.game.player.relativePosition
+        ) % WIDTH
+        return self.skyDisplacement
+
     def drawGameOver(self):
         """
         Renders the game over screen with options to restart or quit. It
@@ -105,78 +221,22 @@ class Renderer:
         the player.
         """
         # self.screen.blit(self.gameOver, (0, 0))
-        self.gameOverSurface = self.gameFont.render(
-                "GAME OVER", False, 'red'
-        )
-        self.gameRestartSurface = self.gameOptionsFont.render(
-                "Restart (R)", False, 'red'
-        )
-        self.gameExitSurface = self.gameOptionsFont.render(
-                "Quit (ESC)", False, 'red'
-        )
-        self.gameOverRect = self.gameOverSurface.get_rect(
-                midtop=(800, 100)
-        )
-        self.gameRestartRect = self.gameRestartSurface.get_rect(
-                bottomleft=(200, 700)
-        )
-        self.gameExitRect = self.gameExitSurface.get_rect(
-                bottomright=(1400, 700)
-        )
-        self.screen.blit(self.gameOverSurface, self.gameOverRect)
-        self.screen.blit(self.gameRestartSurface, self.gameRestartRect)
-        self.screen.blit(self.gameExitSurface, self.gameExitRect)
-        pg.display.update(self.gameOverRect)
-        pg.display.update(self.gameRestartRect)
-        pg.display.update(self.gameExitRect)
+        self.hud.drawMenu('gameOver')
 
     def drawStats(self):
         """
         Renders the player's health as a percentage on the top left corner
-        of the screen. The health is displayed in red text and updates each
-        frame.
-        """
-        self.game.player.health
-        self.playerHealthSurface = self.gameOptionsFont.render(
-                f"{(self.game.player.health/PLAYER_MAX_HEALTH) * 100}%",
-                False,
-                'red'
-        )
-        self.playerHealthRect = self.playerHealthSurface.get_rect(
-                topleft=(20, 20)
-        )
-        self.screen.blit(self.playerHealthSurface, self.playerHealthRect)
-        pg.display.update(self.playerHealthRect)
+        of the screen. The health is displayed in red text, which is only
+        rendered again when the health changes.
+        """
+        self.hud.drawStats()
 
     def drawPauseMenu(self):
         """
         Renders the pause menu, displaying a "PAUSE MENU" message and options
         to restart the game or quit to the main menu.
         """
-        self.gamePauseSurface = self.gameFont.render(
-                "PAUSE MENU", False, 'red'
-        )
-        self.gameRestartSurface = self.gameOptionsFont.render(
-                "Restart (R)", False, 'red'
-        )
-        self.gameExitSurface = self.gameOptionsFont.render(
-                "Quit (ESC)", False, 'red'
-        )
-        self.gamePauseRect = self.gamePauseSurface.get_rect(
-                midtop=(800, 100)
-        )
-        self.gameRestartRect = self.gameRestartSurface.get_rect(
-                bottomleft=(200, 700)
-        )
-        self.gameExitRect = self.gameExitSurface.get_rect(
-                bottomright=(1400, 700)
-        )
-        self.screen.blit(self.gamePauseSurface, self.gamePauseRect)
-        self.screen.blit(self.gameRestartSurface, self.gameRestartRect)
-        self.screen.blit(self.gameExitSurface, self.gameExitRect)
-        pg.display.update(self.gamePauseRect)
-        pg.display.update(self.gameRestartRect)
-        pg.display.update(self.gameExitRect)
+        self.hud.drawMenu('pause')
 
     def drawVictory(self):
         """
@@ -184,37 +244,19 @@ class Renderer:
         restart or quit. This is displayed when the player successfully
         completes the game.
         """
-        self.gameVictorySurface = self.gameFont.render(
-                "Victory", False, 'red'
-        )
-        self.gameRestartSurface = self.gameOptionsFont.render(
-                "Restart (R)", False, 'red'
-        )
-        self.gameExitSurface = self.gameOptionsFont.render(
-                "Quit (ESC)", False, 'red'
-        )
-        self.gameVictoryRect = self.gameVictorySurface.get_rect(
-                midtop=(800, 100)
-        )
-        self.gameRestartRect = self.gameRestartSurface.get_rect(
-                bottomleft=(200, 700)
-        )
-        self.gameExitRect = self.gameExitSurface.get_rect(
-                bottomright=(1400, 700)
-        )
-        self.screen.blit(self.gameVictorySurface, self.gameVictoryRect)
-        self.screen.blit(self.gameRestartSurface, self.gameRestartRect)
-        self.screen.blit(self.gameExitSurface, self.gameExitRect)
-        pg.display.update(self.gameVictoryRect)
-        pg.display.update(self.gameRestartRect)
-        pg.display.update(self.gameExitRect)
+        self.hud.drawMenu('victory')
 
     def draw(self):
         """
         Calls the appropriate rendering methods to display the game visuals,
         including the sky, textures, and player stats. This method is the
-        main draw loop for the game.
+        main draw loop for the game. The parallel wall renderer has already
+        drawn the sky, floor and walls into its framebuffer, which is
+        presented in place of the sky.
         """
-        self.drawSky()
+        if self.wallRenderer == 'Parallel':
+            self.parallel.present()
+        else:
+            self.drawSky()
         self.renderTextures()
         self.drawStats()
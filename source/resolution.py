@@ -0,0 +1,97 @@
+from source.settings import *
+
+
+class DynamicResolution:
+    """
+    The DynamicResolution class changes the number of rays and the width of
+    each screen column at runtime to hold a target frame time. It keeps a
+    smoothed average of the time spent on each frame and steps to a coarser
+    column width when frames run over budget, or back to a finer one when
+    there is enough headroom.
+
+    To keep it from oscillating between two levels, the thresholds for
+    stepping down and up are apart, the frame time has to stay past a
+    threshold for a number of frames, and every change is followed by a
+    cooldown during which the level is not changed again.
+
+    Attributes:
+        game (Game): Reference to the main game instance.
+        enabled (bool): Whether the resolution is adjusted at all.
+        scales (list): Column widths to choose from, finest first.
+        level (int): Index of the current column width in scales.
+        target (float): The frame time budget in milliseconds.
+        frameTime (float): Smoothed time spent on each frame in
+                           milliseconds.
+        overFrames, underFrames (int): Consecutive frames the frame time
+                                       spent past the step down and step up
+                                       thresholds.
+        cooldown (int): Frames left before the level may change again.
+    """
+
+    def __init__(self, game):
+        """
+        Initializes the controller at the finest column width.
+
+        Args:
+            game (Game): A reference to the main game object.
+        """
+        self.game = game
+        self.enabled = DYNAMIC_RESOLUTION
+        self.scales = sorted(set(DYNAMIC_RESOLUTION_SCALES))
+        self.level = 0
+        self.target = DYNAMIC_RESOLUTION_TARGET
+        self.frameTime = self.target
+        self.overFrames = 0
+        self.underFrames = 0
+        self.cooldown = 0
+
+    @property
+    def scale(self):
+        """Returns the column width of the current level."""
+        return self.scales[self.level]
+
+    def update(self):
+        """
+        Feeds the work time of the previous frame into the smoothed frame
+        time and changes the level when it has stayed past a threshold for
+        long enough. The clock's raw time is used as it leaves out the time
+        the clock spent waiting to hold FPS.
+        """
+        if not self.enabled:
+            return
+        workTime = self.game.clock.get_rawtime()
+        self.frameTime += (workTime - self.frameTime) * \
+            DYNAMIC_RESOLUTION_SMOOTHING
+
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+
+        if self.frameTime > self.target * DYNAMIC_RESOLUTION_UPPER:
+            self.overFrames += 1
+            self.underFrames = 0
+        elif self.frameTime < self.target * DYNAMIC_RESOLUTION_LOWER:
+            self.underFrames += 1
+            self.overFrames = 0
+        else:
+            self.overFrames = self.underFrames = 0
+
+        if self.overFrames >= DYNAMIC_RESOLUTION_PATIENCE and \
+                self.level < len(self.scales) - 1:
+            self.setLevel(self.level + 1)
+        elif self.underFrames >= 2 * DYNAMIC_RESOLUTION_PATIENCE and \
+                self.level > 0:
+            self.setLevel(self.level - 1)
+
+    def setLevel(self, level):
+        """
+        Switches to another column width and has the raycaster rebuild its
+        ray count and everything derived from it.
+
+        Args:
+            level (int): Index of the new column width in scales.
+        """
+        self.level = level
+        self.overFrames = self.underFrames = 0
+        self.cooldown = DYNAMIC_RESOLUTION_COOLDOWN
+        self.game.raycasting.setResolution(WIDTH // self.scale)
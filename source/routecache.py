@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from source.settings import *
+
+
+class RouteCache:
+    """
+    The RouteCache class keeps the routes found by PathFinding between
+    frames, so that enemies heading for the same tile from the same tile do
+    not search again. Routes are keyed by their start and goal tiles, and
+    the least recently used routes are evicted once the cache holds more
+    than its capacity.
+
+    Each route remembers the tiles it runs through. When enemies move onto
+    any of those tiles the route is blocked and dropped. Tiles that are
+    freed do not drop routes, as a cached route stays walkable even if a
+    shorter one opened up.
+
+    Attributes:
+        capacity (int): Maximum number of cached routes.
+        routes (OrderedDict): Next tile of each route by (start, goal), in
+                              least recently used order.
+        routeTiles (dict): Tiles each cached route runs through.
+        routesThrough (dict): Keys of the cached routes running through
+                              each tile.
+        hits, misses, evictions, invalidations (int): Counters used to tune
+                                                      the cache.
+    """
+
+    def __init__(self, capacity=ROUTE_CACHE_SIZE):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int): Maximum number of cached routes.
+        """
+        self.capacity = max(1, int(capacity))
+        self.routes = OrderedDict()
+        self.routeTiles = {}
+        self.routesThrough = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, start, goal):
+        """
+        Looks up a route.
+
+        Args:
+            start (tuple): The tile the route starts on.
+            goal (tuple): The tile the route leads to.
+
+        Returns:
+            tuple: The next tile of the route, or None on a cache miss.
+        """
+        key = (start, goal)
+        nextTile = self.routes.get(key)
+        if nextTile is None:
+            self.misses += 1
+            return None
+        self.routes.move_to_end(key)
+        self.hits += 1
+        return nextTile
+
+    def put(self, start, goal, nextTile, tiles):
+        """
+        Stores a route, evicting the least recently used routes if the cache
+        is full.
+
+        Args:
+            start (tuple): The tile the route starts on.
+            goal (tuple): The tile the route leads to.
+            nextTile (tuple): The first tile to move to.
+            tiles (list): Every tile of the route after the start.
+        """
+        key = (start, goal)
+        if key in self.routes:
+            self.remove(key)
+        self.routes[key] = nextTile
+        self.routeTiles[key] = tiles
+        routesThrough = self.routesThrough
+        for tile in tiles:
+            keys = routesThrough.get(tile)
+            if keys is None:
+                keys = routesThrough[tile] = set()
+            keys.add(key)
+        while len(self.routes) > self.capacity:
+            self.remove(next(iter(self.routes)))
+            self.evictions += 1
+
+    def remove(self, key):
+        """
+        Removes a route.
+
+        Args:
+            key (tuple): The (start, goal) key of the route.
+        """
+        del self.routes[key]
+        routesThrough = self.routesThrough
+        for tile in self.routeTiles.pop(key):
+            keys = routesThrough[tile]
+            keys.discard(key)
+            if not keys:
+                del routesThrough[tile]
+
+    def invalidateTiles(self, tiles):
+        """
+        Drops every route running through any of a set of tiles.
+
+        Args:
+            tiles (iterable): The tiles that can no longer be walked
+                              through.
+        """
+        routesThrough = self.routesThrough
+        for tile in tiles:
+            keys = routesThrough.get(tile)
+            if keys:
+                for key in list(keys):
+                    self.remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Removes every cached route, keeping the statistics."""
+        self.invalidations += len(self.routes)
+        self.routes.clear()
+        self.routeTiles.clear()
+        self.routesThrough.clear()
+
+    @property
+    def hitRate(self):
+        """Returns the fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Returns the cache statistics used to tune the capacity.
+
+        Returns:
+            dict: Hit rate, counters and size of the cache.
+        """
+        return {
+            'hitRate': self.hitRate,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'routes': len(self.routes),
+            'capacity': self.capacity,
+        }
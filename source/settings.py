@@ -7,10 +7,24 @@ MODE = '3D'
 TESTMODE = '3D'
 LINEOFSIGHT = False
 PATH_FINDING_SETTING = True
+PATH_FINDING_MODE = 'FlowField'  # 'FlowField', 'Search' or 'Hierarchical'
+SHOW_CACHE_STATS = False
+SHOW_AI_STATS = False
+
+# Profiler
+PROFILER_ENABLED = True
+PROFILER_HISTORY = 600
+PROFILER_CSV_PATH = 'profile.csv'
+PROFILER_CAPTURE_FRAMES = 120
+PROFILER_GRAPH_KEY = pg.K_F3
+PROFILER_CAPTURE_KEY = pg.K_F4
 
 # Cheats
 INFINITE_HEALTH = False
 
+# MAP SETTINGS
+MAP_PATH = 'resources/maps/mapTwo.map'
+
 # DISPLAY SETTINGS
 RES = WIDTH, HEIGHT = 1600, 900
 FPS = 60
@@ -19,6 +33,14 @@ HALF_HEIGHT = HEIGHT // 2
 
 # GRAPHICS SETTINGS
 GROUND_COLOR = (30, 30, 30)
+RAYCAST_ENGINE = 'Vectorized'  # 'Vectorized' or 'Python'
+WALL_RENDERER = 'Framebuffer'  # 'Framebuffer', 'Parallel' or 'Blit'
+WALL_WORKERS = 4
+WALL_STRIP_CACHE = True
+WALL_STRIP_CACHE_BYTES = 64 * 1024 * 1024
+WALL_OFFSET_QUANTIZATION = 1
+WALL_HEIGHT_QUANTIZATION = 2
+HUD_TEXT_CACHE_SIZE = 64
 TEXTURE_SIZE = 256
 HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
 
@@ -52,3 +74,57 @@ ANGLE_CHANGE = FIELD_OF_VIEW / NUMB_RAYS
 MAXIMUM_DEPTH = 20
 SCREEN_DISTANCE = HALF_WIDTH / math.tan(HALF_FOV)
 SCALE = WIDTH // NUMB_RAYS
+CAMERA_HEADING_STEPS = 16384
+
+# Chunk Settings
+CHUNK_SIZE = 8
+CHUNK_VIEW_DISTANCE = MAXIMUM_DEPTH
+CHUNK_FAR_TICK_INTERVAL = 4
+
+# AI Scheduler Settings
+AI_SCHEDULER = True
+AI_FRAME_BUDGET = 4.0
+AI_NEAR_DISTANCE = 6
+AI_DISTANT_INTERVAL = 3
+AI_IDLE_INTERVAL = 8
+
+# Crowd Settings
+SEPARATION = True
+SEPARATION_RADIUS = 0.6
+SEPARATION_WEIGHT = 1.5
+SEPARATION_NEIGHBOURS = 6
+
+# Level Generator Settings
+LEVELGEN_SPRITE_DENSITY = 0.01
+LEVELGEN_ENEMY_DENSITY = 0.01
+LEVELGEN_MAZE_LOOPS = 0.05
+LEVELGEN_WAYPOINT_WINDOW = 32
+
+# Path Finding Settings
+NAV_CORNER_CUTTING = False
+FLOW_FIELD_RADIUS = 64
+ROUTE_CACHE_SIZE = 1024
+HPA_CLUSTER_SIZE = 16
+HPA_WIDE_ENTRANCE = 6
+PATH_WORKER = True
+PATH_WORKER_BUDGET = 1.0
+PATH_WORKER_SUFFIXES = 16
+
+# Potentially Visible Set Settings
+PVS_ENABLED = True
+PVS_RADIUS = MAXIMUM_DEPTH
+PVS_RAYS = 720
+PVS_STEP = 0.25
+PVS_CACHE = True
+PVS_SUFFIX = '.pvs'
+PVS_BUILD_TILES = 1024
+
+# Dynamic Resolution Settings
+DYNAMIC_RESOLUTION = True
+DYNAMIC_RESOLUTION_SCALES = (SCALE, 4, 5, 8)
+DYNAMIC_RESOLUTION_TARGET = 1000 / FPS
+DYNAMIC_RESOLUTION_UPPER = 1.0
+DYNAMIC_RESOLUTION_LOWER = 0.7
+DYNAMIC_RESOLUTION_SMOOTHING = 0.1
+DYNAMIC_RESOLUTION_PATIENCE = 30
+DYNAMIC_RESOLUTION_COOLDOWN = 60
@@ -0,0 +1,188 @@
+import numpy as np
+from itertools import compress
+from source.settings import *
+from source.maps import Map
+from source.enemystore import EnemyStore
+from source.profiler import profiled
+
+
+class SightLines:
+    """
+    The SightLines class works out which enemies can see the player. Once a
+    frame the sight lines of every living enemy near the player are cast
+    together as NumPy arrays, in the same way the walls are, and the result
+    is kept for the rest of the frame. The enemies then only look up their
+    own entry, for their logic, for taking hits and for the 2D test view.
+
+    A sight line is cast from the player towards an enemy along the
+    horizontal and the vertical grid lines, MAXIMUM_DEPTH steps each, and
+    the enemy is in sight unless a wall is reached before its tile. Enemies
+    on the player's tile are always in sight, and enemies the map's
+    visibility table rules out are never cast.
+
+    Attributes:
+        game (Game): A reference to the main game instance.
+        results (dict): Whether each enemy resolved this frame is in sight.
+        resolved (int): Number of sight lines cast in the last batch.
+    """
+
+    def __init__(self, game):
+        """
+        Initializes the service with no sight lines resolved.
+
+        Args:
+            game (Game): A reference to the main game instance.
+        """
+        self.game = game
+        self.results = {}
+        self.resolved = 0
+
+    def update(self, enemies):
+        """
+        Resolves the sight lines of the living enemies among the given ones
+        for this frame, replacing those of the last frame.
+
+        Args:
+            enemies (list): The enemies that will be updated this frame.
+        """
+        alive = list(compress(
+            enemies, EnemyStore.gather(enemies, 'alive').tolist()
+        ))
+        self.results = dict(zip(alive, self.resolve(alive).tolist()))
+
+    def canSee(self, enemy):
+        """
+        Looks up whether an enemy can see the player this frame. An enemy
+        that was not part of the frame's batch is resolved on its own.
+
+        Args:
+            enemy (Enemy): The enemy looking for the player.
+
+        Returns:
+            bool: True if the player is in sight, False otherwise.
+        """
+        visible = self.results.get(enemy)
+        if visible is None:
+            visible = self.results[enemy] = bool(self.resolve([enemy])[0])
+        return visible
+
+    @profiled('resolveSightLines')
+    def resolve(self, enemies):
+        """
+        Casts the sight lines of a list of enemies in one pass.
+
+        Args:
+            enemies (list): The enemies to resolve.
+
+        Returns:
+            ndarray: Whether each enemy can see the player.
+        """
+        self.resolved = len(enemies)
+        if not enemies:
+            return np.zeros(0, dtype=bool)
+        positions = np.column_stack((
+            EnemyStore.gather(enemies, 'x'), EnemyStore.gather(enemies, 'y')
+        ))
+        player = self.game.player
+        mapX, mapY = player.mapPosition
+        tileX = positions[:, 0].astype(np.int64)
+        tileY = positions[:, 1].astype(np.int64)
+
+        visible = (tileX == mapX) & (tileY == mapY)
+        # The visibility table rules out most enemies with one lookup
+        cast = ~visible & self.game.map.areVisible(mapX, mapY, tileX, tileY)
+        if cast.any():
+            visible[cast] = self.castSightLines(
+                self.game.map.grid, player.position,
+                positions[cast], tileX[cast], tileY[cast]
+            )
+        return visible
+
+    @staticmethod
+    def castSightLines(grid, position, targets, tileX, tileY):
+        """
+        Casts sight lines from the player to a set of targets against the
+        dense map grid, without touching the game.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            position (tuple): The player's position.
+            targets (ndarray): (x, y) positions of the targets.
+            tileX, tileY (ndarray): The tiles of the targets.
+
+        Returns:
+            ndarray: Whether each target can be seen from the player.
+        """
+        px, py = position
+        mapX, mapY = int(px), int(py)
+        angle = np.arctan2(targets[:, 1] - py, targets[:, 0] - px)
+        raySin, rayCos = np.sin(angle), np.cos(angle)
+        march = SightLines.marchSightLines
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # horizontals
+            sinPositive = raySin > 0
+            yHort = np.where(sinPositive, mapY + 1, mapY - 1e-6)
+            dy = np.where(sinPositive, 1, -1)
+            depthHort = (yHort - py) / raySin
+            xHort = px + depthHort * rayCos
+            depthChange = dy / raySin
+            dx = depthChange * rayCos
+            targetHort, wallHort = march(
+                grid, tileX, tileY,
+                depthHort, depthChange, xHort, dx, yHort, dy
+            )
+
+            # verticals
+            cosPositive = rayCos > 0
+            xVert = np.where(cosPositive, mapX + 1, mapX - 1e-6)
+            dx = np.where(cosPositive, 1, -1)
+            depthVert = (xVert - px) / rayCos
+            yVert = py + depthVert * raySin
+            depthChange = dx / rayCos
+            dy = depthChange * raySin
+            targetVert, wallVert = march(
+                grid, tileX, tileY,
+                depthVert, depthChange, xVert, dx, yVert, dy
+            )
+
+        targetDistance = np.maximum(targetHort, targetVert)
+        wallDistance = np.maximum(wallHort, wallVert)
+        return ((0 < targetDistance) & (targetDistance < wallDistance)) | \
+            (wallDistance == 0)
+
+    @staticmethod
+    def marchSightLines(grid, tileX, tileY, depth, depthChange, x, dx, y, dy):
+        """
+        Steps every sight line MAXIMUM_DEPTH times along one set of grid
+        lines and finds whether it first reaches its target's tile or a
+        wall.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            tileX, tileY (ndarray): The tiles of the targets.
+            depth, x, y (ndarray): Starting depth and position of each line.
+            depthChange, dx, dy (ndarray): Per step change of each value.
+
+        Returns:
+            tuple: The depth at which each line reached its target and the
+                   depth at which it reached a wall, zero where it did not.
+        """
+        def march(start, step):
+            # cumsum adds the steps in order, like the scalar +=
+            values = np.empty((start.size, MAXIMUM_DEPTH))
+            values[:, 0] = start
+            values[:, 1:] = step[:, None]
+            return np.cumsum(values, axis=1)
+
+        depths = march(depth, depthChange)
+        stepX = march(x, dx).astype(np.int64)
+        stepY = march(y, dy).astype(np.int64)
+        reached = (stepX == tileX[:, None]) & (stepY == tileY[:, None])
+        events = reached | (Map.lookup(grid, stepX, stepY) != 0)
+        lines = np.arange(depth.size)
+        first = events.argmax(axis=1)
+        hit = events[lines, first]
+        distance = np.where(hit, depths[lines, first], 0)
+        isTarget = reached[lines, first]
+        return np.where(isTarget, distance, 0), np.where(isTarget, 0, distance)
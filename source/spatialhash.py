@@ -0,0 +1,258 @@
+import math
+import heapq
+from source.settings import *
+
+
+class SpatialHash:
+    """
+    The SpatialHash class keeps track of which entities are on each tile of
+    the map. Entities are only moved in the hash when they step onto
+    another tile, so it stays up to date without being rebuilt, and it
+    answers whether a tile is taken, which entities are within a radius of
+    a position and which are the nearest ones.
+
+    The taken tiles are also kept as a set, for the path finding to search
+    around. Once the set has been handed to another thread it is not
+    changed again, and the next change is made to a copy.
+
+    Attributes:
+        cells (dict): Lists of entities by (x, y) tile. Only taken tiles
+                      are stored.
+        occupied (set): The taken tiles.
+        newlyOccupied (set): Tiles taken since takeNewlyOccupied was last
+                             called.
+        shared (bool): Whether occupied was handed to another thread.
+        count (int): Number of entities in the hash.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty spatial hash.
+        """
+        self.cells = {}
+        self.occupied = set()
+        self.newlyOccupied = set()
+        self.shared = False
+        self.count = 0
+
+    def __len__(self):
+        """Returns the number of entities in the hash."""
+        return self.count
+
+    def __contains__(self, tile):
+        """Returns whether an entity is on a tile."""
+        return tile in self.cells
+
+    @staticmethod
+    def keyOf(x, y):
+        """
+        Returns:
+            tuple: The (x, y) tile holding a position.
+        """
+        return int(x), int(y)
+
+    def add(self, entity):
+        """
+        Adds an entity to the tile of its position and remembers the tile
+        in the entity's tile attribute.
+
+        Args:
+            entity (Enemy): The entity to add.
+        """
+        tile = entity.tile = self.keyOf(entity.x, entity.y)
+        cell = self.cells.get(tile)
+        if cell is None:
+            cell = self.cells[tile] = []
+            self.ownOccupied().add(tile)
+            self.newlyOccupied.add(tile)
+        cell.append(entity)
+        self.count += 1
+
+    def remove(self, entity):
+        """
+        Removes an entity from its tile.
+
+        Args:
+            entity (Enemy): The entity to remove.
+        """
+        tile = entity.tile
+        cell = self.cells[tile]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[tile]
+            self.ownOccupied().discard(tile)
+        entity.tile = None
+        self.count -= 1
+
+    def move(self, entity):
+        """
+        Moves an entity to another tile if it has left its tile.
+
+        Args:
+            entity (Enemy): The entity that may have moved.
+
+        Returns:
+            bool: True if the entity changed tile.
+        """
+        if self.keyOf(entity.x, entity.y) == entity.tile:
+            return False
+        self.remove(entity)
+        self.add(entity)
+        return True
+
+    def ownOccupied(self):
+        """
+        Returns:
+            set: The taken tiles, copied first if they were shared.
+        """
+        if self.shared:
+            self.occupied = set(self.occupied)
+            self.shared = False
+        return self.occupied
+
+    def share(self):
+        """
+        Hands the taken tiles to another thread. The set handed over is not
+        changed afterwards.
+
+        Returns:
+            set: The taken tiles.
+        """
+        self.shared = True
+        return self.occupied
+
+    def takeNewlyOccupied(self):
+        """
+        Returns the tiles taken since the last call and starts over.
+
+        Returns:
+            set: The newly taken tiles.
+        """
+        tiles, self.newlyOccupied = self.newlyOccupied, set()
+        return tiles
+
+    def entitiesAt(self, tile):
+        """
+        Returns:
+            list: The entities on a tile.
+        """
+        return self.cells.get(tile, [])
+
+    def around(self, tile, reach):
+        """
+        Returns the entities on the tiles within reach tiles of a tile,
+        across and along, the tile's own included.
+
+        Args:
+            tile (tuple): The tile in the middle.
+            reach (int): Number of tiles out from the middle one.
+
+        Returns:
+            list: The entities of the tiles.
+        """
+        tileX, tileY = tile
+        cells = self.cells
+        found = []
+        for y in range(tileY - reach, tileY + reach + 1):
+            for x in range(tileX - reach, tileX + reach + 1):
+                cell = cells.get((x, y))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def ring(self, tile, reach):
+        """
+        Returns the entities on the tiles exactly reach tiles out from a
+        tile, along the border of the square of around.
+
+        Args:
+            tile (tuple): The tile in the middle.
+            reach (int): Number of tiles out from the middle one.
+
+        Returns:
+            list: The entities of the tiles.
+        """
+        if reach == 0:
+            return list(self.entitiesAt(tile))
+        tileX, tileY = tile
+        cells = self.cells
+        border = [
+            (x, y)
+            for y in (tileY - reach, tileY + reach)
+            for x in range(tileX - reach, tileX + reach + 1)
+        ] + [
+            (x, y)
+            for x in (tileX - reach, tileX + reach)
+            for y in range(tileY - reach + 1, tileY + reach)
+        ]
+        found = []
+        for key in border:
+            cell = cells.get(key)
+            if cell:
+                found.extend(cell)
+        return found
+
+    def withinRadius(self, x, y, radius, exclude=None):
+        """
+        Returns the entities within a radius of a position.
+
+        Args:
+            x (float): X coordinate of the position.
+            y (float): Y coordinate of the position.
+            radius (float): The radius in tiles.
+            exclude (Enemy): An entity to leave out, such as the one asking.
+
+        Returns:
+            list: The entities within the radius.
+        """
+        squared = radius * radius
+        return [
+            entity
+            for entity in self.around(self.keyOf(x, y), math.ceil(radius))
+            if entity is not exclude
+            and (entity.x - x) ** 2 + (entity.y - y) ** 2 <= squared
+        ]
+
+    def nearest(self, x, y, k, radius=None, exclude=None):
+        """
+        Returns the k entities nearest to a position, searching the tiles
+        ring by ring outwards until no closer entity can be left.
+
+        Args:
+            x (float): X coordinate of the position.
+            y (float): Y coordinate of the position.
+            k (int): Number of entities wanted.
+            radius (float): Distance beyond which entities are ignored, or
+                            None for no limit.
+            exclude (Enemy): An entity to leave out, such as the one asking.
+
+        Returns:
+            list: Up to k entities, the nearest first.
+        """
+        if k <= 0:
+            return []
+        tile = self.keyOf(x, y)
+        limit = math.inf if radius is None else radius * radius
+        # Heap of the best k so far, as negated squared distances
+        best = []
+        seen = 0
+        reach = 0
+        while seen < self.count:
+            # Tiles of the next ring are at least reach - 1 tiles away
+            closest = max(reach - 1, 0) ** 2
+            if len(best) == k and -best[0][0] <= closest or closest > limit:
+                break
+            for entity in self.ring(tile, reach):
+                seen += 1
+                if entity is exclude:
+                    continue
+                squared = (entity.x - x) ** 2 + (entity.y - y) ** 2
+                if squared > limit:
+                    continue
+                item = (-squared, id(entity), entity)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            reach += 1
+        return [entity for _, _, entity in sorted(best, reverse=True)]
@@ -1,5 +1,24 @@
+import numpy as np
+from itertools import compress
 from source.sprites import *
 from source.enemies import *
+from source.enemystore import EnemyStore
+from source.mapfile import SPRITE_KINDS, ENEMY_KINDS
+from source.chunks import ChunkIndex
+from source.spatialhash import SpatialHash
+from source.aischeduler import AIScheduler
+
+# Classes spawned for the kind names of level file spawn records
+SPRITE_TYPES = {
+    'Sprite': Sprite,
+    'AnimatedSprite': AnimatedSprite,
+}
+ENEMY_TYPES = {
+    'Trooper': Trooper,
+    'DeathKnight': DeathKnight,
+    'CyberDemon': CyberDemon,
+    'Arachnotron': Arachnotron,
+}
 
 
 class SpriteManager:
@@ -7,14 +26,46 @@ class SpriteManager:
     The SpriteManager class manages all the sprites and enemies in the
     game, including static and animated sprites. It keeps track of sprite
     updates and enemy states, and determines when the player has achieved
-    victory by checking if all enemies are defeated.
+    victory by checking if all enemies are defeated. A level that never
+    had any enemies cannot be won.
+
+    Sprites and enemies are registered in chunk indexes. Each frame only the
+    ones in the chunks within CHUNK_VIEW_DISTANCE of the player are fully
+    updated and projected. Far away, only the enemies already hunting the
+    player have anything to do, and they are ticked once every
+    CHUNK_FAR_TICK_INTERVAL frames, on their chunk's turn. How often each
+    near enemy runs its logic is decided by the AI scheduler.
+
+    The enemies are kept in an EnemyStore. The near enemies are located
+    relative to the player together, only those on screen are projected
+    one by one, and after their logic has run the steps they decided on
+    are taken together, with wall collision.
+
+    The enemies tell the sprite manager when they change state or move,
+    and the count of living enemies, the hunters and the spatial hash of
+    the living enemies are kept up to date from those events rather than
+    worked out every frame. A corpse leaves the enemy chunks for the sprite
+    list, and is only drawn from then on. When SEPARATION is on, the moving
+    near enemies steer away from their nearest neighbours in the spatial
+    hash before they take their steps, so crowds spread out.
 
     Attributes:
         game (Game): Reference to the main game instance.
-        spriteList (list): A list containing all the sprites in the game.
+        spriteList (list): A list containing all the sprites in the game,
+                           corpses included.
         enemyList (list): A list containing all the enemies in the game.
-        enemyNumber (int): The number of enemies currently in the game.
-        enemyPositions (set): A set of the positions of all active enemies.
+        enemyNumber (int): The number of enemies added to the game, dead
+                           ones included.
+        enemyHash (SpatialHash): The living enemies by tile.
+        enemiesAlive (int): The number of living enemies.
+        spriteChunks, enemyChunks (ChunkIndex): Chunk indexes of the
+                                                sprites and enemies.
+        hunters (dict): Living enemies that are hunting the player, as
+                        keys in the order they started hunting.
+        frameNumber (int): Number of updates so far, used to pick the far
+                           chunks to tick.
+        scheduler (AIScheduler): Tiers and time budget of the near enemies.
+        enemyStore (EnemyStore): The values of all the enemies.
         enemySpritePath (str): File path to the enemy sprite resources.
     """
 
@@ -22,7 +73,7 @@ class SpriteManager:
         """
         Initializes the SpriteManager by setting up lists for sprites and
         enemies, loading static and animated sprites, and adding enemies to
-        the game world.
+        the game world at the spawns of the level file.
 
         Args:
             game (Game): A reference to the main game instance.
@@ -31,37 +82,25 @@ class SpriteManager:
         self.spriteList = []
         self.enemyList = []
         self.enemyNumber = len(self.enemyList)
-        self.enemyPositions = {}
+        self.enemyHash = SpatialHash()
+        self.enemiesAlive = 0
         self.enemyHealthRecoupe = 0
+        self.spriteChunks = ChunkIndex()
+        self.enemyChunks = ChunkIndex()
+        self.hunters = {}
+        self.frameNumber = 0
+        self.scheduler = AIScheduler(game)
+        self.enemyStore = EnemyStore()
         staticSpritePath = 'resources/sprites/static/'
         animatedSpritePath = 'resources/sprites/animated/'
         self.enemySpritePath = 'resources/sprites/enemies/'
-        addSprite = self.addSprite
-        addEnemy = self.addEnemy
-
-        # Stationary Sprites
-        # addSprite(Sprite(game, position=(3, 3)))
-        addSprite(AnimatedSprite(game, position=(3, 3)))
-        addSprite(AnimatedSprite(game, position=(3, 6)))
-        addSprite(AnimatedSprite(game, position=(21.5, 9.5)))
-        addSprite(AnimatedSprite(game, position=(23.5, 9.5)))
-        addSprite(AnimatedSprite(game, position=(21.5, 16.5)))
-        addSprite(AnimatedSprite(game, position=(3.5, 22.5)))
-
-        # Enemies
-        addEnemy(Trooper(game, position=(5.5, 1.5)))
-        addEnemy(Trooper(game, position=(5.5, 6)))
-        addEnemy(Trooper(game, position=(14.5, 3.5)))
-        addEnemy(Trooper(game, position=(13.5, 8.5)))
-        addEnemy(Trooper(game, position=(18.5, 11.5)))
-        addEnemy(Trooper(game, position=(21.5, 7.5)))
-        addEnemy(Trooper(game, position=(21, 19)))
-        addEnemy(Trooper(game, position=(10.5, 11)))
-        addEnemy(Trooper(game, position=(14.5, 17.5)))
-        addEnemy(Trooper(game, position=(5, 24)))
-        addEnemy(DeathKnight(game, position=(18.5, 5.5)))
-        addEnemy(CyberDemon(game, position=(20.5, 23)))
-        addEnemy(Arachnotron(game, position=(6, 9)))
+
+        # Stationary sprites and enemies spawn where the level file says
+        level = game.map.level
+        for kind, position in level.spawns(level.sprites, SPRITE_KINDS):
+            self.addSprite(SPRITE_TYPES[kind](game, position=position))
+        for kind, position in level.spawns(level.enemies, ENEMY_KINDS):
+            self.addEnemy(ENEMY_TYPES[kind](game, position=position))
 
     def addSprite(self, sprite):
         """
@@ -72,37 +111,163 @@ class SpriteManager:
             sprite (Sprite): The sprite object to be added to the sprite list.
         """
         self.spriteList.append(sprite)
+        self.spriteChunks.add(sprite)
 
     def addEnemy(self, npc):
         """
         Adds a given enemy to the list of enemies. This method is responsible
         for managing enemy placement and their inclusion in the game world.
+        The enemy's values move into the sprite manager's store.
 
         Args:
             npc (Enemy): The enemy object to be added to the enemy list.
         """
+        self.enemyStore.adopt(npc)
+        npc.manager = self
         self.enemyList.append(npc)
+        self.enemyNumber += 1
+        self.enemyChunks.add(npc)
+        if npc.alive:
+            self.enemiesAlive += 1
+            self.enemyHash.add(npc)
+
+    def enemyChangedState(self, enemy, previous, state):
+        """
+        Keeps the hunters, the count of living enemies and the spatial hash
+        up to date when an enemy changes state, and moves corpses to the
+        sprites.
+
+        Args:
+            enemy (Enemy): The enemy.
+            previous (int): The state the enemy left.
+            state (int): The state the enemy entered.
+        """
+        if state == SEARCH or state == CHASE or state == ATTACK:
+            self.hunters[enemy] = None
+        elif state == DYING:
+            self.enemiesAlive -= 1
+            self.hunters.pop(enemy, None)
+            self.enemyHash.remove(enemy)
+        elif state == CORPSE:
+            self.scheduler.forget(enemy)
+            self.enemyChunks.remove(enemy)
+            self.addSprite(enemy)
+
+    def enemyMoved(self, enemy):
+        """
+        Moves an enemy that may have moved to its new chunk and tile.
+
+        Args:
+            enemy (Enemy): The enemy.
+        """
+        self.enemyChunks.move(enemy)
+        if enemy.tile is not None:
+            self.enemyHash.move(enemy)
+
+    def separate(self, enemies, rows):
+        """
+        Turns the headings of the moving enemies among some near ones away
+        from their SEPARATION_NEIGHBOURS nearest neighbours within
+        SEPARATION_RADIUS, found in the spatial hash.
+
+        Args:
+            enemies (list): The enemies.
+            rows (ndarray): The enemies' rows in the store.
+        """
+        store = self.enemyStore
+        moving = store.moving[rows]
+        around = self.enemyHash.around
+        reach = math.ceil(SEPARATION_RADIUS)
+        own, others = [], []
+        for enemy in compress(enemies, moving.tolist()):
+            neighbours = around(enemy.tile, reach)
+            own += [enemy.row] * len(neighbours)
+            others += [neighbour.row for neighbour in neighbours]
+        if own:
+            store.separate(
+                np.array(own), np.array(others), SEPARATION_RADIUS,
+                SEPARATION_WEIGHT, SEPARATION_NEIGHBOURS
+            )
 
     def update(self):
         """
-        Updates the state of all sprites and enemies. It checks if enemies
-        are alive, updates their positions, and updates each sprite and
-        enemy in the game. If all enemies are defeated, the player wins
-        the game.
+        Updates the state of the sprites and enemies near the player and of
+        the far ones whose turn it is. It checks if enemies are alive,
+        updates each sprite and enemy, and moves the ones that left their
+        chunk. The near enemies are ticked or rested as the AI scheduler
+        plans, and the sight lines of the ticked ones are resolved together
+        before any of them is updated. If all enemies are defeated, the
+        player wins the game.
         """
-        self.enemyPositions = set()
-        enemiesAlive = 0
-        for enemy in self.enemyList:
-            if enemy.alive:
-                self.enemyPositions.add(enemy.enemyMapPosition)
-                enemiesAlive += 1
+        self.frameNumber += 1
+        px, py = self.game.player.position
+        spriteChunks, enemyChunks = self.spriteChunks, self.enemyChunks
+        nearSprites = spriteChunks.nearKeys(px, py, CHUNK_VIEW_DISTANCE)
+        nearKeys = enemyChunks.nearKeys(px, py, CHUNK_VIEW_DISTANCE)
+        nearEnemies = enemyChunks.entities(nearKeys)
+        nearKeys = set(nearKeys)
+        farEnemies = [
+            enemy for enemy in self.hunters
+            if enemy.chunk not in nearKeys
+            and enemyChunks.isDue(enemy.chunk, self.frameNumber)
+        ]
+
+        newlyOccupied = self.enemyHash.takeNewlyOccupied()
+        if newlyOccupied:
+            self.game.pathfinding.occupyTiles(newlyOccupied)
+        self.game.pathfinding.collectRoutes()
+
+        store = self.enemyStore
+        rows = store.rowsOf(nearEnemies)
+
+        every, due, resting = self.scheduler.plan(nearEnemies, store)
+        self.game.sightLines.update(every + due)
 
-        for sprite in self.spriteList:
+        for sprite in spriteChunks.entities(nearSprites):
             sprite.update()
 
-        for enemy in self.enemyList:
-            enemy.update()
+        # Locate the near enemies together and project those on screen
+        store.locate(rows, self.game.player, self.game.raycasting)
+        for enemy in compress(nearEnemies, store.onScreen(rows).tolist()):
+            enemy.getProjection()
 
-        if enemiesAlive == 0:
+        self.scheduler.run(
+            every, due, resting, self.tickEnemy, self.restEnemy
+        )
+
+        # Steer the near enemies apart and take their steps together
+        if SEPARATION:
+            self.separate(nearEnemies, rows)
+        moved = store.move(rows, self.game.map.grid)
+        for enemy in compress(nearEnemies, moved.tolist()):
+            self.enemyMoved(enemy)
+
+        # Far enemies make up the steps of the frames they were not ticked
+        for enemy in farEnemies:
+            enemy.farUpdate(enemyChunks.farTickInterval)
+
+        if self.enemyNumber and self.enemiesAlive == 0:
             # self.game.active = False
             self.game.victory = True
+
+    def tickEnemy(self, enemy):
+        """
+        Runs the logic of a near enemy. The enemy has already been located
+        and projected, and is moved after all of them have run.
+
+        Args:
+            enemy (Enemy): The enemy to update.
+        """
+        enemy.think()
+        enemy.testDraw()
+
+    def restEnemy(self, enemy):
+        """
+        Updates a near enemy on a frame it is not ticked. The enemy has
+        already been located and projected, and keeps moving along its last
+        heading with the others.
+
+        Args:
+            enemy (Enemy): The enemy to update.
+        """
+        enemy.testDraw()
@@ -3,6 +3,11 @@ import os
 from collections import deque
 from source.settings import *
 
+# Images by file and animation frames by folder, loaded once and shared
+# by every sprite
+imageCache = {}
+frameCache = {}
+
 
 class Sprite:
     """
@@ -24,6 +29,7 @@ class Sprite:
         normDistance (float): Distance adjusted for the player's viewing angle.
         spriteHalfWidth (int): Half the width of the sprite when projected on
                                screen.
+        chunk (tuple): Key of the chunk the sprite is registered in.
     """
 
     def __init__(
@@ -48,7 +54,9 @@ class Sprite:
         self.game = game
         self.player = game.player
         self.x, self.y = position
-        self.image = pg.image.load(path).convert_alpha()
+        if path not in imageCache:
+            imageCache[path] = pg.image.load(path).convert_alpha()
+        self.image = imageCache[path]
         self.IMG_WIDTH = self.image.get_width()
         self.IMG_HALF_WIDTH = self.image.get_width() // 2
         self.IMG_RATIO = self.IMG_WIDTH / self.image.get_height()
@@ -58,6 +66,7 @@ class Sprite:
         self.thetaAngle, self.screenX = 0, 0
         self.distance, self.normDistance = 1, 1
         self.spriteHalfWidth = 0
+        self.chunk = None
 
     def getSprite(self):
         """
@@ -66,6 +75,18 @@ class Sprite:
         ensures the sprite is within the player's field of view and prepares
         the sprite for projection.
         """
+        self.locate()
+        if -self.IMG_HALF_WIDTH < self.screenX < \
+                (WIDTH + self.IMG_HALF_WIDTH) and self.normDistance > 0.5:
+            self.getProjection()
+
+    def locate(self):
+        """
+        Calculates the position, angle, distance and screen column of the
+        sprite relative to the player without projecting it. The distance
+        along the view direction is found by projecting onto the heading
+        from the camera tables.
+        """
         px = self.x - self.player.x
         py = self.y - self.player.y
         self.sx, self.sy = px, py
@@ -74,33 +95,46 @@ class Sprite:
         if (px > 0 and self.player.angle > math.pi) or (px < 0 and py < 0):
             deltaAngle += math.tau
 
-        deltaChange = deltaAngle / ANGLE_CHANGE
-        self.screenX = (HALF_NUMB_RAYS + deltaChange) * SCALE
+        raycasting = self.game.raycasting
+        deltaChange = deltaAngle / raycasting.angleChange
+        self.screenX = (raycasting.halfNumbRays + deltaChange) * \
+            raycasting.scale
         self.distance = math.hypot(px, py)
-        self.normDistance = self.distance * math.cos(deltaAngle)
-        if -self.IMG_HALF_WIDTH < self.screenX < \
-                (WIDTH + self.IMG_HALF_WIDTH) and self.normDistance > 0.5:
-            self.getProjection()
+        headingSin, headingCos = raycasting.camera.heading(self.player.angle)
+        self.normDistance = px * headingCos + py * headingSin
 
     def getProjection(self):
         """
         Projects the sprite onto the screen based on its distance from the
         player. Calculates the projection size and position, then adds it
-        to the game's render list.
-        """
+        to the game's sprite render list. Sprites that are completely
+        hidden behind walls are skipped before being scaled, first by the
+        map's visibility table and then by the depth buffer.
+        """
+        if not self.game.map.isVisible(
+                *self.player.mapPosition, int(self.x), int(self.y), near=True
+        ):
+            return
         projection = SCREEN_DISTANCE / self.normDistance * self.SPRITE_SCALE
         projectionWidth, projectionHeight = projection * self.IMG_RATIO, \
             projection
+        self.spriteHalfWidth = projectionWidth // 2
+        if not self.game.raycasting.isVisible(
+                self.normDistance,
+                self.screenX - self.spriteHalfWidth,
+                projectionWidth
+        ):
+            return
+
         image = pg.transform.scale(
                 self.image, (projectionWidth, projectionHeight)
         )
-        self.spriteHalfWidth = projectionWidth // 2
         heightDisplacment = projectionHeight * self.SPRITE_HEIGHT_SHIFT
         pos = self.screenX - self.spriteHalfWidth, HALF_HEIGHT - \
             projectionHeight // 2 + heightDisplacment
 
         # Append sprites to rendering list
-        self.game.raycasting.objectRenderList.append(
+        self.game.raycasting.spriteRenderList.append(
                 (self.normDistance, image, pos)
         )
 
@@ -111,6 +145,15 @@ class Sprite:
         """
         self.getSprite()
 
+    def farUpdate(self, steps=1):
+        """
+        Updates the sprite while it is too far from the player to be seen.
+        Scenery has nothing to do then.
+
+        Args:
+            steps (int): Number of frames since the last update.
+        """
+
 
 class AnimatedSprite(Sprite):
     """
@@ -158,7 +201,9 @@ class AnimatedSprite(Sprite):
     def getFrames(self, path):
         """
         Loads all frames for the animation from the specified folder path and
-        returns them as a deque (double-ended queue).
+        returns them as a deque (double-ended queue). The images of a folder
+        are only loaded the first time and shared by every sprite using
+        them, each sprite getting its own deque.
 
         Args:
             path (str): The folder path containing the animation frames.
@@ -166,12 +211,14 @@ class AnimatedSprite(Sprite):
         Returns:
             deque: A deque containing the loaded frames for the animation.
         """
-        frames = deque()
-        for directory in os.listdir(path):
-            if os.path.isfile(os.path.join(path, directory)):
-                img = pg.image.load(path + '/' + directory).convert_alpha()
-                frames.append(img)
-        return frames
+        if path not in frameCache:
+            frames = []
+            for directory in os.listdir(path):
+                if os.path.isfile(os.path.join(path, directory)):
+                    img = pg.image.load(path + '/' + directory).convert_alpha()
+                    frames.append(img)
+            frameCache[path] = frames
+        return deque(frameCache[path])
 
     def durationCheck(self):
         """
@@ -0,0 +1,364 @@
+import os
+import sys
+import math
+import zlib
+import struct
+import argparse
+import numpy as np
+from source.settings import *
+
+# PVS cache file layout, all little endian:
+#   header   HEADER
+#   payload  zlib compressed rowCount uint32 tile indexes followed by
+#            rowCount rows of rowBytes packed visibility bits
+MAGIC = b'MWPV'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIII')
+
+
+class PotentiallyVisibleSet:
+    """
+    The PotentiallyVisibleSet class holds a tile to tile visibility table of
+    a map. The row of a tile is a bitset over the square window of tiles
+    within radius tiles of it, with a bit set for every tile that can be
+    seen from somewhere inside the tile. Rows are packed with eight tiles
+    per byte and kept in a dictionary, so only rows of tiles that have been
+    queried take up memory on large maps.
+
+    A row is built by casting a fan of rays from the centre and the corners
+    of its tile and marking every tile a ray passes before it hits a wall.
+    The walls are sampled along each ray, so a ray may slip past the corner
+    of a wall but never stops early: the table errs towards visible. A
+    cleared bit therefore proves that nothing in the other tile can be seen,
+    while a set bit still needs an exact ray test. Tiles outside the window
+    are always reported visible.
+
+    Attributes:
+        grid (ndarray): The dense map grid indexed as grid[y, x].
+        path (str): The cache file beside the map, or None.
+        radius (int): Reach of a row in tiles.
+        window (int): Width and height of a row's window in tiles.
+        rows (dict): Packed rows as bytes by (x, y) tile.
+        fan (ndarray): Local tile indexes passed by each ray of the fan.
+        dirty (bool): Whether rows were built or dropped since the cache
+                      file was last read or written.
+    """
+
+    # Points inside a tile the fan of rays is cast from
+    SAMPLES = (
+        (0.5, 0.5), (0.05, 0.05), (0.95, 0.05), (0.05, 0.95), (0.95, 0.95)
+    )
+
+    def __init__(
+            self, grid, path=None, radius=PVS_RADIUS, rays=PVS_RAYS,
+            step=PVS_STEP
+    ):
+        """
+        Sets up an empty table and the ray fan its rows are built with.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+            path (str): The cache file to read and write rows from, or
+                        None to keep the table in memory only.
+            radius (int): Reach of a row in tiles.
+            rays (int): Number of rays cast from each sample point.
+            step (float): Distance between the samples along a ray.
+        """
+        self.path = path
+        self.radius = radius
+        self.rayCount = rays
+        self.window = 2 * radius + 1
+        self.rowBytes = (self.window * self.window + 7) // 8
+        self.rows = {}
+        self.dirty = False
+
+        # Rays reach the corners of the window, the fan is padded around
+        # it so that samples past the window need no bounds checks
+        self.reach = math.ceil(radius * math.sqrt(2)) + 1
+        self.fan = self.buildFan(rays, step)
+        self.setGrid(grid)
+
+    def setGrid(self, grid):
+        """
+        Points the table at a new copy of the map grid without dropping any
+        rows, for when the map replaces its grid array.
+
+        Args:
+            grid (ndarray): The dense map grid indexed as grid[y, x].
+        """
+        self.grid = grid
+        self.height, self.width = grid.shape
+        # Tiles outside the map are empty space, like everywhere else
+        self.walls = np.pad(grid != 0, self.reach + 1, constant_values=False)
+
+    def buildFan(self, rays, step):
+        """
+        Lists the tiles each ray of the fan passes through, in order, as
+        flat indexes into the local window around a tile. The fan is the
+        same for every tile, so rows only have to look up the walls.
+
+        Args:
+            rays (int): Number of rays cast from each sample point.
+            step (float): Distance between the samples along a ray.
+
+        Returns:
+            ndarray: One row of tile indexes per ray and sample point,
+                     padded with the ray's last tile.
+        """
+        reach = self.reach
+        size = 2 * reach + 1
+        angles = np.arange(rays) * (math.tau / rays) + 0.0001
+        steps = np.arange(0, reach, step)
+        offsetX = np.cos(angles)[:, None] * steps
+        offsetY = np.sin(angles)[:, None] * steps
+
+        fan = []
+        for sampleX, sampleY in self.SAMPLES:
+            xs = (reach + sampleX + offsetX).astype(np.intp)
+            ys = (reach + sampleY + offsetY).astype(np.intp)
+            for ray in (ys * size + xs).tolist():
+                # Consecutive samples in the same tile are looked up once
+                fan.append([
+                    tile for i, tile in enumerate(ray)
+                    if not i or tile != ray[i - 1]
+                ])
+        length = max(len(ray) for ray in fan)
+        return np.array(
+            [ray + ray[-1:] * (length - len(ray)) for ray in fan],
+            dtype=np.intp
+        )
+
+    def isVisible(self, fromX, fromY, toX, toY):
+        """
+        Looks up whether a tile may be visible from another.
+
+        Args:
+            fromX, fromY (int): The tile looked from.
+            toX, toY (int): The tile looked at.
+
+        Returns:
+            bool: False if nothing in the second tile can be seen from the
+                  first, True if it may be.
+        """
+        radius = self.radius
+        dx, dy = toX - fromX + radius, toY - fromY + radius
+        if not (0 <= dx < self.window and 0 <= dy < self.window):
+            return True
+        row = self.rows.get((fromX, fromY))
+        if row is None:
+            row = self.buildRow(fromX, fromY)
+        bit = dy * self.window + dx
+        return bool(row[bit >> 3] & (0x80 >> (bit & 7)))
+
+    def areVisible(self, fromX, fromY, xs, ys):
+        """
+        Looks up whether many tiles may be visible from one tile at once.
+
+        Args:
+            fromX, fromY (int): The tile looked from.
+            xs, ys (ndarray): Integer coordinates of the tiles looked at.
+
+        Returns:
+            ndarray: False for each tile that certainly cannot be seen,
+                     True for each one that may be.
+        """
+        radius, window = self.radius, self.window
+        dx, dy = xs - fromX + radius, ys - fromY + radius
+        inside = (dx >= 0) & (dx < window) & (dy >= 0) & (dy < window)
+        visible = np.ones(xs.shape, dtype=bool)
+        if inside.any():
+            row = self.rows.get((fromX, fromY))
+            if row is None:
+                row = self.buildRow(fromX, fromY)
+            bits = np.unpackbits(np.frombuffer(row, dtype=np.uint8))
+            visible[inside] = bits[dy[inside] * window + dx[inside]] != 0
+        return visible
+
+    def isNearVisible(self, fromX, fromY, toX, toY):
+        """
+        Looks up whether a tile or any of its eight neighbours may be visible
+        from another, for things wide enough to stick out of their tile.
+
+        Args:
+            fromX, fromY (int): The tile looked from.
+            toX, toY (int): The tile looked at.
+
+        Returns:
+            bool: False if nothing around the second tile can be seen from
+                  the first, True if it may be.
+        """
+        isVisible = self.isVisible
+        for y in (toY, toY - 1, toY + 1):
+            for x in (toX, toX - 1, toX + 1):
+                if isVisible(fromX, fromY, x, y):
+                    return True
+        return False
+
+    def buildRow(self, x, y):
+        """
+        Builds and stores the row of a tile. Tiles that are walls or lie
+        outside the map get a row that sees everything, as there is no
+        sensible place inside them to look from.
+
+        Args:
+            x (int): X coordinate of the tile.
+            y (int): Y coordinate of the tile.
+
+        Returns:
+            bytes: The packed row.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height) or \
+                self.grid[y, x]:
+            row = b'\xff' * self.rowBytes
+            self.rows[x, y] = row
+            return row
+
+        # The fan is cast in a local window around the tile, offset by the
+        # padding of the wall array
+        reach = self.reach
+        size = 2 * reach + 1
+        walls = self.walls[y + 1:y + 1 + size, x + 1:x + 1 + size].ravel()
+        hits = walls[self.fan]
+        # A ray sees up to and including the first wall it reaches
+        blocked = np.logical_or.accumulate(hits, axis=1)
+        blocked[:, 1:] = blocked[:, :-1].copy()
+        blocked[:, 0] = False
+        seen = np.zeros(size * size, dtype=bool)
+        seen[self.fan[~blocked]] = True
+        seen = seen.reshape(size, size)
+
+        radius = self.radius
+        window = seen[
+            reach - radius:reach + radius + 1, reach - radius:reach + radius + 1
+        ]
+        row = np.packbits(window).tobytes()
+        self.rows[x, y] = row
+        self.dirty = True
+        return row
+
+    def build(self):
+        """Builds the rows of every empty tile of the map."""
+        ys, xs = np.nonzero(self.grid == 0)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if (x, y) not in self.rows:
+                self.buildRow(x, y)
+
+    def invalidate(self, x, y):
+        """
+        Takes in a changed tile of the grid and drops the rows it can
+        appear in, which are the rows of the tiles within radius of it.
+        They are built again when next looked up.
+
+        Args:
+            x (int): X coordinate of the changed tile.
+            y (int): Y coordinate of the changed tile.
+        """
+        padding = self.reach + 1
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.walls[y + padding, x + padding] = self.grid[y, x] != 0
+        radius = self.radius
+        rows = self.rows
+        for rowY in range(y - radius, y + radius + 1):
+            for rowX in range(x - radius, x + radius + 1):
+                if rows.pop((rowX, rowY), None) is not None:
+                    self.dirty = True
+
+    def checksum(self):
+        """
+        Returns:
+            int: A checksum of the map grid, stored in the cache file so
+                 that rows of a changed map are not loaded.
+        """
+        return zlib.crc32(np.ascontiguousarray(self.grid).tobytes())
+
+    def load(self):
+        """
+        Reads the rows of the cache file, if there is one that was written
+        for this map with the same settings.
+
+        Returns:
+            bool: True if rows were loaded.
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            return False
+        (
+            magic, version, radius, width, height, rays, checksum,
+            rowCount, rowBytes
+        ) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or \
+                (radius, width, height, rays, rowBytes) != (
+                    self.radius, self.width, self.height, self.rayCount,
+                    self.rowBytes
+                ) or checksum != self.checksum():
+            return False
+        try:
+            payload = zlib.decompress(data[HEADER.size:])
+        except zlib.error:
+            return False
+        if len(payload) != rowCount * (4 + rowBytes):
+            return False
+
+        tiles = np.frombuffer(payload, '<u4', rowCount).tolist()
+        offset = 4 * rowCount
+        for tile in tiles:
+            self.rows[tile % width, tile // width] = \
+                payload[offset:offset + rowBytes]
+            offset += rowBytes
+        self.dirty = False
+        return True
+
+    def save(self):
+        """
+        Writes the rows of the tiles inside the map to the cache file, if
+        any rows changed since it was last read or written.
+        """
+        if self.path is None or not self.dirty:
+            return
+        keys = [
+            (x, y) for x, y in self.rows
+            if 0 <= x < self.width and 0 <= y < self.height
+        ]
+        tiles = np.array(
+            [y * self.width + x for x, y in keys], dtype='<u4'
+        ).tobytes()
+        payload = zlib.compress(
+            tiles + b''.join(self.rows[key] for key in keys)
+        )
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(
+                MAGIC, VERSION, self.radius, self.width, self.height,
+                self.rayCount, self.checksum(), len(keys), self.rowBytes
+            ))
+            file.write(payload)
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+
+def main(arguments=None):
+    """
+    Builds the full visibility table of a level file and writes it to the
+    cache file beside it.
+    """
+    from source.mapfile import Level
+
+    parser = argparse.ArgumentParser(
+        description='Precompute the potentially visible set of a level.'
+    )
+    parser.add_argument('level', help='level file to build the table for')
+    args = parser.parse_args(arguments)
+
+    level = Level(args.level)
+    table = PotentiallyVisibleSet(level.tiles, args.level + PVS_SUFFIX)
+    table.load()
+    table.build()
+    table.save()
+    sys.stdout.write(f'{table.path}: {len(table.rows)} rows\n')
+
+
+if __name__ == '__main__':
+    main()
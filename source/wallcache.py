@@ -0,0 +1,161 @@
+import pygame as pg
+from collections import OrderedDict
+from source.settings import *
+
+
+class WallStripCache:
+    """
+    The WallStripCache class keeps scaled wall strips around between frames
+    so that RayCasting does not have to cut and scale a new Surface for
+    every ray on every frame. Strips are keyed by texture id, quantized
+    texture offset and quantized projection height, and the least recently
+    used strips are evicted once the cache grows past its memory cap.
+
+    Attributes:
+        columns (dict): Pre-sliced texture columns for each wall texture,
+                        indexed by texture id and then texel column.
+        scale (int): Width of the columns and strips in pixels.
+        maxBytes (int): Memory cap for the cached strips in bytes.
+        offsetStep (int): Quantization step of the texture column in texels.
+        heightStep (int): Quantization step of the strip height in pixels.
+        strips (OrderedDict): The cached strips in least recently used order.
+        usedBytes (int): Memory currently used by the cached strips.
+        hits, misses, evictions (int): Counters used to tune the cache.
+    """
+
+    def __init__(
+            self,
+            columns,
+            scale=SCALE,
+            maxBytes=WALL_STRIP_CACHE_BYTES,
+            offsetStep=WALL_OFFSET_QUANTIZATION,
+            heightStep=WALL_HEIGHT_QUANTIZATION
+    ):
+        """
+        Initializes the cache with the pre-sliced texture columns and the
+        quantization and memory settings.
+
+        Args:
+            columns (dict): Texture columns from Renderer.loadWallColumns.
+            scale (int): Width of the columns and strips in pixels.
+            maxBytes (int): Memory cap for the cached strips in bytes.
+            offsetStep (int): Quantization step of the texture column.
+            heightStep (int): Quantization step of the strip height.
+        """
+        self.columns = columns
+        self.scale = scale
+        self.maxBytes = maxBytes
+        self.offsetStep = max(1, int(offsetStep))
+        self.heightStep = max(1, int(heightStep))
+        self.strips = OrderedDict()
+        self.usedBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def getStrip(self, texture, displacement, projectionHeight):
+        """
+        Returns the wall strip for a ray along with its quantized height,
+        scaling and caching a new strip only on a cache miss.
+
+        Args:
+            texture (int): The wall texture id.
+            displacement (float): Texture offset of the ray between 0 and 1.
+            projectionHeight (float): Projected height of the wall.
+
+        Returns:
+            tuple: The strip Surface and the quantized projection height.
+        """
+        column = int(displacement * (TEXTURE_SIZE - self.scale))
+        column -= column % self.offsetStep
+        height = int(projectionHeight) // self.heightStep * self.heightStep
+        height = max(height, 1)
+        key = (texture, column, height)
+
+        strip = self.strips.get(key)
+        if strip is not None:
+            self.strips.move_to_end(key)
+            self.hits += 1
+            return strip, height
+
+        self.misses += 1
+        strip = self.scaleStrip(
+            self.columns[texture][column], height, self.scale
+        )
+        self.strips[key] = strip
+        self.usedBytes += self.stripBytes(strip)
+        while self.usedBytes > self.maxBytes and len(self.strips) > 1:
+            _, evicted = self.strips.popitem(last=False)
+            self.usedBytes -= self.stripBytes(evicted)
+            self.evictions += 1
+        return strip, height
+
+    @staticmethod
+    def scaleStrip(column, height, scale=SCALE):
+        """
+        Scales a texture column to the given projection height. Walls taller
+        than the screen only scale the visible middle part of the column.
+
+        Args:
+            column (Surface): A pre-sliced texture column.
+            height (int): Projected height of the wall.
+            scale (int): Width of the column in pixels.
+
+        Returns:
+            Surface: The scaled wall strip.
+        """
+        if height < HEIGHT:
+            return pg.transform.scale(column, (scale, height))
+        textureHeight = TEXTURE_SIZE * HEIGHT / height
+        column = column.subsurface(
+            0, HALF_TEXTURE_SIZE - textureHeight // 2,
+            scale, textureHeight
+        )
+        return pg.transform.scale(column, (scale, HEIGHT))
+
+    @staticmethod
+    def stripBytes(strip):
+        """Returns the approximate memory used by a strip in bytes."""
+        return strip.get_width() * strip.get_height() * strip.get_bytesize()
+
+    def clear(self):
+        """Removes every cached strip, keeping the statistics."""
+        self.strips.clear()
+        self.usedBytes = 0
+
+    def reset(self, columns, scale):
+        """
+        Switches the cache to a new set of texture columns after the column
+        width changed, dropping every strip cut at the old width.
+
+        Args:
+            columns (dict): Texture columns from Renderer.loadWallColumns.
+            scale (int): Width of the columns and strips in pixels.
+        """
+        self.columns = columns
+        self.scale = scale
+        self.clear()
+
+    @property
+    def hitRate(self):
+        """Returns the fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Returns the cache statistics used to tune the quantization against
+        the visual quality.
+
+        Returns:
+            dict: Hit rate, counters and memory usage of the cache.
+        """
+        return {
+            'hitRate': self.hitRate,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'strips': len(self.strips),
+            'usedBytes': self.usedBytes,
+            'maxBytes': self.maxBytes,
+        }